@@ -4,7 +4,8 @@
 # @Last Modified by:   Zana Saedpanah
 # @Last Modified time: 2025-02-26 20:26:17
 
-from app.models import movie, tvshow
+from datetime import datetime
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from config import Config
@@ -18,22 +19,52 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
-    # Initialize extensions with app
-    db.init_app(app)
+    # Initialize extensions with app (engine options and pragmas per database)
+    from app.database import init_database
+    init_database(app, db)
     migrate.init_app(app, db)
 
+    from app.cache import init_page_cache, init_fragment_cache
+    init_page_cache(app)
+    init_fragment_cache(app)
+
+    from app.metrics import init_metrics
+    init_metrics(app)
+
+    from app.querylog import init_query_log
+    init_query_log(app)
+
+    from app.assets import init_assets
+    init_assets(app)
+
     # Create necessary directories
     import os
     if not os.path.exists(app.config['POSTER_CACHE_DIR']):
         os.makedirs(app.config['POSTER_CACHE_DIR'])
 
     # Register blueprints
-    from app.routes import main_bp, movie_bp, tvshow_bp
+    from app.routes import main_bp, movie_bp, tvshow_bp, person_bp, api_bp
     app.register_blueprint(main_bp)
     app.register_blueprint(movie_bp, url_prefix='/movies')
     app.register_blueprint(tvshow_bp, url_prefix='/tvshows')
+    app.register_blueprint(person_bp, url_prefix='/people')
+    app.register_blueprint(api_bp, url_prefix='/api/v1')
+
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+
+    # Make the current time available to every template (footer year)
+    @app.context_processor
+    def inject_now():
+        return {'now': datetime.utcnow()}
 
     return app
 
 
 # Import models to ensure they are registered with SQLAlchemy
+from app.models import movie, tvshow, person, library, scan  # noqa: E402,F401
+
+# Keep the library statistics in step with every flush, whether or not the
+# scanner has been imported
+from app.scanner import stats  # noqa: E402,F401
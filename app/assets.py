@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 23:58:12
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 23:58:12
+"""
+Self-hosted, fingerprinted and precompressed static assets
+
+``flask build-assets`` downloads the CDN dependencies into static/vendor
+(skipped for files already there, so an air-gapped install only needs
+them copied in once), then writes every static file to STATIC_BUILD_DIR
+under a content-hashed name, next to .gz and, with the optional brotli
+package, .br variants. url() references in stylesheets are rewritten to
+the hashed names. manifest.json maps each source path to its build.
+
+Templates call asset_url(), which prefers the build, then the plain
+static file and finally the CDN. Built files are served from /assets/
+with year-long immutable caching: their name changes with their content.
+"""
+import os
+import re
+import gzip
+import json
+import hashlib
+import logging
+import mimetypes
+import posixpath
+import urllib.request
+from flask import current_app, request, url_for, send_file, abort
+from werkzeug.security import safe_join
+
+# brotli typically compresses text assets smaller than gzip; it is optional
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Extensions worth precompressing; images and woff2 are compressed already
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.map', '.ttf', '.txt', '.ico')
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Static subdirectories that are not assets (the poster cache)
+EXCLUDED_DIRECTORIES = ('img/posters',)
+
+BOOTSTRAP_CDN = 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist'
+FONT_AWESOME_CDN = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.2'
+FONT_AWESOME_FONTS = ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+# Vendored path under static -> upstream URL
+VENDOR_ASSETS = {
+    'vendor/bootstrap/css/bootstrap.min.css': f'{BOOTSTRAP_CDN}/css/bootstrap.min.css',
+    'vendor/bootstrap/js/bootstrap.bundle.min.js': f'{BOOTSTRAP_CDN}/js/bootstrap.bundle.min.js',
+    'vendor/fontawesome/css/all.min.css': f'{FONT_AWESOME_CDN}/css/all.min.css',
+}
+VENDOR_ASSETS.update({
+    f'vendor/fontawesome/webfonts/{name}.{extension}':
+        f'{FONT_AWESOME_CDN}/webfonts/{name}.{extension}'
+    for name in FONT_AWESOME_FONTS for extension in ('woff2', 'ttf')
+})
+
+CSS_URL_PATTERN = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+class AssetState:
+    """Manifest of the current build and the resolved fallbacks"""
+
+    def __init__(self, files=None, version=''):
+        self.files = files or {}
+        self.version = version
+        self.fallbacks = {}
+
+
+def load_manifest(app):
+    """(Re)load STATIC_BUILD_DIR/manifest.json into the application"""
+    path = os.path.join(app.config['STATIC_BUILD_DIR'], MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        state = AssetState(manifest['files'], manifest['version'])
+    except FileNotFoundError:
+        state = AssetState()
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable asset manifest {path}: {e}")
+        state = AssetState()
+    app.extensions['assets'] = state
+    return state
+
+
+def init_assets(app):
+    """Load the asset manifest, expose asset_url() and serve /assets/"""
+    load_manifest(app)
+    app.add_template_global(asset_url)
+    app.add_url_rule('/assets/<path:filename>', 'asset', serve_asset)
+
+
+def assets_version():
+    """Identifier of the current build ('' when there is none)"""
+    state = current_app.extensions.get('assets')
+    return state.version if state is not None else ''
+
+
+def asset_url(filename):
+    """
+    URL of a static asset: the fingerprinted build when there is one
+
+    Without a build the file is served from /static; a vendored
+    dependency that has not been downloaded yet is loaded from its CDN.
+    """
+    state = current_app.extensions.get('assets') or AssetState()
+    built = state.files.get(filename)
+    if built is not None:
+        return url_for('asset', filename=built)
+
+    fallback = state.fallbacks.get(filename)
+    if fallback is None:
+        local = os.path.isfile(os.path.join(current_app.static_folder, filename))
+        fallback = state.fallbacks[filename] = (
+            '' if local or filename not in VENDOR_ASSETS else VENDOR_ASSETS[filename])
+    return fallback or url_for('static', filename=filename)
+
+
+def serve_asset(filename):
+    """Serve a built asset, precompressed when the client accepts it"""
+    path = safe_join(current_app.config['STATIC_BUILD_DIR'], filename)
+    if path is None or filename == MANIFEST_NAME or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    compressible = filename.endswith(COMPRESSIBLE_EXTENSIONS)
+    encoding = None
+    if compressible:
+        for name, suffix in ENCODINGS:
+            if request.accept_encodings[name] and os.path.isfile(path + suffix):
+                encoding, path = name, path + suffix
+                break
+
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True)
+    # Named after the .gz/.br file otherwise
+    del response.headers['Content-Disposition']
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if compressible:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+def download_vendor_assets(static_folder, timeout=30):
+    """
+    Fetch vendored dependencies that are not in static/vendor yet
+
+    Returns:
+        (downloaded, missing) lists of paths; missing ones failed to download
+    """
+    downloaded, missing = [], []
+    for filename, url in VENDOR_ASSETS.items():
+        path = os.path.join(static_folder, filename)
+        if os.path.isfile(path):
+            continue
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                content = response.read()
+        except OSError as e:
+            logger.warning(f"Could not download {url}: {e}")
+            missing.append(filename)
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, content)
+        downloaded.append(filename)
+    return downloaded, missing
+
+
+def _write_atomic(path, content):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+def _source_files(static_folder):
+    """Static paths (posix, relative) to build; stylesheets last"""
+    files = []
+    for root, directories, names in os.walk(static_folder):
+        relative_root = os.path.relpath(root, static_folder).replace(os.sep, '/')
+        relative_root = '' if relative_root == '.' else relative_root
+        directories[:] = sorted(
+            name for name in directories
+            if posixpath.join(relative_root, name) not in EXCLUDED_DIRECTORIES)
+        files.extend(posixpath.join(relative_root, name) for name in sorted(names)
+                     if not name.endswith('.tmp'))
+    # Stylesheets reference fonts and images by URL; hash those first
+    return sorted(files, key=lambda name: name.endswith('.css'))
+
+
+def _rewrite_css_urls(filename, content, files):
+    """Point relative url() references of a stylesheet at built files"""
+    directory = posixpath.dirname(filename)
+
+    def replace(match):
+        quote, reference = match.groups()
+        target, _, suffix = reference.partition('?')
+        target, _, fragment = target.partition('#')
+        if not target or '://' in target or target.startswith(('/', 'data:')):
+            return match.group(0)
+        resolved = posixpath.normpath(posixpath.join(directory, target))
+        if resolved not in files:
+            return match.group(0)
+        # Query strings were cache busters; the hashed name replaces them
+        relative = posixpath.relpath(files[resolved], directory)
+        return f"url({quote}{relative}{'#' + fragment if fragment else ''}{quote})"
+
+    text = content.decode('utf-8')
+    return CSS_URL_PATTERN.sub(replace, text).encode('utf-8')
+
+
+def _compress(path, content):
+    """Write the .gz/.br variants that come out smaller than the file"""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    written = []
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(content):
+            _write_atomic(path + suffix, compressed)
+            written.append(suffix)
+    return written
+
+
+def build_assets(static_folder, build_dir):
+    """
+    Fingerprint and precompress every static asset into build_dir
+
+    Earlier builds are left in place: pages rendered before a deploy keep
+    referencing them until every worker has been replaced.
+
+    Returns:
+        The manifest written to build_dir/manifest.json
+    """
+    files = {}
+    for filename in _source_files(static_folder):
+        with open(os.path.join(static_folder, *filename.split('/')), 'rb') as f:
+            content = f.read()
+        if filename.endswith('.css'):
+            content = _rewrite_css_urls(filename, content, files)
+
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, extension = posixpath.splitext(filename)
+        built = f'{stem}.{digest}{extension}'
+        path = os.path.join(build_dir, *built.split('/'))
+        if not os.path.isfile(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, content)
+            if filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                _compress(path, content)
+        files[filename] = built
+
+    version = hashlib.sha256(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    manifest = {'version': version, 'files': files}
+    os.makedirs(build_dir, exist_ok=True)
+    _write_atomic(os.path.join(build_dir, MANIFEST_NAME),
+                  json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
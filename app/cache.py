@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 10:11:26
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 10:11:26
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, session, make_response, has_request_context, jsonify, \
+    Response
+from markupsafe import Markup
+from app.metrics import PAGE_CACHE_REQUESTS, FRAGMENT_CACHE_REQUESTS
+
+CARD_TEMPLATE = 'macros/cards.html'
+# Model class name -> card kind
+CARD_KINDS = {'Movie': 'movie', 'TVShow': 'tvshow'}
+# Columns the card macro reads, besides id; batches load only these
+CARD_COLUMNS = {
+    'movie': ('title', 'poster_path', 'release_date', 'runtime', 'last_updated'),
+    'tvshow': ('title', 'poster_path', 'first_air_date', 'last_air_date', 'status',
+               'last_updated'),
+}
+
+
+class NullCache:
+    """Cache backend that never stores anything"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache:
+    """Thread-safe in-process cache holding the most recently used entries"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return None
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemCache:
+    """
+    Cache backend shared by every worker process through a directory
+
+    Counting the entries means listing the directory, so each process only
+    checks the size every ``prune_interval`` writes (and on its first one);
+    the directory may briefly exceed max_entries by that many entries per
+    worker.
+    """
+
+    def __init__(self, directory, max_entries=4096, prune_interval=64):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return value if stored_key == key else None
+
+    def set(self, key, value):
+        with self._lock:
+            prune = self._writes % self.prune_interval == 0
+            self._writes += 1
+        if prune:
+            self._prune()
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((key, value), f, pickle.HIGHEST_PROTOCOL)
+            # Atomic rename so readers never see a partial entry
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                os.remove(entry.path)
+
+    def _prune(self):
+        """Drop the oldest half of the entries once the directory is full"""
+        entries = [e for e in os.scandir(self.directory) if e.is_file()]
+        if len(entries) < self.max_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) // 2]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def init_page_cache(app):
+    """Create the page cache backend configured by PAGE_CACHE_TYPE"""
+    cache_type = app.config.get('PAGE_CACHE_TYPE', 'lru')
+
+    if cache_type == 'lru':
+        cache = LRUCache(app.config.get('PAGE_CACHE_SIZE', 512))
+    elif cache_type == 'filesystem':
+        cache = FileSystemCache(app.config['PAGE_CACHE_DIR'],
+                                app.config.get('PAGE_CACHE_SIZE', 4096))
+    else:
+        cache = NullCache()
+
+    app.extensions['page_cache'] = cache
+    return cache
+
+
+def get_page_cache():
+    """Return the page cache of the current application"""
+    return current_app.extensions.get('page_cache') or NullCache()
+
+
+def page_cache_key(version):
+    """Build the cache key for the current request, library and asset versions"""
+    from app.assets import assets_version
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f'{version}:{assets_version()}:{request.path}?{args}'
+
+
+def cached_page(view):
+    """
+    Cache a rendered page until the next scan commits
+
+    Responses are keyed by URL, query arguments and the library version, so
+    a scan bumping the version invalidates every cached page at once. The
+    ETag is derived from the same key, which lets conditional requests be
+    answered with 304 before the view runs at all.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        # Flashed messages are rendered into the page; never cache those
+        if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+            return view(*args, **kwargs)
+
+        from app.models.library import LibraryVersion
+        key = page_cache_key(LibraryVersion.current())
+        etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+        # Weak comparison: gzip-encoded variants carry a weak ETag
+        if request.if_none_match.contains_weak(etag):
+            PAGE_CACHE_REQUESTS.inc('not_modified')
+            response = make_response('', 304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        cache = get_page_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            PAGE_CACHE_REQUESTS.inc('hit')
+            body, mimetype = cached
+            response = make_response(body)
+            response.mimetype = mimetype
+        else:
+            PAGE_CACHE_REQUESTS.inc('miss')
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            cache.set(key, (response.get_data(), response.mimetype))
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    return wrapper
+
+
+def init_fragment_cache(app):
+    """
+    Create the poster card cache and expose poster_card()/poster_cards()
+
+    Cards are keyed by kind, id and last_updated, so a rescanned title
+    gets a new entry and the stale one ages out of the LRU.
+    """
+    size = app.config.get('FRAGMENT_CACHE_SIZE', 4096)
+    cache = LRUCache(size) if size > 0 else NullCache()
+    app.extensions['fragment_cache'] = cache
+    app.add_template_global(poster_card)
+    app.add_template_global(poster_cards)
+    return cache
+
+
+def poster_cards(items):
+    """Render the poster cards of movies or TV shows, reusing cached HTML"""
+    cache = current_app.extensions.get('fragment_cache') or NullCache()
+    # Card links are relative to the mount point
+    script_root = request.script_root if has_request_context() else ''
+    macro = None
+    parts = []
+    misses = 0
+    for item in items:
+        kind = CARD_KINDS[type(item).__name__]
+        key = (kind, item.id, item.last_updated, script_root)
+        html = cache.get(key)
+        if html is None:
+            if macro is None:
+                macro = current_app.jinja_env.get_template(CARD_TEMPLATE).module.poster_card
+            html = str(macro(item, kind))
+            cache.set(key, html)
+            misses += 1
+        parts.append(html)
+
+    if misses:
+        FRAGMENT_CACHE_REQUESTS.inc('miss', amount=misses)
+    if len(parts) > misses:
+        FRAGMENT_CACHE_REQUESTS.inc('hit', amount=len(parts) - misses)
+    return Markup(''.join(parts))
+
+
+def poster_card(item):
+    """Render one poster card (see poster_cards)"""
+    return poster_cards([item])
+
+
+def card_batch_response(items, next_cursor):
+    """
+    Poster cards of one infinite-scroll batch
+
+    ?format=json returns {"html", "next_cursor", "count"}. The HTML
+    fragment instead ends with a hidden marker carrying the next cursor,
+    since cached pages keep the body but not custom headers.
+    """
+    html = poster_cards(items)
+    if request.args.get('format') == 'json':
+        return jsonify(html=str(html), next_cursor=next_cursor, count=len(items))
+    if next_cursor:
+        html += Markup('<div class="d-none" data-next-cursor="{}"></div>').format(next_cursor)
+    return Response(html, mimetype='text/html')
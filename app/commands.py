@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 10:58:30
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 10:58:30
+import click
+
+
+def register_commands(app):
+    """Attach the MovieShelf maintenance commands to ``flask``"""
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats():
+        """Recompute the library statistics table from scratch."""
+        from app.scanner.stats import rebuild_library_stats
+        rebuild_library_stats()
+        click.echo('Library statistics rebuilt')
+
+    @app.cli.command('create-indexes')
+    def create_indexes():
+        """Create model indexes missing from an existing database."""
+        from sqlalchemy import inspect
+        from app import db
+        from app.database import index_names
+        inspector = inspect(db.engine)
+        created = []
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = index_names(db.engine, inspector, table.name)
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(db.engine)
+                    created.append(index.name)
+        if created:
+            from app.database import refresh_planner_statistics
+            refresh_planner_statistics(db.session)
+            db.session.commit()
+        click.echo(f"Created {len(created)} indexes{': ' if created else ''}{', '.join(created)}")
+
+    @app.cli.command('upgrade-db')
+    @click.pass_context
+    def upgrade_db(ctx):
+        """Drop unique constraints the models no longer declare, then create missing indexes."""
+        from app import db
+        from app.database import drop_stale_unique_constraints
+        db.session.remove()
+        dropped = drop_stale_unique_constraints(db.engine, db.metadata)
+        click.echo(f"Dropped {len(dropped)} unique constraints"
+                   f"{': ' if dropped else ''}{', '.join(dropped)}")
+        ctx.invoke(create_indexes)
+
+    @app.cli.command('purge-tombstones')
+    @click.option('--days', type=int, default=None,
+                  help='Grace period in days (default: MISSING_GRACE_PERIOD_DAYS).')
+    def purge_tombstones(days):
+        """Delete library rows that have been missing past the grace period."""
+        from datetime import timedelta
+        from app.scanner.file_scanner import purge_tombstones as purge
+        deleted = purge(timedelta(days=days) if days is not None else None)
+        click.echo(f'Purged {deleted} tombstoned rows')
+
+    @app.cli.command('snapshot-metadata')
+    def snapshot_metadata():
+        """Write the current library into a fresh metadata store."""
+        import os
+        from flask import current_app
+        from app.scanner.metadata_store import MetadataStore, snapshot_database
+        path = current_app.config.get('METADATA_STORE_PATH')
+        if not path:
+            raise click.UsageError('METADATA_STORE_PATH is not set')
+
+        # Written next to the live store and swapped in, which also
+        # compacts away superseded records
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        with MetadataStore(tmp_path) as store:
+            count = snapshot_database(store)
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, path)
+        click.echo(f'Wrote {count} rows to {path}')
+
+    @app.cli.command('rebuild-db')
+    @click.option('--yes', is_flag=True, help='Do not ask for confirmation.')
+    def rebuild_db(yes):
+        """Rebuild the library tables from the metadata store, offline."""
+        from flask import current_app
+        from app import db
+        from app.scanner.metadata_store import MetadataStore, rebuild_database
+        path = current_app.config.get('METADATA_STORE_PATH')
+        if not path:
+            raise click.UsageError('METADATA_STORE_PATH is not set')
+        if not yes:
+            click.confirm('This replaces every movie, TV show, episode and credit. '
+                          'Continue?', abort=True)
+
+        db.create_all()
+        counts = rebuild_database(MetadataStore(path))
+        rows = sum(value for key, value in counts.items() if key != 'seconds')
+        click.echo(
+            f"Rebuilt {counts['movie']} movies, {counts['tvshow']} TV shows, "
+            f"{counts['episode']} episodes and {counts['person']} people "
+            f"in {counts['seconds']:.1f}s ({rows / max(counts['seconds'], 1e-6):.0f} rows/s)")
+
+    @app.cli.command('export-library')
+    @click.argument('path', type=click.Path(dir_okay=False, writable=True, allow_dash=True))
+    @click.option('--gzip', 'compress', is_flag=True,
+                  help='Gzip the output (implied by a .gz path).')
+    def export_library(path, compress):
+        """Stream the library as NDJSON to PATH ("-" for stdout)."""
+        import time
+        from app.export import export_lines, gzip_chunks
+        compress = compress or path.endswith('.gz')
+        started = time.perf_counter()
+        rows = 0
+
+        def counted():
+            nonlocal rows
+            for line in export_lines():
+                rows += 1
+                yield line
+
+        with click.open_file(path, 'wb') as f:
+            if compress:
+                for chunk in gzip_chunks(counted()):
+                    f.write(chunk)
+            else:
+                for line in counted():
+                    f.write(line.encode('utf-8'))
+
+        seconds = time.perf_counter() - started
+        click.echo(f'Exported {rows - 1} rows in {seconds:.1f}s '
+                   f'({(rows - 1) / max(seconds, 1e-6):.0f} rows/s)', err=True)
+
+    @app.cli.command('import-library')
+    @click.argument('path', type=click.Path(dir_okay=False, allow_dash=True))
+    @click.option('--replace', is_flag=True,
+                  help='Delete existing library rows before importing.')
+    def import_library(path, replace):
+        """Upsert a library NDJSON export (plain or gzip) from PATH."""
+        import gzip
+        from app import db
+        from app.export import import_lines, LibraryImportError
+        db.create_all()
+        with click.open_file(path, 'rb') as raw:
+            stream = raw
+            magic = raw.peek(2)[:2] if hasattr(raw, 'peek') else b''
+            if magic == b'\x1f\x8b' or path.endswith('.gz'):
+                stream = gzip.GzipFile(fileobj=raw)
+            try:
+                result = import_lines(stream, replace=replace)
+            except LibraryImportError as e:
+                raise click.ClickException(str(e))
+        click.echo(f"Imported {result['rows']} rows in {result['seconds']:.1f}s "
+                   f"({result['rows_per_second']:.0f} rows/s)")
+
+    @app.cli.command('scan-plan')
+    def scan_plan():
+        """Split MEDIA_DIRECTORIES into shards for scan-worker processes."""
+        from flask import current_app
+        from app import db
+        from app.scanner.shards import plan_scan
+        from app.scanner.writer import get_scan_writer
+        db.create_all()
+        generation_id = get_scan_writer().call(
+            plan_scan, current_app.config['MEDIA_DIRECTORIES'])
+        click.echo(f'Planned scan generation {generation_id}')
+
+    @app.cli.command('scan-worker')
+    @click.option('--generation', 'generation_id', type=int, default=None,
+                  help='Generation to work on (default: the latest running one).')
+    @click.option('--max-shards', type=int, default=None,
+                  help='Exit after completing this many shards.')
+    def scan_worker(generation_id, max_shards):
+        """Claim and scan shards until the generation has none left."""
+        from flask import current_app
+        from app.scanner.shards import run_scan_worker
+        from app.serve import reload_server
+        completed = run_scan_worker(generation_id, max_shards=max_shards)
+        click.echo(f'Completed {completed} shards')
+        if completed and current_app.config.get('SERVE_RELOAD_AFTER_SCAN'):
+            reload_server(current_app)
+
+    @app.cli.command('build-assets')
+    @click.option('--offline', is_flag=True,
+                  help='Do not download missing vendored assets from their CDN.')
+    def build_assets(offline):
+        """Vendor, fingerprint and precompress the static assets."""
+        from flask import current_app
+        from app.assets import download_vendor_assets, build_assets as build, load_manifest, brotli
+        from app.serve import reload_server
+        if not offline:
+            downloaded, missing = download_vendor_assets(current_app.static_folder)
+            for filename in downloaded:
+                click.echo(f'Downloaded {filename}')
+            if missing:
+                click.echo(f"{len(missing)} vendored assets are still missing and will be "
+                           f"loaded from their CDN: {', '.join(missing)}", err=True)
+
+        manifest = build(current_app.static_folder, current_app.config['STATIC_BUILD_DIR'])
+        load_manifest(current_app)
+        encodings = 'gzip and brotli' if brotli is not None else 'gzip'
+        click.echo(f"Built {len(manifest['files'])} assets ({encodings}) into "
+                   f"{current_app.config['STATIC_BUILD_DIR']}, version {manifest['version']}")
+        reload_server(current_app)
+
+    @app.cli.command('serve')
+    @click.option('--bind', default=None, help='Address to listen on (default: SERVE_BIND).')
+    @click.option('--workers', type=int, default=None,
+                  help='Worker processes (default: SERVE_WORKERS, 0 autotunes).')
+    @click.option('--threads', type=int, default=None,
+                  help='Threads per worker (default: SERVE_THREADS, 0 autotunes).')
+    def serve(bind, workers, threads):
+        """Run the production server: preloaded, preforked gunicorn."""
+        import os
+        import sys
+        import importlib.util
+        if importlib.util.find_spec('gunicorn') is None:
+            raise click.UsageError('gunicorn is not installed (pip install gunicorn)')
+
+        # gunicorn.conf.py reads these through Config
+        overrides = {'SERVE_BIND': bind, 'SERVE_WORKERS': workers, 'SERVE_THREADS': threads}
+        for name, value in overrides.items():
+            if value is not None:
+                os.environ[name] = str(value)
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        os.execv(sys.executable, [sys.executable, '-m', 'gunicorn',
+                                  '--config', os.path.join(root, 'gunicorn.conf.py'),
+                                  '--chdir', root, 'run:app'])
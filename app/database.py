@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 17:20:14
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 17:20:14
+"""
+Database profiles applied when the application creates its engine
+
+SQLite gets WAL journaling, so web readers never wait for the scanner's
+write transactions, plus connection pragmas for cache, mmap and busy
+timeout. PostgreSQL gets pool sizing, pre-ping and a statement timeout.
+Everything is driven by the DB_* and SQLITE_* settings in Config.
+
+Web GET requests run in read-only sessions; library writes belong to the
+scanner's writer thread (app.scanner.writer), which uses its own engine.
+"""
+import warnings
+from flask import request
+from sqlalchemy import (PrimaryKeyConstraint, UniqueConstraint, create_engine, event,
+                        inspect, text)
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SAWarning
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.orm import Session
+
+
+def sqlite_pragmas(config):
+    """Return the PRAGMA statements run on every new SQLite connection"""
+    pragmas = []
+    if config.get('SQLITE_JOURNAL_MODE'):
+        pragmas.append(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+    if config.get('SQLITE_SYNCHRONOUS'):
+        pragmas.append(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+    if config.get('SQLITE_CACHE_SIZE_MB'):
+        # Negative values are KiB rather than pages
+        pragmas.append(f"PRAGMA cache_size=-{config['SQLITE_CACHE_SIZE_MB'] * 1024}")
+    if config.get('SQLITE_MMAP_SIZE_MB'):
+        pragmas.append(f"PRAGMA mmap_size={config['SQLITE_MMAP_SIZE_MB'] * 1024 * 1024}")
+    pragmas.append(f"PRAGMA busy_timeout={config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+    return pragmas
+
+
+def engine_options(config):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for the configured database
+
+    Options already present in SQLALCHEMY_ENGINE_OPTIONS take precedence.
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {}
+
+    if url.get_backend_name() == 'sqlite':
+        # The sqlite3 module waits this long for locks before raising
+        options['connect_args'] = {
+            'timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000,
+        }
+    elif url.get_backend_name() == 'postgresql':
+        options.update({
+            'pool_size': config.get('DB_POOL_SIZE', 5),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        })
+        if config.get('DB_STATEMENT_TIMEOUT_MS'):
+            options['connect_args'] = {
+                'options': f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}",
+            }
+
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def install_sqlite_pragmas(engine, config):
+    """Run the SQLite profile pragmas on every new connection of an engine"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def refresh_planner_statistics(session):
+    """
+    Refresh SQLite's table statistics after bulk changes
+
+    Without them the planner prefers the missing_since index over the
+    library sort indexes and sorts every listing in a temp B-tree.
+    analysis_limit samples each index, so this stays cheap on large
+    libraries. PostgreSQL keeps its statistics through autovacuum.
+    """
+    connection = session.connection()
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('PRAGMA analysis_limit=1000')
+        connection.exec_driver_sql('ANALYZE')
+
+
+def dialect_insert(dialect, table):
+    """
+    Return an INSERT supporting ON CONFLICT for the dialect, or None
+
+    SQLite and PostgreSQL both support upserts; other databases fall
+    back to the callers' portable paths.
+    """
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(table)
+
+
+def reset_sequences(session, models):
+    """Move PostgreSQL id sequences past rows inserted with explicit ids"""
+    if session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__table__.name
+        session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"))
+
+
+def index_names(engine, inspector, table_name):
+    """
+    Names of the indexes of an existing table
+
+    SQLite reflection skips expression indexes (the library sort indexes),
+    so their names are read from sqlite_master instead.
+    """
+    if engine.dialect.name == 'sqlite':
+        with engine.connect() as connection:
+            return {name for (name,) in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?",
+                (table_name,))}
+    return {index['name'] for index in inspector.get_indexes(table_name)}
+
+
+def _declared_unique_columns(table):
+    """Column sets the model declares unique (constraints and unique indexes)"""
+    declared = {frozenset(column.name for column in constraint.columns)
+                for constraint in table.constraints
+                if isinstance(constraint, (UniqueConstraint, PrimaryKeyConstraint))}
+    declared.update(frozenset(column.name for column in index.columns)
+                    for index in table.indexes if index.unique)
+    return declared
+
+
+def drop_stale_unique_constraints(engine, metadata):
+    """
+    Drop unique constraints an existing database has but the models dropped
+
+    create_all() never alters existing tables, so relaxing a column from
+    unique to indexed (e.g. Movie.tmdb_id) only reaches new databases
+    without this. SQLite cannot drop a table constraint; the table is
+    rebuilt from the model instead (new table, copy, drop, rename) and its
+    indexes recreated.
+
+    Returns:
+        List of "table(columns)" strings that were dropped
+    """
+    inspector = inspect(engine)
+    dropped = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        declared = _declared_unique_columns(table)
+        with warnings.catch_warnings():
+            # SQLite reflection warns about every expression index it skips
+            warnings.simplefilter('ignore', SAWarning)
+            reflected = inspector.get_unique_constraints(table.name)
+        stale = [constraint for constraint in reflected
+                 if frozenset(constraint['column_names']) not in declared]
+        if not stale:
+            continue
+
+        if engine.dialect.name == 'sqlite':
+            _rebuild_sqlite_table(engine, table, inspector)
+        else:
+            preparer = engine.dialect.identifier_preparer
+            with engine.begin() as connection:
+                for constraint in stale:
+                    connection.execute(text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"DROP CONSTRAINT {preparer.quote(constraint['name'])}"))
+        dropped.extend(f"{table.name}({', '.join(constraint['column_names'])})"
+                       for constraint in stale)
+    return dropped
+
+
+def _rebuild_sqlite_table(engine, table, inspector):
+    """Recreate a SQLite table from its model, keeping rows and references"""
+    preparer = engine.dialect.identifier_preparer
+    existing = {column['name'] for column in inspector.get_columns(table.name)}
+    columns = ', '.join(preparer.quote(column.name)
+                        for column in table.columns if column.name in existing)
+    name = preparer.format_table(table)
+    rebuilt = preparer.quote(f'_rebuild_{table.name}')
+    # Without indexes: their names are still taken by the old table
+    create = str(CreateTable(table).compile(dialect=engine.dialect)).strip().replace(
+        f'CREATE TABLE {name}', f'CREATE TABLE {rebuilt}', 1)
+
+    with engine.connect() as connection:
+        # Dropping the old table must not touch the rows referencing it
+        connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        connection.commit()
+        with connection.begin():
+            connection.exec_driver_sql(f'DROP TABLE IF EXISTS {rebuilt}')
+            connection.exec_driver_sql(create)
+            connection.exec_driver_sql(
+                f'INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {name}')
+            connection.exec_driver_sql(f'DROP TABLE {name}')
+            # Foreign keys of other tables name the table; they follow it
+            connection.exec_driver_sql(f'ALTER TABLE {rebuilt} RENAME TO {name}')
+            for index in table.indexes:
+                index.create(connection)
+
+
+def create_writer_engine(config):
+    """
+    Create the dedicated engine used by the scanner's writer thread
+
+    It has its own single-connection pool, so scanner writes never take
+    connections away from web requests. In-memory SQLite databases cannot
+    be shared between engines and return None (use the web engine).
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return None
+
+    options = engine_options(config)
+    if url.get_backend_name() == 'postgresql':
+        options.update(pool_size=1, max_overflow=0)
+    engine = create_engine(url, **options)
+    install_sqlite_pragmas(engine, config)
+    return engine
+
+
+class ReadOnlySessionError(RuntimeError):
+    """Raised when a read-only (web GET) session tries to write"""
+
+
+@event.listens_for(Session, 'before_flush')
+def _reject_read_only_writes(session, flush_context, instances):
+    if session.info.get('read_only') and (
+            session.new or session.deleted or
+            any(session.is_modified(obj) for obj in session.dirty)):
+        raise ReadOnlySessionError('Library writes go through the scanner writer')
+
+
+@event.listens_for(Session, 'after_begin')
+def _begin_read_only(session, transaction, connection):
+    # PostgreSQL read-only transactions take no write locks at all
+    if session.info.get('read_only') and connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql('SET TRANSACTION READ ONLY')
+
+
+def init_database(app, db):
+    """Configure engine options, bind Flask-SQLAlchemy and install pragmas"""
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, app.config)
+
+    @app.before_request
+    def _read_only_requests():
+        # Page requests only read; with WAL they never wait on the writer
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            db.session.info['read_only'] = True
+
+    @app.teardown_request
+    def _end_read_only_requests(exc):
+        # The session outlives the request when an app context was already
+        # pushed (CLI commands, tests)
+        db.session.info.pop('read_only', None)
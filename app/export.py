@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 15:48:17
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 15:48:17
+"""
+Streaming NDJSON export and import of the library tables
+
+An export is one JSON object per line: a header, then every row of the
+library tables in foreign-key order (TV shows, movies, episodes, people,
+credits) with their primary keys, so every node seeded from it serves the
+same URLs. Rows are read with ``yield_per`` and written line by line, and
+imports are applied in batched upserts, so memory use does not depend on
+the size of the library.
+"""
+import json
+import time
+import zlib
+from datetime import date, datetime
+from sqlalchemy import insert, select, tuple_
+from app import db
+from app.database import dialect_insert, reset_sequences
+from app.models.movie import Movie
+from app.models.tvshow import TVShow, Episode
+from app.models.person import Person, Credit
+from app.models.library import LibraryVersion
+
+EXPORT_FORMAT = 'movieshelf-library'
+EXPORT_VERSION = 1
+
+# Export order satisfies foreign keys on import
+EXPORT_MODELS = {
+    'tvshow': TVShow,
+    'movie': Movie,
+    'episode': Episode,
+    'person': Person,
+    'credit': Credit,
+}
+
+# Unique columns besides the primary key; a non-replace import must agree
+# with the existing rows on them
+NATURAL_KEYS = {
+    'tvshow': (('directory_path',), ('tmdb_id',)),
+    'movie': (('file_path',),),
+    'episode': (('file_path',), ('tvshow_id', 'season_number', 'episode_number')),
+    'person': (('tmdb_id',),),
+}
+
+READ_BATCH_SIZE = 1000
+UPSERT_BATCH_SIZE = 1000
+GZIP_FLUSH_BYTES = 64 * 1024
+
+
+class LibraryImportError(ValueError):
+    """Raised when an import stream is not a MovieShelf library export"""
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _dumps(record):
+    return json.dumps(record, separators=(',', ':'), default=_json_default) + '\n'
+
+
+def export_lines():
+    """
+    Yield the library as NDJSON lines (str)
+
+    Each table is read through ``yield_per``, which uses a server-side
+    cursor where the database supports one.
+    """
+    yield _dumps({'format': EXPORT_FORMAT, 'version': EXPORT_VERSION,
+                  'library_version': LibraryVersion.current()})
+
+    for kind, model in EXPORT_MODELS.items():
+        table = model.__table__
+        keys = [column.key for column in table.columns]
+        result = db.session.execute(
+            select(table).order_by(table.c.id).execution_options(yield_per=READ_BATCH_SIZE))
+        for row in result:
+            yield _dumps({'type': kind, 'row': dict(zip(keys, row))})
+
+
+def gzip_chunks(lines):
+    """Compress an iterable of text lines into gzip chunks as they come"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    buffer = []
+    size = 0
+    for line in lines:
+        chunk = compressor.compress(line.encode('utf-8'))
+        if chunk:
+            buffer.append(chunk)
+            size += len(chunk)
+        if size >= GZIP_FLUSH_BYTES:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(compressor.flush())
+    yield b''.join(buffer)
+
+
+def _column_decoders(model):
+    """Return {column: parser} for columns JSON cannot represent natively"""
+    decoders = {}
+    for column in model.__table__.columns:
+        python_type = column.type.python_type
+        if python_type is datetime:
+            decoders[column.key] = datetime.fromisoformat
+        elif python_type is date:
+            decoders[column.key] = date.fromisoformat
+    return decoders
+
+
+def _numbered(lines):
+    """Yield (line number, line), reporting unreadable streams as import errors"""
+    lines = iter(lines)
+    number = 0
+    while True:
+        try:
+            line = next(lines)
+        except StopIteration:
+            return
+        except (OSError, EOFError, zlib.error) as e:
+            raise LibraryImportError(f"Line {number + 1}: unreadable stream ({e})")
+        number += 1
+        yield number, line
+
+
+def _parse(number, line):
+    """Decode one NDJSON line into a record dict"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        raise LibraryImportError(f"Line {number}: not valid JSON")
+    if not isinstance(record, dict):
+        raise LibraryImportError(f"Line {number}: expected a JSON object")
+    return record
+
+
+def _check_natural_keys(kind, rows):
+    """
+    Refuse rows whose unique columns already belong to another id
+
+    Rows are upserted by primary key, so a library that assigned different
+    ids to the same files would otherwise fail halfway on a unique
+    constraint.
+    """
+    table = EXPORT_MODELS[kind].__table__
+    for key in NATURAL_KEYS.get(kind, ()):
+        ids = {tuple(row.get(name) for name in key): row['id'] for row in rows
+               if all(row.get(name) is not None for name in key)}
+        if not ids:
+            continue
+        columns = [table.c[name] for name in key]
+        if len(columns) == 1:
+            condition = columns[0].in_([values[0] for values in ids])
+        else:
+            condition = tuple_(*columns).in_(list(ids))
+        for existing_id, *values in db.session.execute(
+                select(table.c.id, *columns).where(condition)):
+            imported_id = ids[tuple(values)]
+            if existing_id != imported_id:
+                shown = ', '.join(f"{name}={value!r}" for name, value in zip(key, values))
+                raise LibraryImportError(
+                    f"{kind} with {shown} is id {existing_id} here but id "
+                    f"{imported_id} in the export; import with replace to "
+                    f"take over the exported ids")
+
+
+def _upsert(model, rows):
+    """Insert or update a batch of rows by primary key"""
+    table = model.__table__
+    statement = dialect_insert(db.engine.dialect.name, table)
+
+    if statement is not None:
+        updates = {column.key: statement.excluded[column.key]
+                   for column in table.columns if column.key != 'id'}
+        db.session.execute(
+            statement.on_conflict_do_update(index_elements=['id'], set_=updates), rows)
+        return
+
+    # Portable fallback: replace the rows of the batch
+    db.session.execute(table.delete().where(table.c.id.in_([row['id'] for row in rows])))
+    db.session.execute(insert(table), rows)
+
+
+def _import_rows(lines, replace):
+    """Upsert the records of (line number, line) pairs; returns counts per type"""
+    try:
+        number, line = next(lines)
+    except StopIteration:
+        raise LibraryImportError('Empty export')
+    header = _parse(number, line)
+    if header.get('format') != EXPORT_FORMAT or header.get('version') != EXPORT_VERSION:
+        raise LibraryImportError('Not a MovieShelf library export')
+
+    if replace:
+        for model in reversed(list(EXPORT_MODELS.values())):
+            db.session.query(model).delete(synchronize_session=False)
+
+    decoders = {kind: _column_decoders(model) for kind, model in EXPORT_MODELS.items()}
+    columns = {kind: {column.key for column in model.__table__.columns}
+               for kind, model in EXPORT_MODELS.items()}
+    counts = {kind: 0 for kind in EXPORT_MODELS}
+    batch_kind = None
+    batch = []
+
+    def flush():
+        if not replace:
+            _check_natural_keys(batch_kind, batch)
+        _upsert(EXPORT_MODELS[batch_kind], batch)
+
+    for number, line in lines:
+        if not line.strip():
+            continue
+        record = _parse(number, line)
+        kind = record.get('type')
+        if kind not in EXPORT_MODELS:
+            continue
+        values = record.get('row')
+        if not isinstance(values, dict) or values.get('id') is None:
+            raise LibraryImportError(f"Line {number}: {kind} record has no row id")
+
+        if kind != batch_kind or len(batch) >= UPSERT_BATCH_SIZE:
+            if batch:
+                flush()
+            batch_kind = kind
+            batch = []
+
+        row = {key: value for key, value in values.items() if key in columns[kind]}
+        for key, decode in decoders[kind].items():
+            if row.get(key) is not None:
+                try:
+                    row[key] = decode(row[key])
+                except (TypeError, ValueError):
+                    raise LibraryImportError(
+                        f"Line {number}: invalid {key} value {row[key]!r}")
+        batch.append(row)
+        counts[kind] += 1
+
+    if batch:
+        flush()
+    return counts
+
+
+def import_lines(lines, replace=False):
+    """
+    Apply an NDJSON library export
+
+    Args:
+        lines: Iterable of NDJSON lines (str or bytes)
+        replace: Delete existing library rows first, so rows removed on the
+            exporting node disappear here too
+
+    Returns:
+        Dictionary of imported row counts per type, 'rows', 'seconds' and
+        'rows_per_second'
+
+    Raises:
+        LibraryImportError: The stream is not a valid export (the message
+            names the line), or a non-replace import assigns a file to a
+            different id than this library; nothing is applied
+    """
+    started = time.perf_counter()
+    try:
+        counts = _import_rows(_numbered(lines), replace)
+    except LibraryImportError:
+        db.session.rollback()
+        raise
+
+    reset_sequences(db.session, EXPORT_MODELS.values())
+
+    # Upserts bypass the flush hook; recompute aggregates and invalidate pages
+    from app.scanner.stats import rebuild_library_stats
+    LibraryVersion.bump()
+    rebuild_library_stats()
+
+    seconds = time.perf_counter() - started
+    rows = sum(counts.values())
+    return dict(counts, rows=rows, seconds=seconds,
+                rows_per_second=rows / seconds if seconds else 0.0)
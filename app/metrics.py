@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 19:05:12
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 19:05:12
+"""
+In-process metrics exposed in the Prometheus text format at /metrics
+
+Counters, gauges and histograms are plain objects in a module-level
+registry, so instrumented code (the scanner, the TMDB fetcher, the page
+cache) only needs an import. Updating one costs a lock and a dict lookup.
+Values are per process: with several server workers, scrape each of them
+or aggregate in Prometheus.
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+                   1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(value) for value in labels)
+
+    def samples(self):
+        """Yield (suffix, label values, extra labels, value) tuples"""
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}',
+                 f'# TYPE {self.name} {self.type_name}']
+        for suffix, labels, extra, value in self.samples():
+            lines.append(f'{self.name}{suffix}'
+                         f'{_format_labels(self.labelnames, labels, extra)} '
+                         f'{_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    type_name = 'counter'
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield '_total', labels, (), value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is read from a callback at scrape time"""
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._functions = {}
+
+    def set(self, *labels, value):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn, *labels):
+        """Read the value from fn() whenever metrics are rendered"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for labels, fn in functions.items():
+            try:
+                values[labels] = fn()
+            except Exception:
+                continue
+        for labels, value in sorted(values.items()):
+            yield '', labels, (), value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets"""
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, *labels, value):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts, then the sum of observations
+                state = self._values[key] = [0] * len(self.buckets) + [0.0]
+            state[bisect_left(self.buckets, value)] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - start)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, list(state)) for labels, state in self._values.items())
+        for labels, state in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield '_bucket', labels, (('le', _format_value(float(bound))),), cumulative
+            yield '_count', labels, (), cumulative
+            yield '_sum', labels, (), state[-1]
+
+
+class Registry:
+    """Ordered set of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'movieshelf_http_request_duration_seconds', 'Time spent handling a web request.',
+    ('route', 'method', 'status')))
+REQUEST_SQL_QUERIES = REGISTRY.register(Histogram(
+    'movieshelf_http_request_sql_queries', 'SQL statements executed per web request.',
+    ('route',), buckets=QUERY_COUNT_BUCKETS))
+REQUEST_SQL_DURATION = REGISTRY.register(Histogram(
+    'movieshelf_http_request_sql_seconds', 'Time spent in SQL per web request.',
+    ('route',)))
+PAGE_CACHE_REQUESTS = REGISTRY.register(Counter(
+    'movieshelf_page_cache_requests', 'Cached page lookups by result.', ('result',)))
+FRAGMENT_CACHE_REQUESTS = REGISTRY.register(Counter(
+    'movieshelf_fragment_cache_requests', 'Cached poster card lookups by result.', ('result',)))
+SCAN_STAGE_DURATION = REGISTRY.register(Histogram(
+    'movieshelf_scan_stage_seconds',
+    'Scanner time by stage (walk, probe, parse, http, image, db).', ('stage',)))
+SCANNED_FILES = REGISTRY.register(Counter(
+    'movieshelf_scanned_files', 'Media files processed by the scanner.', ('kind',)))
+TMDB_REQUEST_DURATION = REGISTRY.register(Histogram(
+    'movieshelf_tmdb_request_duration_seconds', 'TMDb API request latency.',
+    ('endpoint',)))
+TMDB_RESPONSES = REGISTRY.register(Counter(
+    'movieshelf_tmdb_responses', 'TMDb API responses by status code.', ('status',)))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'movieshelf_queue_depth', 'Jobs waiting in internal queues.', ('queue',)))
+
+
+# Callables receiving (stage, wall seconds, CPU seconds) of every scan stage
+_stage_observers = []
+
+
+@contextmanager
+def observe_scan_stages(observer):
+    """Pass every scan stage timing to observer during a with-block"""
+    _stage_observers.append(observer)
+    try:
+        yield
+    finally:
+        _stage_observers.remove(observer)
+
+
+@contextmanager
+def scan_stage(stage):
+    """Time a scanner stage: ``with scan_stage('walk'): ...``"""
+    start = time.perf_counter()
+    # Stages run on one thread each, so thread CPU time is theirs
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        SCAN_STAGE_DURATION.observe(stage, value=wall)
+        if _stage_observers:
+            cpu = time.thread_time() - cpu_start
+            for observer in list(_stage_observers):
+                observer(stage, wall, cpu)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        context._metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_metrics_start', None)
+    # Only statements of the thread serving the request are attributed to it
+    if start is None or not has_request_context():
+        return
+    g.sql_queries = g.get('sql_queries', 0) + 1
+    g.sql_seconds = g.get('sql_seconds', 0.0) + time.perf_counter() - start
+
+
+def _route_label():
+    # The URL rule rather than the path, to keep label cardinality bounded
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def init_metrics(app):
+    """Instrument requests and serve the registry at METRICS_PATH"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+        g.sql_queries = 0
+        g.sql_seconds = 0.0
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        route = _route_label()
+        REQUEST_DURATION.observe(route, request.method, response.status_code,
+                                 value=time.perf_counter() - started)
+        REQUEST_SQL_QUERIES.observe(route, value=g.get('sql_queries', 0))
+        REQUEST_SQL_DURATION.observe(route, value=g.get('sql_seconds', 0.0))
+        return response
+
+    def metrics():
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', metrics)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 10:05:51
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 10:05:51
+from app import db
+from datetime import datetime
+
+
+class LibraryVersion(db.Model):
+    """Single-row counter bumped every time a scan commits"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @classmethod
+    def current(cls):
+        """Return the current library version (0 before the first scan)"""
+        row = db.session.get(cls, 1)
+        return row.version if row else 0
+
+    @classmethod
+    def bump(cls):
+        """Increment the library version; committed with the caller's session"""
+        row = db.session.get(cls, 1)
+        if row is None:
+            row = cls(id=1, version=0)
+            db.session.add(row)
+        row.version += 1
+        row.updated_at = datetime.utcnow()
+        return row.version
+
+    def __repr__(self):
+        return f'<LibraryVersion {self.version}>'
+
+
+class LibraryStat(db.Model):
+    """Aggregate counter maintained incrementally by the scanner"""
+    id = db.Column(db.Integer, primary_key=True)
+    media_type = db.Column(db.String(16), nullable=False)  # movie, tvshow, episode
+    category = db.Column(db.String(16), nullable=False)  # total, resolution, genre, decade
+    key = db.Column(db.String(64), nullable=False, default='')
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    total_size = db.Column(db.BigInteger, nullable=False, default=0)  # In bytes
+
+    __table_args__ = (
+        db.UniqueConstraint('media_type', 'category',
+                            'key', name='_library_stat_uc'),
+    )
+
+    @classmethod
+    def snapshot(cls):
+        """
+        Return every aggregate as nested dictionaries
+
+        Returns:
+            {media_type: {category: {key: {'count': n, 'size': bytes}}}}
+        """
+        stats = {}
+        for row in cls.query.all():
+            stats.setdefault(row.media_type, {}).setdefault(row.category, {})[row.key] = {
+                'count': row.item_count,
+                'size': row.total_size,
+            }
+        return stats
+
+    @classmethod
+    def totals(cls):
+        """Return {media_type: {'count': n, 'size': bytes}} for the library"""
+        return {
+            row.media_type: {'count': row.item_count, 'size': row.total_size}
+            for row in cls.query.filter_by(category='total').all()
+        }
+
+    def __repr__(self):
+        return f'<LibraryStat {self.media_type}/{self.category}/{self.key}: {self.item_count}>'
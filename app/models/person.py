@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 09:20:14
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 09:20:14
+from app import db
+
+
+class Person(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    tmdb_id = db.Column(db.Integer, unique=True, index=True)
+    name = db.Column(db.String(255), nullable=False)
+    profile_path = db.Column(db.String(255))
+
+    # Relationship with credits
+    credits = db.relationship(
+        'Credit', backref='person', lazy='dynamic', cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f'<Person {self.name}>'
+
+
+class Credit(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    person_id = db.Column(db.Integer, db.ForeignKey(
+        'person.id'), nullable=False)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'))
+    tvshow_id = db.Column(db.Integer, db.ForeignKey('tv_show.id'))
+    character = db.Column(db.String(255))
+    billing_order = db.Column(db.Integer, nullable=False)  # TMDB "order"
+
+    # Top-N billing per title and "all titles for a person" are both
+    # served straight from these indexes
+    __table_args__ = (
+        db.Index('ix_credit_movie_order', 'movie_id', 'billing_order'),
+        db.Index('ix_credit_tvshow_order', 'tvshow_id', 'billing_order'),
+        db.Index('ix_credit_person', 'person_id'),
+    )
+
+    @classmethod
+    def top_billing(cls, movie=None, tvshow=None, limit=10):
+        """
+        Return the top billed cast of a movie or TV show
+
+        Rows expose ``id``, ``name``, ``profile_path`` and ``character`` so
+        templates can use them like the old TMDB cast dictionaries.
+        """
+        owner_column = cls.movie_id if movie is not None else cls.tvshow_id
+        owner = movie if movie is not None else tvshow
+
+        return db.session.query(
+            Person.id, Person.name, Person.profile_path, cls.character
+        ).join(Person, Person.id == cls.person_id).filter(
+            owner_column == owner.id
+        ).order_by(cls.billing_order).limit(limit).all()
+
+    def __repr__(self):
+        return f'<Credit {self.person_id} as {self.character}>'
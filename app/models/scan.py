@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 18:32:06
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 18:32:06
+import json
+from app import db
+from datetime import datetime
+
+
+class ScanGeneration(db.Model):
+    """One sharded scan of the media roots"""
+    id = db.Column(db.Integer, primary_key=True)
+    roots = db.Column(db.Text, nullable=False)  # JSON list of reachable roots
+    # running -> finishing (one worker runs the cleanup) -> done
+    status = db.Column(db.String(16), nullable=False, default='running', index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    shards = db.relationship(
+        'ScanShard', backref='generation', lazy='dynamic', cascade='all, delete-orphan')
+
+    def __repr__(self):
+        return f'<ScanGeneration {self.id} {self.status}>'
+
+
+class ScanShard(db.Model):
+    """A directory of a scan generation, leased to one worker at a time"""
+    id = db.Column(db.Integer, primary_key=True)
+    generation_id = db.Column(db.Integer, db.ForeignKey(
+        'scan_generation.id'), nullable=False)
+    root = db.Column(db.String(1024), nullable=False)
+    path = db.Column(db.String(1024), nullable=False)
+    # False for the files directly inside a root, True for its subdirectories
+    recursive = db.Column(db.Boolean, nullable=False, default=True)
+
+    # pending -> leased -> done, or failed after SCAN_SHARD_MAX_ATTEMPTS
+    status = db.Column(db.String(16), nullable=False, default='pending')
+    owner = db.Column(db.String(255))
+    lease_expires_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+
+    # JSON of the paths found, consumed by the generation's final cleanup
+    result = db.Column(db.Text)
+    finished_at = db.Column(db.DateTime)
+
+    # Claims look for pending or expired shards of a generation
+    __table_args__ = (
+        db.Index('ix_scan_shard_claim', 'generation_id', 'status', 'lease_expires_at'),
+    )
+
+    def __repr__(self):
+        return f'<ScanShard {self.path} {self.status}>'
+
+
+class ScanRun(db.Model):
+    """Counters and stage timings of one scan_directories() run"""
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    finished_at = db.Column(db.DateTime)
+    status = db.Column(db.String(16), nullable=False, default='running')  # running/done/failed
+    roots = db.Column(db.Text)  # JSON list of the scanned directories
+    error = db.Column(db.Text)
+
+    files_walked = db.Column(db.Integer, default=0)
+    files_skipped = db.Column(db.Integer, default=0)  # unchanged since the last scan
+    new_count = db.Column(db.Integer, default=0)
+    updated_count = db.Column(db.Integer, default=0)
+    deleted_count = db.Column(db.Integer, default=0)  # tombstoned by the cleanup
+    tmdb_calls = db.Column(db.Integer, default=0)
+    bytes_downloaded = db.Column(db.BigInteger, default=0)
+
+    # JSON {stage: {"wall": s, "cpu": s, "count": n}}
+    stages = db.Column(db.Text)
+    # cProfile / tracemalloc reports when profiling was requested
+    cpu_profile = db.Column(db.Text)
+    memory_profile = db.Column(db.Text)
+
+    @property
+    def duration(self):
+        if self.finished_at is None or self.started_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    def stage_timings(self):
+        """Return [(stage, timings)] ordered by wall time, slowest first"""
+        stages = json.loads(self.stages) if self.stages else {}
+        return sorted(stages.items(), key=lambda item: item[1]['wall'], reverse=True)
+
+    def __repr__(self):
+        return f'<ScanRun {self.id} {self.status}>'
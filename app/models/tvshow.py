@@ -4,7 +4,8 @@
 # @Last Modified by:   Zana Saedpanah
 # @Last Modified time: 2025-02-26 20:26:15
 from app import db
-from datetime import datetime
+from datetime import date, datetime
+from sqlalchemy import func, literal
 
 
 class TVShow(db.Model):
@@ -25,10 +26,13 @@ class TVShow(db.Model):
     # Directory information
     directory_path = db.Column(db.String(1024), nullable=False, unique=True)
 
-    # Cast and crew (stored as JSON strings)
-    cast = db.Column(db.Text)  # JSON string of main cast
+    # Crew (cast lives in the normalized Credit table)
     creators = db.Column(db.String(255))
 
+    # Set when the file was not found; the row is hidden until it reappears
+    # or the tombstone is purged after the grace period
+    missing_since = db.Column(db.DateTime, index=True)
+
     # Timestamps
     date_added = db.Column(db.DateTime, default=datetime.utcnow)
     last_updated = db.Column(
@@ -38,6 +42,34 @@ class TVShow(db.Model):
     episodes = db.relationship(
         'Episode', backref='tvshow', lazy='dynamic', cascade='all, delete-orphan')
 
+    # Relationship with billed cast
+    credits = db.relationship(
+        'Credit', backref='tvshow', lazy='dynamic', cascade='all, delete-orphan',
+        order_by='Credit.billing_order')
+
+    # Keyset pagination of the library sorts (app.queries.SORTS) walks
+    # these; the NULL substitutes must match sort_null_literal() exactly
+    __table_args__ = (
+        db.Index('ix_tv_show_sort_title', title, id,
+                 sqlite_where=missing_since.is_(None),
+                 postgresql_where=missing_since.is_(None)),
+        db.Index('ix_tv_show_sort_date_added',
+                 func.coalesce(date_added, literal(datetime.min, db.DateTime,
+                                                   literal_execute=True)), id,
+                 sqlite_where=missing_since.is_(None),
+                 postgresql_where=missing_since.is_(None)),
+        db.Index('ix_tv_show_sort_first_air_date',
+                 func.coalesce(first_air_date, literal(date.min, db.Date,
+                                                       literal_execute=True)), id,
+                 sqlite_where=missing_since.is_(None),
+                 postgresql_where=missing_since.is_(None)),
+    )
+
+    @classmethod
+    def available(cls):
+        """Query of rows that are not tombstoned"""
+        return cls.query.filter(cls.missing_since.is_(None))
+
     def __repr__(self):
         return f'<TVShow {self.title}>'
 
@@ -56,8 +88,23 @@ class Episode(db.Model):
     # File information
     file_path = db.Column(db.String(1024), nullable=False, unique=True)
     file_size = db.Column(db.BigInteger)  # Size in bytes
+    # Size plus hash of the first and last 64 KB, used to follow moved files
+    fingerprint = db.Column(db.String(64), index=True)
     resolution = db.Column(db.String(20))  # e.g., "1080p", "4K"
 
+    # Technical metadata probed from the container header
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    duration = db.Column(db.Integer)  # In seconds
+    video_codec = db.Column(db.String(20))
+    audio_codec = db.Column(db.String(20))
+    audio_languages = db.Column(db.String(255))  # Comma-separated
+    subtitle_languages = db.Column(db.String(255))  # Comma-separated
+
+    # Set when the file was not found; the row is hidden until it reappears
+    # or the tombstone is purged after the grace period
+    missing_since = db.Column(db.DateTime, index=True)
+
     # Timestamps
     date_added = db.Column(db.DateTime, default=datetime.utcnow)
     last_updated = db.Column(
@@ -69,5 +116,10 @@ class Episode(db.Model):
                             'episode_number', name='_tvshow_season_episode_uc'),
     )
 
+    @classmethod
+    def available(cls):
+        """Query of rows that are not tombstoned"""
+        return cls.query.filter(cls.missing_since.is_(None))
+
     def __repr__(self):
         return f'<Episode S{self.season_number:02d}E{self.episode_number:02d}: {self.title}>'
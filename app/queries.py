@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 16:35:09
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 16:35:09
+"""
+Library queries shared by the HTML routes and the JSON API
+"""
+import json
+import base64
+from datetime import date, datetime
+from sqlalchemy import func, literal, tuple_
+from sqlalchemy.orm import load_only
+from app import db
+from app.models.movie import Movie
+from app.models.tvshow import TVShow, Episode
+from app.models.library import LibraryStat
+
+# sort name -> (column attribute, descending, value used for NULLs)
+MOVIE_SORTS = {
+    'title': ('title', False, None),
+    'date_added': ('date_added', True, datetime.min),
+    'release_date': ('release_date', True, date.min),
+}
+
+TVSHOW_SORTS = {
+    'title': ('title', False, None),
+    'date_added': ('date_added', True, datetime.min),
+    'first_air_date': ('first_air_date', True, date.min),
+}
+
+SORTS = {Movie: MOVIE_SORTS, TVShow: TVSHOW_SORTS}
+
+
+class InvalidCursor(ValueError):
+    """Raised for a pagination cursor that cannot be decoded"""
+
+
+def _sort_expression(model, sort_by):
+    attribute, descending, null_value = SORTS[model][sort_by]
+    column = getattr(model, attribute)
+    if null_value is not None:
+        column = func.coalesce(column, sort_null_literal(null_value, column.type))
+    return column, descending
+
+
+def sort_null_literal(value, type_):
+    """
+    NULL substitute rendered inline rather than bound
+
+    The expression indexes on the sort columns (see the models) contain
+    the constant; SQLite only matches them when the query does too.
+    """
+    return literal(value, type_, literal_execute=True)
+
+
+def library_query(model, genre='', sort_by='title'):
+    """
+    Available movies or TV shows, filtered by genre and sorted
+
+    Unknown sort names fall back to title. Ties are broken by id so the
+    order is stable for both page and cursor pagination.
+    """
+    if sort_by not in SORTS[model]:
+        sort_by = 'title'
+
+    query = model.available()
+    if genre:
+        query = query.filter(model.genres.ilike(f'%{genre}%'))
+
+    column, descending = _sort_expression(model, sort_by)
+    if descending:
+        return query.order_by(column.desc(), model.id.desc())
+    return query.order_by(column, model.id)
+
+
+def library_genres(media_type):
+    """Genre names of the library, read from the precomputed statistics"""
+    return [key for (key,) in db.session.query(LibraryStat.key).filter(
+        LibraryStat.media_type == media_type,
+        LibraryStat.category == 'genre',
+        LibraryStat.item_count > 0).order_by(LibraryStat.key)]
+
+
+def encode_cursor(model, sort_by, item):
+    """Opaque cursor pointing just past ``item`` in the given sort order"""
+    if sort_by not in SORTS[model]:
+        sort_by = 'title'
+    attribute, _, null_value = SORTS[model][sort_by]
+    value = getattr(item, attribute)
+    if value is None:
+        value = null_value
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps([sort_by, value, item.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def after_cursor(query, model, sort_by, cursor):
+    """
+    Restrict a library_query to rows after a cursor (keyset pagination)
+
+    The (sort value, id) row comparison is served by the sort index, so
+    every page costs the same however deep it is.
+    """
+    if not cursor:
+        return query
+    if sort_by not in SORTS[model]:
+        sort_by = 'title'
+
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, item_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    # Every sort value is encoded as a string (dates in ISO format); any
+    # other JSON value would be bound into the query as-is
+    if cursor_sort != sort_by or not isinstance(value, str) or \
+            not isinstance(item_id, int) or isinstance(item_id, bool):
+        raise InvalidCursor(cursor)
+
+    null_value = SORTS[model][sort_by][2]
+    try:
+        if isinstance(null_value, datetime):
+            value = datetime.fromisoformat(value)
+        elif isinstance(null_value, date):
+            value = date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+
+    column, descending = _sort_expression(model, sort_by)
+    key = tuple_(column, model.id)
+    # The redundant bound on the sort value alone lets SQLite seek the
+    # index; it does not use a row value comparison on an expression
+    if descending:
+        return query.filter(column <= value, key < tuple_(value, item_id))
+    return query.filter(column >= value, key > tuple_(value, item_id))
+
+
+def library_batch(model, genre='', sort_by='title', cursor=None, limit=24, columns=None):
+    """
+    One keyset page of a library_query: (items, cursor of the next page)
+
+    Only ``columns`` (plus id and the sort column) are loaded, and no
+    COUNT is run, so a batch is a single index range scan. The next
+    cursor is None on the last batch.
+
+    Raises:
+        InvalidCursor: for a cursor that does not match the sort
+    """
+    if sort_by not in SORTS[model]:
+        sort_by = 'title'
+    query = after_cursor(library_query(model, genre, sort_by), model, sort_by, cursor)
+    if columns:
+        attributes = dict.fromkeys(['id', SORTS[model][sort_by][0], *columns])
+        query = query.options(load_only(*[getattr(model, name) for name in attributes]))
+
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    return items, encode_cursor(model, sort_by, items[-1])
+
+
+def search_library(text, limit=None):
+    """Available movies and TV shows whose title contains ``text``"""
+    movies = Movie.available().filter(Movie.title.ilike(f'%{text}%')).order_by(Movie.title)
+    tvshows = TVShow.available().filter(TVShow.title.ilike(f'%{text}%')).order_by(TVShow.title)
+    if limit:
+        movies = movies.limit(limit)
+        tvshows = tvshows.limit(limit)
+    return movies, tvshows
+
+
+def movie_versions(movie):
+    """Other available files of the same TMDB title, largest first"""
+    if not movie.tmdb_id:
+        return Movie.query.filter(db.false())
+    return Movie.available().filter(Movie.tmdb_id == movie.tmdb_id,
+                                    Movie.id != movie.id).order_by(Movie.file_size.desc())
+
+
+def tvshow_episodes(tvshow_id, season_number=None):
+    """Available episodes of a show in season/episode order"""
+    query = Episode.available().filter(Episode.tvshow_id == tvshow_id)
+    if season_number is not None:
+        query = query.filter(Episode.season_number == season_number)
+    return query.order_by(Episode.season_number, Episode.episode_number)
+
+
+def group_by_season(episodes):
+    """Return {season_number: [episodes]} preserving order"""
+    seasons = {}
+    for episode in episodes:
+        seasons.setdefault(episode.season_number, []).append(episode)
+    return seasons
+
+
+def tvshow_seasons(tvshow_id):
+    """Season numbers with their episode counts, from one GROUP BY"""
+    return db.session.query(
+        Episode.season_number, func.count(Episode.id)
+    ).filter(Episode.tvshow_id == tvshow_id, Episode.missing_since.is_(None)).group_by(
+        Episode.season_number).order_by(Episode.season_number).all()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 20:02:18
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 20:02:18
+"""
+SQL statement log per request and per scanner write job
+
+While a QueryLog is active on a thread, every statement the thread
+executes is counted and timed. The same statement text executed over and
+over with different parameters is the signature of an N+1 pattern (a lazy
+relationship touched in a loop); those are reported with the application
+lines that issued them.
+
+With SQL_QUERY_LOG enabled (the default in debug mode) every response
+carries an X-SQL-Queries header, and requests or scan jobs repeating a
+statement SQL_REPEAT_THRESHOLD times or more are logged together with an
+X-SQL-Repeated header. assert_max_queries() is the matching test helper.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+_THIS_FILE = os.path.abspath(__file__)
+_local = threading.local()
+
+
+def _call_site():
+    """Return 'file:line' of the innermost application frame"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and filename != _THIS_FILE:
+            template = frame.f_globals.get('__jinja_template__')
+            lineno = frame.f_lineno
+            if template is not None:
+                # Compiled template code: map back to the template source
+                lineno = template.get_corresponding_lineno(lineno)
+            return f"{os.path.relpath(filename, _APP_DIR)}:{lineno}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryLog:
+    """Statements executed on one thread while the log is active"""
+
+    def __init__(self, capture_sites=True):
+        self.capture_sites = capture_sites
+        self.count = 0
+        self.seconds = 0.0
+        # statement -> [executions, seconds, Counter of call sites]
+        self.statements = {}
+
+    def record(self, statement, seconds, site=None):
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements.get(statement)
+        if entry is None:
+            entry = self.statements[statement] = [0, 0.0, Counter()]
+        entry[0] += 1
+        entry[1] += seconds
+        if site is not None:
+            entry[2][site] += 1
+
+    def repeated(self, threshold):
+        """
+        Return [(statement, executions, seconds, sites)] of the SELECTs run
+        threshold times or more
+
+        Repeated INSERT/UPDATEs are the unit of work flushing one row each,
+        not lazy loads, and are left out.
+        """
+        return sorted(((statement, count, seconds, sites)
+                       for statement, (count, seconds, sites) in self.statements.items()
+                       if count >= threshold and statement.lstrip()[:6].upper() == 'SELECT'),
+                      key=lambda item: item[1], reverse=True)
+
+    def describe(self, threshold):
+        lines = [f"{self.count} queries in {self.seconds * 1000:.1f} ms"]
+        for statement, count, seconds, sites in self.repeated(threshold):
+            where = ', '.join(f"{site} ({hits}x)" for site, hits in sites.most_common(3))
+            lines.append(f"  {count}x {seconds * 1000:.1f} ms at {where or 'unknown'}: "
+                         f"{' '.join(statement.split())[:200]}")
+        return '\n'.join(lines)
+
+
+def _active_logs():
+    return getattr(_local, 'logs', None)
+
+
+@contextmanager
+def track_queries(capture_sites=True):
+    """Log the statements of this thread during a with-block"""
+    log = QueryLog(capture_sites)
+    logs = _active_logs()
+    if logs is None:
+        logs = _local.logs = []
+    logs.append(log)
+    try:
+        yield log
+    finally:
+        logs.remove(log)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_logs():
+        context._querylog_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    logs = _active_logs()
+    start = getattr(context, '_querylog_start', None)
+    if not logs or start is None:
+        return
+    seconds = time.perf_counter() - start
+    site = _call_site() if any(log.capture_sites for log in logs) else None
+    for log in logs:
+        log.record(statement, seconds, site if log.capture_sites else None)
+
+
+def report(log, label, threshold):
+    """Log a warning when a statement was repeated threshold times or more"""
+    if log.repeated(threshold):
+        logger.warning(f"Repeated SQL in {label}: {log.describe(threshold)}")
+        return True
+    return False
+
+
+def query_log_enabled(app):
+    enabled = app.config.get('SQL_QUERY_LOG')
+    return app.debug if enabled is None else enabled
+
+
+def init_query_log(app):
+    """Log every request's SQL when SQL_QUERY_LOG (or debug mode) is on"""
+    if not query_log_enabled(app):
+        return
+    threshold = app.config.get('SQL_REPEAT_THRESHOLD', 5)
+
+    @app.before_request
+    def _start_query_log():
+        g.query_log_block = track_queries()
+        g.query_log = g.query_log_block.__enter__()
+
+    @app.after_request
+    def _report_query_log(response):
+        log = g.get('query_log')
+        if log is None:
+            return response
+        response.headers['X-SQL-Queries'] = f"{log.count}; {log.seconds * 1000:.1f}ms"
+        if report(log, f"{request.method} {request.path}", threshold):
+            response.headers['X-SQL-Repeated'] = '; '.join(
+                f"{count}x {sites.most_common(1)[0][0] if sites else 'unknown'}"
+                for _, count, _, sites in log.repeated(threshold)[:5])
+        return response
+
+    @app.teardown_request
+    def _stop_query_log(exc):
+        block = g.pop('query_log_block', None)
+        g.pop('query_log', None)
+        if block is not None:
+            block.__exit__(None, None, None)
+
+
+@contextmanager
+def assert_max_queries(max_queries, repeat_threshold=None):
+    """
+    Test helper failing when a block runs more than max_queries statements
+
+        with assert_max_queries(6):
+            client.get('/movies/')
+
+    With repeat_threshold, any statement repeated that many times fails too.
+    """
+    with track_queries() as log:
+        yield log
+    threshold = repeat_threshold or 2
+    if log.count > max_queries or (repeat_threshold and log.repeated(repeat_threshold)):
+        raise AssertionError(
+            f"Expected at most {max_queries} queries, got {log.describe(threshold)}")
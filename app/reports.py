@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 13:05:22
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 13:05:22
+from sqlalchemy import func
+from app import db
+from app.models.movie import Movie
+
+
+def movie_version_groups():
+    """
+    Group movies that have several file versions of the same TMDB title
+
+    The groups come from a single GROUP BY over the tmdb_id index, and their
+    rows from one IN query.
+
+    Returns:
+        List of dicts with tmdb_id, movies (largest file first), total_size and
+        reclaimable (bytes freed by keeping only the largest version),
+        sorted by reclaimable space
+    """
+    groups = db.session.query(
+        Movie.tmdb_id,
+        func.sum(Movie.file_size),
+        func.max(Movie.file_size),
+    ).filter(Movie.tmdb_id.isnot(None),
+             Movie.missing_since.is_(None)).group_by(
+        Movie.tmdb_id).having(func.count(Movie.id) > 1).all()
+    if not groups:
+        return []
+
+    movies = {}
+    for movie in Movie.available().filter(Movie.tmdb_id.in_([g[0] for g in groups])).order_by(
+            Movie.tmdb_id, Movie.file_size.desc()):
+        movies.setdefault(movie.tmdb_id, []).append(movie)
+
+    report = [
+        {
+            'tmdb_id': tmdb_id,
+            'movies': movies.get(tmdb_id, []),
+            'total_size': total_size or 0,
+            'reclaimable': (total_size or 0) - (largest or 0),
+        }
+        for tmdb_id, total_size, largest in groups
+    ]
+    return sorted(report, key=lambda group: group['reclaimable'], reverse=True)
+
+
+def identical_file_groups():
+    """
+    Group movie files with identical content fingerprints
+
+    Episodes are not covered: a show keeps a single row per season and
+    episode number, so a second copy of an episode is never stored.
+
+    Returns:
+        List of dicts with fingerprint, files [(id, file_path)], file_size
+        and reclaimable bytes, sorted by reclaimable space
+    """
+    files = db.select(Movie.fingerprint, Movie.file_size, Movie.id, Movie.file_path).where(
+        Movie.fingerprint.isnot(None), Movie.missing_since.is_(None)).subquery()
+
+    # One grouped query finds the duplicated fingerprints
+    duplicated = db.select(files.c.fingerprint).group_by(
+        files.c.fingerprint).having(func.count() > 1).subquery()
+
+    rows = db.session.execute(
+        db.select(files.c.fingerprint, files.c.file_size, files.c.id,
+                  files.c.file_path).where(
+            files.c.fingerprint.in_(db.select(duplicated.c.fingerprint))
+        ).order_by(files.c.fingerprint, files.c.file_path)
+    ).all()
+
+    groups = {}
+    for fingerprint, file_size, item_id, file_path in rows:
+        group = groups.setdefault(fingerprint, {
+            'fingerprint': fingerprint,
+            'files': [],
+            'file_size': file_size or 0,
+        })
+        group['files'].append((item_id, file_path))
+
+    for group in groups.values():
+        group['reclaimable'] = group['file_size'] * (len(group['files']) - 1)
+
+    return sorted(groups.values(), key=lambda group: group['reclaimable'], reverse=True)
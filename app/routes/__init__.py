@@ -6,7 +6,8 @@
 from app.routes.tvshow import bp as tvshow_bp
 from app.routes.movie import bp as movie_bp
 from app.routes.main import bp as main_bp
-app/routes/__init__.py
+from app.routes.person import bp as person_bp
+from app.routes.api import bp as api_bp
 
 
 # All blueprints are imported and made available to the application
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 16:52:40
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 16:52:40
+import gzip
+import json
+from datetime import date, datetime
+from flask import Blueprint, Response, request, current_app, abort
+from app.models.movie import Movie
+from app.models.tvshow import TVShow, Episode
+from app.models.person import Credit
+from app.cache import cached_page
+from app.queries import (SORTS, InvalidCursor, library_query, after_cursor, encode_cursor,
+                         search_library, tvshow_episodes, tvshow_seasons)
+
+# orjson is several times faster than the json module; it is optional
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+bp = Blueprint('api', __name__)
+
+# Columns clients may select with ?fields=; file paths stay private
+MOVIE_FIELDS = (
+    'id', 'title', 'original_title', 'tmdb_id', 'imdb_id', 'overview', 'release_date',
+    'runtime', 'poster_path', 'backdrop_path', 'genres', 'director', 'resolution',
+    'file_size', 'width', 'height', 'duration', 'video_codec', 'audio_codec',
+    'audio_languages', 'subtitle_languages', 'date_added', 'last_updated',
+)
+TVSHOW_FIELDS = (
+    'id', 'title', 'original_title', 'tmdb_id', 'overview', 'first_air_date',
+    'last_air_date', 'status', 'number_of_seasons', 'number_of_episodes', 'poster_path',
+    'backdrop_path', 'genres', 'creators', 'date_added', 'last_updated',
+)
+EPISODE_FIELDS = (
+    'id', 'tvshow_id', 'season_number', 'episode_number', 'title', 'overview', 'air_date',
+    'still_path', 'resolution', 'file_size', 'width', 'height', 'duration', 'video_codec',
+    'audio_codec', 'audio_languages', 'subtitle_languages', 'date_added',
+)
+
+# Fields returned by list endpoints when ?fields= is not given
+MOVIE_LIST_FIELDS = ('id', 'title', 'release_date', 'poster_path', 'genres', 'resolution')
+TVSHOW_LIST_FIELDS = ('id', 'title', 'first_air_date', 'poster_path', 'genres', 'status')
+EPISODE_LIST_FIELDS = ('id', 'season_number', 'episode_number', 'title', 'air_date',
+                       'still_path')
+
+MAX_LIMIT = 200
+GZIP_MIN_SIZE = 1024
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(payload):
+    """Serialize to JSON bytes with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+
+def api_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def api_error(status, message):
+    return api_response({'error': message}, status)
+
+
+@bp.errorhandler(400)
+@bp.errorhandler(404)
+def handle_error(error):
+    return api_error(error.code, error.description)
+
+
+@bp.after_request
+def compress_response(response):
+    """Gzip JSON bodies for clients that accept it"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype != 'application/json'):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if 'gzip' not in request.accept_encodings:
+        return response
+
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers['Content-Encoding'] = 'gzip'
+    # Same content in another encoding: only weakly equal to the plain body
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _fields(allowed, default):
+    """Parse ?fields= against the selectable columns; id is always included"""
+    requested = request.args.get('fields')
+    if not requested:
+        return list(default)
+
+    fields = [field.strip() for field in requested.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        abort(400, f"Unknown fields: {', '.join(unknown)}")
+    return ['id'] + [field for field in dict.fromkeys(fields) if field != 'id']
+
+
+def _limit():
+    limit = request.args.get('limit', current_app.config['ITEMS_PER_PAGE'], type=int)
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _select(query, model, fields, extra=()):
+    """Query only the selected columns"""
+    columns = list(dict.fromkeys(list(fields) + list(extra)))
+    return query.with_entities(*[getattr(model, column) for column in columns])
+
+
+def _serialize(rows, fields):
+    return [{field: getattr(row, field) for field in fields} for row in rows]
+
+
+def _library_list(model, allowed, default):
+    """Cursor-paginated list shared by /movies and /tvshows"""
+    fields = _fields(allowed, default)
+    sort_by = request.args.get('sort', 'title')
+    if sort_by not in SORTS[model]:
+        abort(400, f"Unknown sort: {sort_by}")
+    limit = _limit()
+
+    query = library_query(model, request.args.get('genre', ''), sort_by)
+    try:
+        query = after_cursor(query, model, sort_by, request.args.get('cursor'))
+    except InvalidCursor:
+        abort(400, 'Invalid cursor')
+
+    # The sort column is needed to build the next cursor
+    sort_column = SORTS[model][sort_by][0]
+    rows = _select(query, model, fields, [sort_column]).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(model, sort_by, rows[-1])
+
+    return api_response({'data': _serialize(rows, fields), 'next_cursor': next_cursor})
+
+
+def _detail(model, id, allowed):
+    fields = _fields(allowed, allowed)
+    row = _select(model.available().filter(model.id == id), model, fields).first()
+    if row is None:
+        abort(404, 'Not found')
+    return row, fields
+
+
+@bp.route('/movies')
+@cached_page
+def movies():
+    return _library_list(Movie, MOVIE_FIELDS, MOVIE_LIST_FIELDS)
+
+
+@bp.route('/movies/<int:id>')
+@cached_page
+def movie(id):
+    row, fields = _detail(Movie, id, MOVIE_FIELDS)
+    payload = _serialize([row], fields)[0]
+    if request.args.get('include') == 'cast':
+        payload['cast'] = [dict(member._mapping)
+                           for member in Credit.top_billing(movie=row, limit=20)]
+    return api_response(payload)
+
+
+@bp.route('/tvshows')
+@cached_page
+def tvshows():
+    return _library_list(TVShow, TVSHOW_FIELDS, TVSHOW_LIST_FIELDS)
+
+
+@bp.route('/tvshows/<int:id>')
+@cached_page
+def tvshow(id):
+    row, fields = _detail(TVShow, id, TVSHOW_FIELDS)
+    payload = _serialize([row], fields)[0]
+    if request.args.get('include') == 'cast':
+        payload['cast'] = [dict(member._mapping)
+                           for member in Credit.top_billing(tvshow=row, limit=20)]
+    return api_response(payload)
+
+
+@bp.route('/tvshows/<int:id>/seasons')
+@cached_page
+def seasons(id):
+    if TVShow.available().filter(TVShow.id == id).with_entities(TVShow.id).first() is None:
+        abort(404, 'Not found')
+    return api_response({'data': [
+        {'season_number': season_number, 'episode_count': count}
+        for season_number, count in tvshow_seasons(id)
+    ]})
+
+
+@bp.route('/tvshows/<int:id>/seasons/<int:season_number>/episodes')
+@cached_page
+def season_episodes(id, season_number):
+    fields = _fields(EPISODE_FIELDS, EPISODE_LIST_FIELDS)
+    rows = _select(tvshow_episodes(id, season_number), Episode, fields).all()
+    if not rows:
+        abort(404, 'Not found')
+    return api_response({'data': _serialize(rows, fields)})
+
+
+@bp.route('/episodes/<int:id>')
+@cached_page
+def episode(id):
+    row, fields = _detail(Episode, id, EPISODE_FIELDS)
+    return api_response(_serialize([row], fields)[0])
+
+
+@bp.route('/search')
+@cached_page
+def search():
+    text = request.args.get('q', '').strip()
+    if not text:
+        abort(400, 'Missing q')
+
+    movie_fields = _fields(MOVIE_FIELDS + TVSHOW_FIELDS, MOVIE_LIST_FIELDS)
+    tvshow_fields = _fields(MOVIE_FIELDS + TVSHOW_FIELDS, TVSHOW_LIST_FIELDS)
+    movie_fields = [field for field in movie_fields if field in MOVIE_FIELDS]
+    tvshow_fields = [field for field in tvshow_fields if field in TVSHOW_FIELDS]
+
+    movie_query, tvshow_query = search_library(text, limit=_limit())
+    return api_response({
+        'movies': _serialize(_select(movie_query, Movie, movie_fields).all(), movie_fields),
+        'tvshows': _serialize(_select(tvshow_query, TVShow, tvshow_fields).all(),
+                              tvshow_fields),
+    })
@@ -4,27 +4,35 @@
 # @Last Modified by:   Zana Saedpanah
 # @Last Modified time: 2025-02-26 20:23:22
 from app import db
-from app.scanner.file_scanner import scan_directories
 from app.models.tvshow import TVShow
 from app.models.movie import Movie
-from flask import Blueprint, render_template, redirect, url_for, request, current_app
-app/routes/main.py
+from app.models.library import LibraryStat
+from app.models.scan import ScanRun
+from app.cache import cached_page
+from app.queries import search_library
+from app.export import export_lines, gzip_chunks, import_lines, LibraryImportError
+import gzip
+import hmac
+from flask import Blueprint, render_template, redirect, url_for, request, current_app, jsonify, \
+    Response, abort, stream_with_context
 
 
 bp = Blueprint('main', __name__)
 
 
 @bp.route('/')
+@cached_page
 def index():
     # Get recent movies and TV shows
-    recent_movies = Movie.query.order_by(
+    recent_movies = Movie.available().order_by(
         Movie.date_added.desc()).limit(12).all()
-    recent_tvshows = TVShow.query.order_by(
+    recent_tvshows = TVShow.available().order_by(
         TVShow.date_added.desc()).limit(12).all()
 
-    # Get counts
-    movie_count = Movie.query.count()
-    tvshow_count = TVShow.query.count()
+    # Get counts from the precomputed library statistics
+    totals = LibraryStat.totals()
+    movie_count = totals.get('movie', {}).get('count', 0)
+    tvshow_count = totals.get('tvshow', {}).get('count', 0)
 
     return render_template('index.html',
                            recent_movies=recent_movies,
@@ -33,17 +41,27 @@ def index():
                            tvshow_count=tvshow_count)
 
 
+@bp.route('/stats')
+@cached_page
+def stats():
+    return render_template('stats.html', stats=LibraryStat.snapshot())
+
+
+@bp.route('/stats.json')
+@cached_page
+def stats_json():
+    return jsonify(LibraryStat.snapshot())
+
+
 @bp.route('/search')
 def search():
     query = request.args.get('q', '')
     if not query:
         return redirect(url_for('main.index'))
 
-    # Search for movies
-    movies = Movie.query.filter(Movie.title.ilike(f'%{query}%')).all()
-
-    # Search for TV shows
-    tvshows = TVShow.query.filter(TVShow.title.ilike(f'%{query}%')).all()
+    # Search movies and TV shows
+    movies, tvshows = search_library(query)
+    movies, tvshows = movies.all(), tvshows.all()
 
     return render_template('search_results.html',
                            query=query,
@@ -58,7 +76,63 @@ def scan():
         # If no directories configured, redirect with error
         return redirect(url_for('main.index'))
 
-    # Trigger the scan
-    scan_directories(directories)
+    # The scanner pulls in guessit and requests; web workers load it on
+    # first use instead of at startup
+    from app.scanner.file_scanner import scan_directories
+
+    # Trigger the scan; profile=cpu,memory captures profiler reports
+    scan_directories(directories, profile=request.form.get('profile'))
+
+    # Under gunicorn, replace the workers (this one included, after the
+    # response) with ones warmed on the new library version
+    if current_app.config.get('SERVE_RELOAD_AFTER_SCAN'):
+        from app.serve import reload_server
+        reload_server(current_app)
 
     return redirect(url_for('main.index'))
+
+
+@bp.route('/scans')
+def scan_runs():
+    """Counters and stage timings of the most recent scans"""
+    limit = max(1, min(request.args.get('limit', 20, type=int), 200))
+    runs = ScanRun.query.order_by(ScanRun.id.desc()).limit(limit).all()
+    return render_template('scans.html', runs=runs, detail=False)
+
+
+@bp.route('/scans/<int:id>')
+def scan_run(id):
+    run = ScanRun.query.get_or_404(id)
+    return render_template('scans.html', runs=[run], detail=True)
+
+
+@bp.route('/library/export.ndjson')
+@bp.route('/library/export.ndjson.gz')
+def export_library():
+    """Stream the whole library as NDJSON, gzip-compressed for the .gz URL"""
+    lines = stream_with_context(export_lines())
+    if request.path.endswith('.gz'):
+        return Response(stream_with_context(gzip_chunks(lines)), mimetype='application/gzip')
+    return Response(lines, mimetype='application/x-ndjson')
+
+
+@bp.route('/library/import', methods=['POST'])
+def import_library():
+    """Upsert an NDJSON export sent as the request body"""
+    token = current_app.config.get('LIBRARY_IMPORT_TOKEN')
+    if not token:
+        abort(404)
+    provided = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(provided.encode('utf-8'), token.encode('utf-8')):
+        abort(403)
+
+    stream = request.stream
+    if request.headers.get('Content-Encoding') == 'gzip' or \
+            request.mimetype == 'application/gzip':
+        stream = gzip.GzipFile(fileobj=stream)
+
+    try:
+        result = import_lines(stream, replace=request.args.get('replace') == '1')
+    except LibraryImportError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(result)
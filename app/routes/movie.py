@@ -5,14 +5,20 @@
 # @Last Modified time: 2025-02-26 20:23:34
 from flask import Blueprint, render_template, redirect, url_for, request, current_app, abort
 from app.models.movie import Movie
+from app.models.person import Credit
 from app import db
+from app.cache import cached_page, card_batch_response, CARD_COLUMNS
+from app.streaming import send_media_file, media_mimetype
+from app.reports import movie_version_groups, identical_file_groups
+from app.queries import InvalidCursor, library_query, library_batch, encode_cursor, \
+    library_genres, movie_versions
 import os
-import json
 
 bp = Blueprint('movie', __name__)
 
 
 @bp.route('/')
+@cached_page
 def index():
     page = request.args.get('page', 1, type=int)
     per_page = current_app.config['ITEMS_PER_PAGE']
@@ -21,64 +27,81 @@ def index():
     genre = request.args.get('genre', '')
     sort_by = request.args.get('sort_by', 'title')
 
-    # Base query
-    query = Movie.query
-
-    # Apply filters
-    if genre:
-        query = query.filter(Movie.genres.ilike(f'%{genre}%'))
-
-    # Apply sorting
-    if sort_by == 'title':
-        query = query.order_by(Movie.title)
-    elif sort_by == 'date_added':
-        query = query.order_by(Movie.date_added.desc())
-    elif sort_by == 'release_date':
-        query = query.order_by(Movie.release_date.desc())
+    # Filtered and sorted query, shared with the JSON API
+    query = library_query(Movie, genre, sort_by)
 
     # Paginate results
     movies = query.paginate(page=page, per_page=per_page, error_out=False)
 
-    # Get distinct genres for filter dropdown
-    all_genres = set()
-    for movie in Movie.query.all():
-        if movie.genres:
-            genres = movie.genres.split(',')
-            all_genres.update([g.strip() for g in genres])
+    # Infinite scroll continues after the last card of this page
+    next_cursor = encode_cursor(Movie, sort_by, movies.items[-1]) if movies.has_next else None
 
+    # Genres for the filter dropdown come from the library statistics
     return render_template('movies/index.html',
                            movies=movies,
-                           genres=sorted(all_genres),
+                           genres=library_genres('movie'),
                            current_genre=genre,
-                           current_sort=sort_by)
+                           current_sort=sort_by,
+                           next_cursor=next_cursor)
+
+
+@bp.route('/cards')
+@cached_page
+def cards():
+    """Next batch of poster cards for infinite scroll, as HTML or JSON"""
+    try:
+        items, next_cursor = library_batch(
+            Movie, request.args.get('genre', ''), request.args.get('sort_by', 'title'),
+            request.args.get('cursor'), current_app.config['ITEMS_PER_PAGE'],
+            columns=CARD_COLUMNS['movie'])
+    except InvalidCursor:
+        abort(400)
+    return card_batch_response(items, next_cursor)
 
 
 @bp.route('/<int:id>')
+@cached_page
 def movie_detail(id):
-    movie = Movie.query.get_or_404(id)
+    movie = Movie.available().filter_by(id=id).first_or_404()
+
+    # Top 10 billed cast members, read from the credit index
+    cast_list = Credit.top_billing(movie=movie, limit=10)
 
-    # Parse cast JSON if available
-    cast_list = []
-    if movie.cast:
-        try:
-            # Limit to top 10 cast members
-            cast_list = json.loads(movie.cast)[:10]
-        except json.JSONDecodeError:
-            pass
+    # Other file versions of the same title
+    versions = movie_versions(movie).all()
 
     return render_template('movies/detail.html',
                            movie=movie,
-                           cast=cast_list)
+                           cast=cast_list,
+                           versions=versions)
+
+
+@bp.route('/duplicates')
+@cached_page
+def duplicates():
+    version_groups = movie_version_groups()
+    identical_groups = identical_file_groups()
+
+    return render_template('movies/duplicates.html',
+                           version_groups=version_groups,
+                           identical_groups=identical_groups,
+                           reclaimable=sum(g['reclaimable'] for g in version_groups))
 
 
 @bp.route('/<int:id>/play')
 def play_movie(id):
-    movie = Movie.query.get_or_404(id)
+    movie = Movie.available().filter_by(id=id).first_or_404()
 
     # Check if file exists
     if not os.path.exists(movie.file_path):
         abort(404)
 
-    # In a real application, you would stream the video file
-    # For this example, we'll redirect to a play page
-    return render_template('movies/play.html', movie=movie)
+    # The page plays the file through the Range-capable stream endpoint
+    return render_template('movies/play.html', movie=movie,
+                           mimetype=media_mimetype(movie.file_path))
+
+
+@bp.route('/<int:id>/stream')
+def stream_movie(id):
+    movie = Movie.available().filter_by(id=id).first_or_404()
+    return send_media_file(movie.file_path)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 09:44:37
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 09:44:37
+from flask import Blueprint, render_template
+from app.models.person import Person, Credit
+from app.models.movie import Movie
+from app.models.tvshow import TVShow
+from app import db
+from app.cache import cached_page
+
+bp = Blueprint('person', __name__)
+
+
+@bp.route('/<int:id>')
+@cached_page
+def person_detail(id):
+    person = Person.query.get_or_404(id)
+
+    # All titles in the library with this person, via the person index
+    movies = db.session.query(Movie, Credit.character).join(
+        Credit, Credit.movie_id == Movie.id).filter(
+        Credit.person_id == person.id,
+        Movie.missing_since.is_(None)).order_by(
+        Movie.release_date.desc()).all()
+
+    tvshows = db.session.query(TVShow, Credit.character).join(
+        Credit, Credit.tvshow_id == TVShow.id).filter(
+        Credit.person_id == person.id,
+        TVShow.missing_since.is_(None)).order_by(
+        TVShow.first_air_date.desc()).all()
+
+    return render_template('people/detail.html',
+                           person=person,
+                           movies=movies,
+                           tvshows=tvshows)
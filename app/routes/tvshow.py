@@ -5,14 +5,19 @@
 # @Last Modified time: 2025-02-26 20:24:16
 from flask import Blueprint, render_template, redirect, url_for, request, current_app, abort
 from app.models.tvshow import TVShow, Episode
+from app.models.person import Credit
 from app import db
+from app.cache import cached_page, card_batch_response, CARD_COLUMNS
+from app.streaming import send_media_file, media_mimetype
+from app.queries import InvalidCursor, library_query, library_batch, encode_cursor, \
+    library_genres, tvshow_episodes, group_by_season
 import os
-import json
 
 bp = Blueprint('tvshow', __name__)
 
 
 @bp.route('/')
+@cached_page
 def index():
     page = request.args.get('page', 1, type=int)
     per_page = current_app.config['ITEMS_PER_PAGE']
@@ -21,57 +26,48 @@ def index():
     genre = request.args.get('genre', '')
     sort_by = request.args.get('sort_by', 'title')
 
-    # Base query
-    query = TVShow.query
-
-    # Apply filters
-    if genre:
-        query = query.filter(TVShow.genres.ilike(f'%{genre}%'))
-
-    # Apply sorting
-    if sort_by == 'title':
-        query = query.order_by(TVShow.title)
-    elif sort_by == 'date_added':
-        query = query.order_by(TVShow.date_added.desc())
-    elif sort_by == 'first_air_date':
-        query = query.order_by(TVShow.first_air_date.desc())
+    # Filtered and sorted query, shared with the JSON API
+    query = library_query(TVShow, genre, sort_by)
 
     # Paginate results
     tvshows = query.paginate(page=page, per_page=per_page, error_out=False)
 
-    # Get distinct genres for filter dropdown
-    all_genres = set()
-    for tvshow in TVShow.query.all():
-        if tvshow.genres:
-            genres = tvshow.genres.split(',')
-            all_genres.update([g.strip() for g in genres])
+    # Infinite scroll continues after the last card of this page
+    next_cursor = encode_cursor(TVShow, sort_by, tvshows.items[-1]) if tvshows.has_next else None
 
+    # Genres for the filter dropdown come from the library statistics
     return render_template('tvshows/index.html',
                            tvshows=tvshows,
-                           genres=sorted(all_genres),
+                           genres=library_genres('tvshow'),
                            current_genre=genre,
-                           current_sort=sort_by)
+                           current_sort=sort_by,
+                           next_cursor=next_cursor)
+
+
+@bp.route('/cards')
+@cached_page
+def cards():
+    """Next batch of poster cards for infinite scroll, as HTML or JSON"""
+    try:
+        items, next_cursor = library_batch(
+            TVShow, request.args.get('genre', ''), request.args.get('sort_by', 'title'),
+            request.args.get('cursor'), current_app.config['ITEMS_PER_PAGE'],
+            columns=CARD_COLUMNS['tvshow'])
+    except InvalidCursor:
+        abort(400)
+    return card_batch_response(items, next_cursor)
 
 
 @bp.route('/<int:id>')
+@cached_page
 def tvshow_detail(id):
-    tvshow = TVShow.query.get_or_404(id)
+    tvshow = TVShow.available().filter_by(id=id).first_or_404()
 
     # Get seasons and episodes
-    seasons = {}
-    for episode in tvshow.episodes.order_by(Episode.season_number, Episode.episode_number).all():
-        if episode.season_number not in seasons:
-            seasons[episode.season_number] = []
-        seasons[episode.season_number].append(episode)
-
-    # Parse cast JSON if available
-    cast_list = []
-    if tvshow.cast:
-        try:
-            # Limit to top 10 cast members
-            cast_list = json.loads(tvshow.cast)[:10]
-        except json.JSONDecodeError:
-            pass
+    seasons = group_by_season(tvshow_episodes(tvshow.id))
+
+    # Top 10 billed cast members, read from the credit index
+    cast_list = Credit.top_billing(tvshow=tvshow, limit=10)
 
     return render_template('tvshows/detail.html',
                            tvshow=tvshow,
@@ -81,15 +77,18 @@ def tvshow_detail(id):
 
 @bp.route('/episode/<int:id>/play')
 def play_episode(id):
-    episode = Episode.query.get_or_404(id)
+    episode = Episode.available().filter_by(id=id).first_or_404()
 
     # Check if file exists
     if not os.path.exists(episode.file_path):
         abort(404)
 
-    # In a real application, you would stream the video file
-    # For this example, we'll redirect to a play page
-    return render_template('tvshows/play.html', episode=episode)
+    # The page plays the file through the Range-capable stream endpoint
+    return render_template('tvshows/play.html', episode=episode,
+                           mimetype=media_mimetype(episode.file_path))
 
 
-Last edited 12 minutes ago
+@bp.route('/episode/<int:id>/stream')
+def stream_episode(id):
+    episode = Episode.available().filter_by(id=id).first_or_404()
+    return send_media_file(episode.file_path)
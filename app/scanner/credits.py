@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 09:31:02
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 09:31:02
+from sqlalchemy import insert
+from app import db
+from app.database import dialect_insert
+from app.models.person import Person, Credit
+
+
+def save_credits(cast, movie=None, tvshow=None):
+    """
+    Replace the billed cast of a movie or TV show
+
+    People are deduplicated by their TMDB person id, so an actor appearing in
+    many titles has a single Person row. Actors without an id (from local
+    NFO files) are matched by name against people without an id.
+    Everything is written with bulk inserts: one lookup for known people,
+    one insert for new people and one insert for the ordered credits.
+
+    Args:
+        cast: TMDB cast list (dicts with id, name, character, order; id may
+            be missing for sidecar metadata)
+        movie: Movie owning the credits
+        tvshow: TV show owning the credits (when movie is None)
+    """
+    owner = movie if movie is not None else tvshow
+    owner_column = Credit.movie_id if movie is not None else Credit.tvshow_id
+
+    # Make sure the owner has a primary key before linking to it
+    if owner.id is None:
+        db.session.flush()
+
+    # Keep the first billing of every person
+    members = {}
+    unidentified = {}
+    for position, member in enumerate(cast):
+        person_id = member.get('id')
+        name = member.get('name')
+        if not name:
+            continue
+        if person_id is None:
+            unidentified.setdefault(name, (member.get('order', position), member))
+        elif person_id not in members:
+            members[person_id] = (member.get('order', position), member)
+
+    db.session.query(Credit).filter(owner_column == owner.id).delete(
+        synchronize_session=False)
+
+    if not members and not unidentified:
+        return
+
+    # Resolve existing people, then bulk insert the missing ones
+    person_ids = dict(db.session.query(Person.tmdb_id, Person.id).filter(
+        Person.tmdb_id.in_(members.keys())))
+    name_ids = dict(db.session.query(Person.name, Person.id).filter(
+        Person.tmdb_id.is_(None), Person.name.in_(unidentified.keys())))
+
+    new_people = [
+        {
+            'tmdb_id': tmdb_id,
+            'name': member['name'],
+            'profile_path': member.get('profile_path'),
+        }
+        for tmdb_id, (_, member) in members.items() if tmdb_id not in person_ids
+    ]
+    new_named = [
+        {
+            'tmdb_id': None,
+            'name': name,
+            'profile_path': member.get('profile_path'),
+        }
+        for name, (_, member) in unidentified.items() if name not in name_ids
+    ]
+    if new_people:
+        # Another scan worker may insert the same actor meanwhile; skip
+        # those rows and read back whichever row won
+        statement = dialect_insert(db.session.get_bind().dialect.name, Person.__table__)
+        if statement is not None:
+            statement = statement.on_conflict_do_nothing(index_elements=['tmdb_id'])
+        else:
+            statement = insert(Person)
+        db.session.execute(statement, new_people)
+        person_ids.update(db.session.query(Person.tmdb_id, Person.id).filter(
+            Person.tmdb_id.in_([p['tmdb_id'] for p in new_people])))
+    if new_named:
+        db.session.execute(insert(Person), new_named)
+        name_ids.update(db.session.query(Person.name, Person.id).filter(
+            Person.tmdb_id.is_(None),
+            Person.name.in_([p['name'] for p in new_named])))
+
+    credits = [
+        (person_ids[tmdb_id], order, member)
+        for tmdb_id, (order, member) in members.items()
+    ] + [
+        (name_ids[name], order, member)
+        for name, (order, member) in unidentified.items()
+    ]
+    db.session.execute(insert(Credit), [
+        {
+            'person_id': person_id,
+            'movie_id': movie.id if movie is not None else None,
+            'tvshow_id': tvshow.id if movie is None else None,
+            'character': (member.get('character') or '')[:255] or None,
+            'billing_order': order,
+        }
+        for person_id, order, member in credits
+    ])
+
@@ -4,80 +4,486 @@
 # @Last Modified by:   Zana Saedpanah
 # @Last Modified time: 2025-02-26 20:24:34
 import os
-import json
-from datetime import datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from guessit import guessit
 from app import db
+from app.database import refresh_planner_statistics
 from app.models.movie import Movie
 from app.models.tvshow import TVShow, Episode
+from app.models.library import LibraryVersion
 from app.scanner.metadata_fetcher import TMDBFetcher
+from app.scanner.credits import save_credits
+from app.scanner.probe import probe_file, resolution_label
+from app.scanner.fingerprint import content_fingerprint
+from app.scanner import sidecar
+from app.scanner.metadata_store import open_store
+from app.scanner.writer import get_scan_writer
+from app.metrics import SCANNED_FILES, scan_stage
+from app.scanner.profiling import (ScanProfile, parse_profile_flags, start_scan_run,
+                                   finish_scan_run)
+# Registers the flush hook keeping LibraryStat in sync with scanner writes
+from app.scanner import stats  # noqa: F401
 from flask import current_app
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Values per IN (...) list; stays below SQLite's bound parameter limit
+QUERY_CHUNK_SIZE = 500
 
-def scan_directories(directories):
+# Value of get_known_files(): enough to skip an unchanged file entirely
+KnownFile = namedtuple('KnownFile', ('last_updated', 'kind'))
+
+
+def chunked(values):
+    """Split a collection into lists of at most QUERY_CHUNK_SIZE values"""
+    values = list(values)
+    for start in range(0, len(values), QUERY_CHUNK_SIZE):
+        yield values[start:start + QUERY_CHUNK_SIZE]
+
+
+def scan_directories(directories, profile=None):
     """
     Scan directories for media files and update the database
 
+    Metadata is resolved on this thread and the probe pool, outside of any
+    transaction; every database write is queued to the scan writer, which
+    applies them in short transactions of its own. Every run is recorded
+    in the ScanRun table.
+
     Args:
         directories: List of directory paths to scan
+        profile: 'cpu', 'memory' or 'cpu,memory' to capture cProfile and
+            tracemalloc reports (default: SCAN_PROFILE)
     """
     logger.info(f"Starting scan of {len(directories)} directories")
+    writer = get_scan_writer()
 
     # Initialize TMDB fetcher
     tmdb_fetcher = TMDBFetcher(current_app.config['TMDB_API_KEY'])
 
+    cpu, memory = parse_profile_flags(
+        profile if profile is not None else current_app.config.get('SCAN_PROFILE'))
+    run = ScanProfile(cpu=cpu, memory=memory)
+    run_id = writer.call(start_scan_run, directories)
+    try:
+        with run:
+            _scan(directories, writer, tmdb_fetcher, run)
+    except Exception as e:
+        writer.call(finish_scan_run, run_id, _run_values(run, tmdb_fetcher), str(e))
+        raise
+    writer.call(finish_scan_run, run_id, _run_values(run, tmdb_fetcher))
+
+    # Rows the caller's session loaded before the scan are stale now
+    db.session.expire_all()
+
+    logger.info("Scan completed")
+    return run_id
+
+
+def _run_values(run, tmdb_fetcher):
+    values = run.values()
+    values['tmdb_calls'] = tmdb_fetcher.request_count
+    values['bytes_downloaded'] = tmdb_fetcher.bytes_downloaded
+    return values
+
+
+def _scan(directories, writer, tmdb_fetcher, run):
     # Get list of valid video extensions
     video_extensions = current_app.config['VIDEO_EXTENSIONS']
 
-    # Track found files to identify removed ones
-    found_movie_paths = []
-    found_episode_paths = []
-    found_tvshow_dirs = []
+    # Known files, so only new or changed ones are probed
+    known_files = writer.call(get_known_files)
+    known_shows = writer.call(get_known_shows)
 
-    # Process each directory
+    # Walk every directory first, so moves across roots can be detected
+    entries = []
+    scanned_roots = []
     for directory in directories:
         if not os.path.exists(directory):
             logger.warning(f"Directory not found: {directory}")
             continue
 
+        if not is_root_available(directory, known_files):
+            # Likely an unmounted share: leave its rows alone
+            logger.warning(
+                f"Directory is empty or unreadable, skipping cleanup: {directory}")
+            continue
+
         logger.info(f"Scanning directory: {directory}")
+        scanned_roots.append(directory)
 
-        # Walk through directory
-        for root, dirs, files in os.walk(directory):
-            # Process files
-            for filename in files:
-                if any(filename.lower().endswith(ext) for ext in video_extensions):
-                    file_path = os.path.join(root, filename)
-
-                    # Parse filename
-                    try:
-                        guess = guessit(filename)
-
-                        # Determine if it's a movie or TV show episode
-                        if guess.get('type') == 'movie':
-                            process_movie(file_path, guess, tmdb_fetcher)
-                            found_movie_paths.append(file_path)
-                        elif guess.get('type') == 'episode':
-                            process_episode(file_path, guess,
-                                            root, tmdb_fetcher)
-                            found_episode_paths.append(file_path)
-                            # Track TV show directory
-                            tvshow_dir = find_tvshow_directory(root)
-                            if tvshow_dir:
-                                found_tvshow_dirs.append(tvshow_dir)
-                    except Exception as e:
-                        logger.error(
-                            f"Error processing file {file_path}: {str(e)}")
-
-    # Remove entries for deleted files
-    cleanup_database(found_movie_paths, found_episode_paths, found_tvshow_dirs)
+        with scan_stage('walk'):
+            entries.extend(walk_media_files(directory, video_extensions))
+    run.add('files_walked', len(entries))
 
-    logger.info("Scan completed")
+    # Every resolved row is also appended to the local metadata store; it
+    # is only written from the writer thread
+    store = open_store()
+    try:
+        # Re-link moved or renamed files to their existing rows
+        found_paths = [os.path.join(root, filename) for root, filename in entries]
+        fingerprints = writer.call(relink_moved_files, found_paths, known_files, store)
+
+        # Bring back tombstoned rows whose files are reachable again
+        writer.call(restore_reappeared_files, found_paths)
+
+        found = process_entries(entries, known_files, known_shows, fingerprints,
+                                tmdb_fetcher, writer, store, run)
+
+        # Remove entries for deleted files and publish the scan
+        run.add('deleted_count', writer.call(finish_scan, *found, scanned_roots))
+    finally:
+        # Buffered records belong to rows that are already committed; later
+        # scans skip those unchanged files and would never record them
+        writer.call(store.close)
+
+
+def process_entries(entries, known_files, known_shows, fingerprints, tmdb_fetcher,
+                    writer, store, run=None, cancelled=None):
+    """
+    Resolve and save a list of (root, filename) media entries
+
+    Counters of the optional ScanProfile ``run`` are updated. Setting the
+    optional threading.Event ``cancelled`` stops before the next file.
+
+    Returns:
+        (found_movie_paths, found_episode_paths, found_tvshow_dirs) of the
+        entries that were processed successfully
+    """
+    probe_bytes = current_app.config['PROBE_MAX_BYTES']
+    pending = []
+    with ThreadPoolExecutor(max_workers=current_app.config['SCANNER_WORKERS']) as pool:
+        # Probe container headers in the worker pool ahead of processing
+        probes = {}
+        for root, filename in entries:
+            file_path = os.path.join(root, filename)
+            if needs_processing(file_path, known_files):
+                probes[file_path] = pool.submit(
+                    analyze_file, file_path, probe_bytes, fingerprints.get(file_path))
+        if run is not None:
+            run.add('files_skipped', len(entries) - len(probes))
+
+        # Process files
+        for root, filename in entries:
+            if cancelled is not None and cancelled.is_set():
+                for probe in probes.values():
+                    probe.cancel()
+                break
+            file_path = os.path.join(root, filename)
+
+            if file_path not in probes:
+                # Unchanged: the known row says what the file is, so the
+                # name is not parsed again
+                kind = known_files[file_path].kind
+                tvshow_dir = find_tvshow_directory(root) if kind == 'episode' else None
+                pending.append((kind, file_path, tvshow_dir, None))
+                continue
+
+            # Parse filename
+            try:
+                with scan_stage('parse'):
+                    guess = guessit(filename)
+                job = None
+
+                # Determine if it's a movie or TV show episode
+                if guess.get('type') == 'movie':
+                    metadata = resolve_movie_metadata(file_path, guess, tmdb_fetcher)
+                    job = writer.submit(save_movie, file_path, guess, metadata,
+                                        probes[file_path].result(), store)
+                    pending.append(('movie', file_path, None, job))
+                elif guess.get('type') == 'episode':
+                    tvshow_dir = find_tvshow_directory(root)
+                    if tvshow_dir:
+                        tvshow_metadata = None
+                        if tvshow_dir not in known_shows and guess.get('title'):
+                            tvshow_metadata = resolve_tvshow_metadata(
+                                root, tvshow_dir, guess['title'], tmdb_fetcher)
+                            known_shows[tvshow_dir] = tvshow_metadata.get('id')
+                        episode_metadata = resolve_episode_metadata(
+                            file_path, known_shows.get(tvshow_dir),
+                            guess.get('season', 1), guess.get('episode', 1), tmdb_fetcher)
+                        job = writer.submit(save_episode, file_path, guess, tvshow_dir,
+                                            tvshow_metadata, episode_metadata,
+                                            probes[file_path].result(), store)
+                    pending.append(('episode', file_path, tvshow_dir, job))
+            except Exception as e:
+                logger.error(
+                    f"Error processing file {file_path}: {str(e)}")
+                # A changed known file keeps its row; it is still found
+                known = known_files.get(file_path)
+                if known is not None:
+                    tvshow_dir = find_tvshow_directory(root) if known.kind == 'episode' else None
+                    pending.append((known.kind, file_path, tvshow_dir, None))
+
+    # Collect write results; new files that failed are not counted as found
+    found_movie_paths = []
+    found_episode_paths = []
+    found_tvshow_dirs = []
+    for kind, file_path, tvshow_dir, job in pending:
+        if job is not None:
+            try:
+                job.result()
+            except Exception as e:
+                logger.error(
+                    f"Error processing file {file_path}: {str(e)}")
+                # A known file keeps its row, and it is still on disk;
+                # leaving it out would have cleanup tombstone it
+                if file_path not in known_files:
+                    continue
+                job = None
+
+        SCANNED_FILES.inc(kind)
+        if run is not None and job is not None:
+            run.add('updated_count' if file_path in known_files else 'new_count')
+        if kind == 'movie':
+            found_movie_paths.append(file_path)
+        else:
+            found_episode_paths.append(file_path)
+            # Track TV show directory
+            if tvshow_dir:
+                found_tvshow_dirs.append(tvshow_dir)
+
+    return found_movie_paths, found_episode_paths, found_tvshow_dirs
+
+
+def walk_media_files(directory, video_extensions, recursive=True):
+    """
+    Yield (root, filename) for the video files under a directory
+
+    With recursive=False only the files directly inside it are listed.
+    """
+    for root, dirs, files in os.walk(directory):
+        for filename in files:
+            if any(filename.lower().endswith(ext) for ext in video_extensions):
+                yield root, filename
+        if not recursive:
+            break
+
+
+def get_known_files(prefix=None):
+    """
+    Return {file_path: KnownFile} for every movie and episode
+
+    Args:
+        prefix: Only return files whose path starts with it
+    """
+    known_files = {}
+    for model, kind in ((Movie, 'movie'), (Episode, 'episode')):
+        query = db.session.query(model.file_path, model.last_updated)
+        if prefix:
+            query = query.filter(model.file_path.startswith(prefix, autoescape=True))
+        known_files.update((file_path, KnownFile(last_updated, kind))
+                           for file_path, last_updated in query)
+    return known_files
+
+
+def get_known_shows():
+    """Return {directory_path: tmdb_id} for every TV show"""
+    return dict(db.session.query(TVShow.directory_path, TVShow.tmdb_id))
+
+
+def is_root_available(directory, known_files):
+    """
+    Check whether a media root can be trusted for cleanup
+
+    An unmounted network share usually leaves an empty mount point behind.
+    A root that is unreadable, or empty while the library has files under
+    it, is treated as unavailable.
+    """
+    try:
+        with os.scandir(directory) as it:
+            if next(it, None) is not None:
+                return True
+    except OSError:
+        return False
+
+    prefix = directory.rstrip(os.sep) + os.sep
+    return not any(path.startswith(prefix) for path in known_files)
+
+
+def restore_reappeared_files(found_paths):
+    """Clear the tombstone of rows whose files were found again"""
+    restored = 0
+    for model in (Movie, Episode):
+        for paths in chunked(found_paths):
+            query = model.query.filter(
+                model.missing_since.isnot(None), model.file_path.in_(paths))
+            if model is Episode:
+                # Loaded up front: a lazy load per episode also autoflushes
+                query = query.options(db.selectinload(Episode.tvshow))
+            for row in query:
+                row.missing_since = None
+                if isinstance(row, Episode) and row.tvshow.missing_since:
+                    row.tvshow.missing_since = None
+                restored += 1
+
+    if restored:
+        db.session.commit()
+        logger.info(f"Restored {restored} tombstoned files")
+
+
+def needs_processing(file_path, known_files):
+    """Check whether a file is new or changed since it was last processed"""
+    known = known_files.get(file_path)
+    if known is None:
+        return True
+    return os.path.getmtime(file_path) > known.last_updated.timestamp()
+
+
+def analyze_file(file_path, probe_bytes, fingerprint=None):
+    """Probe and fingerprint a file; runs in the scanner worker pool"""
+    with scan_stage('probe'):
+        technical = probe_file(file_path, probe_bytes)
+        technical['fingerprint'] = fingerprint or content_fingerprint(file_path)
+    return technical
+
+
+def relink_moved_files(file_paths, known_files, store=None, missing_paths=None):
+    """
+    Point rows of files that disappeared at the new paths they moved to
+
+    A new path whose content fingerprint matches a row whose path was not
+    found in this scan is the same file, moved or renamed. Its row is
+    updated in place, so TMDB metadata, credits and artwork are kept and
+    nothing is fetched again. Only new files with the size of a missing
+    file are fingerprinted.
+
+    Args:
+        file_paths: Every media file found by this scan
+        known_files: {file_path: KnownFile} of existing rows; updated
+            in place for re-linked rows
+        store: Metadata store recording the new paths
+        missing_paths: Known paths whose files are gone; by default every
+            known path this scan did not find
+
+    Returns:
+        {file_path: fingerprint} computed for new files
+    """
+    found = set(file_paths)
+    new_paths = [path for path in file_paths if path not in known_files]
+    if missing_paths is None:
+        missing_paths = [path for path in known_files if path not in found]
+    if not new_paths or not missing_paths:
+        return {}
+
+    # Candidate rows, keyed by fingerprint
+    candidates = {}
+    for model in (Movie, Episode):
+        for paths in chunked(missing_paths):
+            query = model.query.filter(model.fingerprint.isnot(None),
+                                       model.file_path.in_(paths))
+            if model is Episode:
+                query = query.options(db.selectinload(Episode.tvshow))
+            for row in query:
+                candidates.setdefault(row.fingerprint, []).append(row)
+    if not candidates:
+        return {}
+
+    candidate_sizes = {row.file_size for rows in candidates.values()
+                       for row in rows}
+    show_dirs = None
+    if any(isinstance(row, Episode) for rows in candidates.values() for row in rows):
+        show_dirs = {directory for (directory,) in db.session.query(TVShow.directory_path)}
+
+    fingerprints = {}
+    moved = []
+    relinked = 0
+    for path in new_paths:
+        try:
+            if os.path.getsize(path) not in candidate_sizes:
+                continue
+        except OSError:
+            continue
+
+        fingerprint = content_fingerprint(path)
+        fingerprints[path] = fingerprint
+        rows = candidates.get(fingerprint)
+        if not rows:
+            continue
+
+        row = rows.pop()
+        if not rows:
+            del candidates[fingerprint]
+
+        logger.info(f"Re-linking moved file {row.file_path} -> {path}")
+        known_files.pop(row.file_path, None)
+        moved.append((row, row.file_path))
+        row.file_path = path
+        row.missing_since = None
+        if isinstance(row, Episode):
+            tvshow = row.tvshow
+            previous_dir = tvshow.directory_path
+            relink_tvshow_directory(row, path, show_dirs)
+            if tvshow.directory_path != previous_dir:
+                moved.append((tvshow, previous_dir))
+        relinked += 1
+
+    if relinked:
+        # onupdate refreshes last_updated, so the files are not re-processed
+        db.session.flush()
+        ids = {}
+        for item, _ in moved:
+            if not isinstance(item, TVShow):
+                known_files[item.file_path] = KnownFile(
+                    item.last_updated, 'movie' if isinstance(item, Movie) else 'episode')
+            ids.setdefault(type(item), set()).add(item.id)
+            if isinstance(item, Episode):
+                ids.setdefault(TVShow, set()).add(item.tvshow_id)
+        db.session.commit()
+        logger.info(f"Re-linked {relinked} moved files")
+        if store is not None:
+            # Reload what the commit expired in one query per table rather
+            # than one refresh per recorded row
+            for model, model_ids in ids.items():
+                for chunk in chunked(model_ids):
+                    model.query.filter(model.id.in_(chunk)).all()
+            # Shows first, so moved episodes point at a recorded directory
+            for item, previous_key in sorted(
+                    moved, key=lambda entry: not isinstance(entry[0], TVShow)):
+                store.record(item, previous_key=previous_key)
+
+    return fingerprints
+
+
+def relink_tvshow_directory(episode, file_path, show_dirs):
+    """
+    Follow a TV show whose whole directory was moved
+
+    Args:
+        show_dirs: Set of every TV show directory, kept up to date; saves
+            a query per moved episode
+    """
+    tvshow_dir = find_tvshow_directory(os.path.dirname(file_path))
+    tvshow = episode.tvshow
+    tvshow.missing_since = None
+    if not tvshow_dir or tvshow.directory_path == tvshow_dir:
+        return
+    if tvshow_dir not in show_dirs:
+        show_dirs.discard(tvshow.directory_path)
+        show_dirs.add(tvshow_dir)
+        tvshow.directory_path = tvshow_dir
+
+
+def apply_technical_metadata(item, technical, guess_data):
+    """Store probed container metadata on a Movie or Episode"""
+    if technical.get('fingerprint'):
+        item.fingerprint = technical['fingerprint']
+    item.width = technical.get('width')
+    item.height = technical.get('height')
+    item.duration = technical.get('duration')
+    item.video_codec = technical.get('video_codec')
+    item.audio_codec = technical.get('audio_codec')
+    item.audio_languages = ','.join(
+        technical.get('audio_languages', [])) or None
+    item.subtitle_languages = ','.join(
+        technical.get('subtitle_languages', [])) or None
+
+    # Prefer the real frame size over guessit's guess from the filename
+    item.resolution = resolution_label(item.width, item.height) or \
+        str(guess_data.get('screen_size', 'Unknown'))
 
 
 def find_tvshow_directory(path):
@@ -91,38 +497,38 @@ def find_tvshow_directory(path):
     return None
 
 
-def process_movie(file_path, guess_data, tmdb_fetcher):
-    """Process a movie file and update the database"""
-    # Check if movie already exists in database
-    existing_movie = Movie.query.filter_by(file_path=file_path).first()
-
-    if existing_movie:
-        # If file hasn't changed, skip processing
-        if os.path.getmtime(file_path) <= existing_movie.last_updated.timestamp():
-            return existing_movie
+def resolve_movie_metadata(file_path, guess_data, tmdb_fetcher):
+    """
+    Resolve the metadata of a movie file without touching the database
 
-    # Get basic info from filename
+    Local NFO/artwork come first; TMDB only fills in what the sidecar lacks.
+    """
     title = guess_data.get('title', os.path.basename(file_path))
     year = guess_data.get('year')
 
-    # Get file size and other properties
-    file_size = os.path.getsize(file_path)
-    resolution = guess_data.get('screen_size', 'Unknown')
+    local_metadata = sidecar.read_movie_sidecar(file_path)
+    if sidecar.is_complete(local_metadata, sidecar.REQUIRED_MOVIE_FIELDS):
+        return local_metadata
 
-    # Fetch metadata from TMDB
-    metadata = {}
-    if title:
-        query = title
+    remote_metadata = {}
+    if local_metadata.get('id'):
+        remote_metadata = tmdb_fetcher.fetch_movie_details(local_metadata['id'])
+    elif title:
+        query = local_metadata.get('title', title)
         if year:
             query += f" {year}"
-        metadata = tmdb_fetcher.fetch_movie_metadata(query)
+        remote_metadata = tmdb_fetcher.fetch_movie_metadata(query)
+    return sidecar.merge_metadata(remote_metadata, local_metadata)
+
+
+def save_movie(file_path, guess_data, metadata, technical, store=None):
+    """Write a resolved movie file in one transaction; runs on the scan writer"""
+    title = guess_data.get('title', os.path.basename(file_path))
 
     # Create or update movie record
-    if existing_movie:
-        # Update existing record
-        movie = existing_movie
-    else:
-        # Create new record
+    movie = Movie.query.filter_by(file_path=file_path).first()
+    existing_movie = movie is not None
+    if not existing_movie:
         movie = Movie(file_path=file_path)
 
     # Update basic properties
@@ -135,19 +541,23 @@ def process_movie(file_path, guess_data, tmdb_fetcher):
     movie.runtime = metadata.get('runtime')
     movie.poster_path = metadata.get('poster_path')
     movie.backdrop_path = metadata.get('backdrop_path')
-    movie.file_size = file_size
-    movie.resolution = str(resolution)
+    movie.file_size = os.path.getsize(file_path)
+    apply_technical_metadata(movie, technical, guess_data)
 
     # Handle genres
     if 'genres' in metadata:
         movie.genres = ','.join([genre['name']
                                 for genre in metadata['genres']])
 
+    # Save to database
+    if not existing_movie:
+        db.session.add(movie)
+
     # Handle cast and crew
     if 'credits' in metadata:
         # Save cast information
         if 'cast' in metadata['credits']:
-            movie.cast = json.dumps(metadata['credits']['cast'])
+            save_credits(metadata['credits']['cast'], movie=movie)
 
         # Find director
         if 'crew' in metadata['credits']:
@@ -156,89 +566,124 @@ def process_movie(file_path, guess_data, tmdb_fetcher):
             if directors:
                 movie.director = ', '.join(directors)
 
-    # Save to database
-    if not existing_movie:
-        db.session.add(movie)
     db.session.commit()
 
-    return movie
+    if store is not None:
+        store.record(movie, metadata.get('credits', {}).get('cast'))
+
+    return movie.id
+
+
+def resolve_tvshow_metadata(directory, tvshow_dir, title, tmdb_fetcher):
+    """
+    Resolve the metadata of a new TV show without touching the database
+
+    Prefers tvshow.nfo next to the episode, in the season folder's parent
+    or in the show directory, then fills gaps from TMDB.
+    """
+    local_metadata = sidecar.read_tvshow_sidecar(list(dict.fromkeys(
+        [directory, os.path.dirname(directory), tvshow_dir])))
+    if sidecar.is_complete(local_metadata, sidecar.REQUIRED_TVSHOW_FIELDS):
+        return local_metadata
+
+    if local_metadata.get('id'):
+        remote_metadata = tmdb_fetcher.fetch_tvshow_details(local_metadata['id'])
+    else:
+        remote_metadata = tmdb_fetcher.fetch_tvshow_metadata(
+            local_metadata.get('name', title))
+    return sidecar.merge_metadata(remote_metadata, local_metadata)
+
+
+def resolve_episode_metadata(file_path, tvshow_tmdb_id, season_number, episode_number,
+                             tmdb_fetcher):
+    """Resolve episode metadata from its sidecar and TMDB, without the database"""
+    episode_metadata = sidecar.read_episode_sidecar(file_path)
+    if tvshow_tmdb_id and not sidecar.is_complete(
+            episode_metadata, sidecar.REQUIRED_EPISODE_FIELDS):
+        episode_metadata = sidecar.merge_metadata(
+            tmdb_fetcher.fetch_episode_metadata(
+                tvshow_tmdb_id, season_number, episode_number),
+            episode_metadata)
+    return episode_metadata
+
+
+def create_tvshow(tvshow_dir, title, metadata):
+    """Add a TV show row from resolved metadata (or a basic one without it)"""
+    if not metadata:
+        # If no metadata found, create a basic TV show entry
+        tvshow = TVShow(
+            title=title,
+            directory_path=tvshow_dir
+        )
+        db.session.add(tvshow)
+        return tvshow
+
+    tvshow = TVShow(
+        title=metadata.get('name', title),
+        original_title=metadata.get('original_name'),
+        tmdb_id=metadata.get('id'),
+        overview=metadata.get('overview'),
+        first_air_date=metadata.get('first_air_date'),
+        last_air_date=metadata.get('last_air_date'),
+        status=metadata.get('status'),
+        number_of_seasons=metadata.get('number_of_seasons'),
+        number_of_episodes=metadata.get('number_of_episodes'),
+        poster_path=metadata.get('poster_path'),
+        backdrop_path=metadata.get('backdrop_path'),
+        directory_path=tvshow_dir
+    )
+
+    # Handle genres
+    if 'genres' in metadata:
+        tvshow.genres = ','.join([genre['name']
+                                 for genre in metadata['genres']])
+
+    db.session.add(tvshow)
+
+    # Handle cast and creators
+    if 'credits' in metadata:
+        if 'cast' in metadata['credits']:
+            save_credits(metadata['credits']['cast'], tvshow=tvshow)
+
+        if 'crew' in metadata['credits']:
+            creators = [crew['name'] for crew in metadata['credits']
+                        ['crew'] if crew['job'] == 'Creator']
+            if creators:
+                tvshow.creators = ', '.join(creators)
+
+    return tvshow
+
 
+def save_episode(file_path, guess_data, tvshow_dir, tvshow_metadata, episode_metadata,
+                 technical, store=None):
+    """
+    Write a resolved episode (and its show, if new) in one transaction
 
-def process_episode(file_path, guess_data, directory, tmdb_fetcher):
-    """Process a TV show episode and update the database"""
-    # Get basic info from filename
+    Runs on the scan writer, which applies jobs in order, so the first
+    episode of a new show creates it and the following ones find it.
+    """
     title = guess_data.get('title')
     season_number = guess_data.get('season', 1)
     episode_number = guess_data.get('episode', 1)
 
-    # Find or create TV show
-    tvshow_dir = find_tvshow_directory(directory)
-    if not tvshow_dir:
-        return None
-
     tvshow = TVShow.query.filter_by(directory_path=tvshow_dir).first()
-
-    # If TV show doesn't exist, create it
-    if not tvshow and title:
-        # Fetch metadata from TMDB
-        metadata = tmdb_fetcher.fetch_tvshow_metadata(title)
-
-        if metadata:
-            tvshow = TVShow(
-                title=metadata.get('name', title),
-                original_title=metadata.get('original_name'),
-                tmdb_id=metadata.get('id'),
-                overview=metadata.get('overview'),
-                first_air_date=metadata.get('first_air_date'),
-                last_air_date=metadata.get('last_air_date'),
-                status=metadata.get('status'),
-                number_of_seasons=metadata.get('number_of_seasons'),
-                number_of_episodes=metadata.get('number_of_episodes'),
-                poster_path=metadata.get('poster_path'),
-                backdrop_path=metadata.get('backdrop_path'),
-                directory_path=tvshow_dir
-            )
-
-            # Handle genres
-            if 'genres' in metadata:
-                tvshow.genres = ','.join([genre['name']
-                                         for genre in metadata['genres']])
-
-            # Handle cast and creators
-            if 'credits' in metadata:
-                if 'cast' in metadata['credits']:
-                    tvshow.cast = json.dumps(metadata['credits']['cast'])
-
-                if 'crew' in metadata['credits']:
-                    creators = [crew['name'] for crew in metadata['credits']
-                                ['crew'] if crew['job'] == 'Creator']
-                    if creators:
-                        tvshow.creators = ', '.join(creators)
-
-            db.session.add(tvshow)
-            db.session.commit()
-        else:
-            # If no metadata found, create a basic TV show entry
-            tvshow = TVShow(
-                title=title,
-                directory_path=tvshow_dir
-            )
-            db.session.add(tvshow)
-            db.session.commit()
-
-    # If we still don't have a TV show record, we can't add the episode
+    created_tvshow = False
     if not tvshow:
-        return None
+        # If we don't have a TV show record, we can't add the episode
+        if not title:
+            return None
+        tvshow = create_tvshow(tvshow_dir, title, tvshow_metadata)
+        db.session.flush()
+        created_tvshow = True
 
-    # Check if episode already exists
-    existing_episode = Episode.query.filter_by(file_path=file_path).first()
+    # A show gets new episodes after being tombstoned
+    if tvshow.missing_since:
+        tvshow.missing_since = None
 
-    if existing_episode:
-        # If file hasn't changed, skip processing
-        if os.path.getmtime(file_path) <= existing_episode.last_updated.timestamp():
-            return existing_episode
-        episode = existing_episode
-    else:
+    # Check if episode already exists
+    episode = Episode.query.filter_by(file_path=file_path).first()
+    existing_episode = episode is not None
+    if not existing_episode:
         # Create new episode
         episode = Episode(
             tvshow_id=tvshow.id,
@@ -249,20 +694,14 @@ def process_episode(file_path, guess_data, directory, tmdb_fetcher):
 
     # Get file size and other properties
     episode.file_size = os.path.getsize(file_path)
-    episode.resolution = str(guess_data.get('screen_size', 'Unknown'))
-
-    # Try to fetch episode-specific metadata
-    if tvshow.tmdb_id:
-        episode_metadata = tmdb_fetcher.fetch_episode_metadata(
-            tvshow.tmdb_id, season_number, episode_number
-        )
+    apply_technical_metadata(episode, technical, guess_data)
 
-        if episode_metadata:
-            episode.title = episode_metadata.get(
-                'name', f"S{season_number:02d}E{episode_number:02d}")
-            episode.overview = episode_metadata.get('overview')
-            episode.air_date = episode_metadata.get('air_date')
-            episode.still_path = episode_metadata.get('still_path')
+    if episode_metadata:
+        episode.title = episode_metadata.get(
+            'name', f"S{season_number:02d}E{episode_number:02d}")
+        episode.overview = episode_metadata.get('overview')
+        episode.air_date = episode_metadata.get('air_date')
+        episode.still_path = episode_metadata.get('still_path')
 
     # If we still don't have an episode title, use a default format
     if not episode.title:
@@ -273,29 +712,109 @@ def process_episode(file_path, guess_data, directory, tmdb_fetcher):
         db.session.add(episode)
     db.session.commit()
 
-    return episode
+    if store is not None:
+        if created_tvshow:
+            cast = (tvshow_metadata or {}).get('credits', {}).get('cast')
+            store.record(tvshow, cast)
+        store.record(episode)
 
+    return episode.id
 
-def cleanup_database(found_movie_paths, found_episode_paths, found_tvshow_dirs):
-    """Remove database entries for files that no longer exist"""
-    # Remove movies that were not found
-    movies_to_delete = Movie.query.filter(
-        ~Movie.file_path.in_(found_movie_paths)).all()
-    for movie in movies_to_delete:
-        db.session.delete(movie)
 
-    # Remove episodes that were not found
-    episodes_to_delete = Episode.query.filter(
-        ~Episode.file_path.in_(found_episode_paths)).all()
-    for episode in episodes_to_delete:
-        db.session.delete(episode)
+def finish_scan(found_movie_paths, found_episode_paths, found_tvshow_dirs, scanned_roots):
+    """
+    Tombstone missing rows and publish the scan; runs on the scan writer
 
-    # Remove TV shows with no episodes and not found in directories
-    tvshows_to_check = TVShow.query.filter(
-        ~TVShow.directory_path.in_(found_tvshow_dirs)).all()
-    for tvshow in tvshows_to_check:
-        if tvshow.episodes.count() == 0:
-            db.session.delete(tvshow)
+    Returns:
+        Number of rows tombstoned
+    """
+    tombstoned = cleanup_database(found_movie_paths, found_episode_paths,
+                                  found_tvshow_dirs, scanned_roots)
+
+    # Invalidate cached pages together with the final commit of the scan
+    LibraryVersion.bump()
+    refresh_planner_statistics(db.session)
+    db.session.commit()
+    return tombstoned
+
+
+def cleanup_database(found_movie_paths, found_episode_paths, found_tvshow_dirs, scanned_roots):
+    """
+    Tombstone database entries for files that no longer exist
+
+    Only rows under roots that were reachable during this scan are touched,
+    so an unmounted share does not wipe its part of the library. Missing rows
+    are hidden rather than deleted; they come back as-is when the file
+    reappears, and purge_tombstones() deletes them after the grace period.
+
+    Returns:
+        Number of rows tombstoned
+    """
+    prefixes = tuple(root.rstrip(os.sep) + os.sep for root in scanned_roots)
+    if not prefixes:
+        return 0
+    tombstoned = 0
+
+    now = datetime.utcnow()
+
+    def under_scanned_roots(model, column):
+        return model.query.filter(model.missing_since.is_(None), db.or_(
+            *[column.startswith(prefix, autoescape=True) for prefix in prefixes]))
+
+    # Tombstone movies and episodes that were not found
+    for model, found_paths in ((Movie, found_movie_paths), (Episode, found_episode_paths)):
+        found = set(found_paths)
+        missing_ids = [
+            item_id for item_id, file_path in
+            under_scanned_roots(model, model.file_path).with_entities(
+                model.id, model.file_path)
+            if file_path not in found
+        ]
+        for chunk in chunked(missing_ids):
+            for item in model.query.filter(model.id.in_(chunk)):
+                item.missing_since = now
+                tombstoned += 1
+
+    db.session.flush()
+
+    # Tombstone TV shows with no available episodes and not found in directories
+    found_dirs = set(found_tvshow_dirs)
+    live_episodes = dict(db.session.query(Episode.tvshow_id, db.func.count(Episode.id)).filter(
+        Episode.missing_since.is_(None)).group_by(Episode.tvshow_id))
+    for tvshow in under_scanned_roots(TVShow, TVShow.directory_path):
+        if tvshow.directory_path not in found_dirs and not live_episodes.get(tvshow.id):
+            tvshow.missing_since = now
+            tombstoned += 1
+
+    return tombstoned
+
+
+def purge_tombstones(grace_period=None):
+    """
+    Delete rows that have been missing for longer than the grace period
+
+    Args:
+        grace_period: timedelta; defaults to MISSING_GRACE_PERIOD_DAYS
+
+    Returns:
+        Number of deleted rows
+    """
+    if grace_period is None:
+        grace_period = timedelta(
+            days=current_app.config['MISSING_GRACE_PERIOD_DAYS'])
+    cutoff = datetime.utcnow() - grace_period
+
+    purged = []
+    for model, kind in ((Episode, 'episode'), (Movie, 'movie'), (TVShow, 'tvshow')):
+        for item in model.query.filter(model.missing_since < cutoff):
+            purged.append((kind, item.directory_path if kind == 'tvshow' else item.file_path))
+            db.session.delete(item)
+    db.session.commit()
 
+    with open_store() as store:
+        for kind, key in purged:
+            store.forget(kind, key)
+    deleted = len(purged)
 
-Last edited 12 minutes ago
+    logger.info(f"Purged {deleted} tombstoned rows")
+    return deleted
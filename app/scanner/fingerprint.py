@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 12:40:03
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 12:40:03
+import os
+import hashlib
+
+# Bytes hashed at each end of the file
+FINGERPRINT_CHUNK = 64 * 1024
+
+
+def _read_at(fd, length, offset):
+    if hasattr(os, 'pread'):
+        return os.pread(fd, length, offset)
+    # Windows has no pread
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, length)
+
+
+def content_fingerprint(file_path, chunk_size=FINGERPRINT_CHUNK):
+    """
+    Return a cheap content fingerprint of a media file
+
+    The fingerprint is the file size plus a hash of the first and last
+    ``chunk_size`` bytes, so it survives moves and renames while reading at
+    most 128 KB regardless of the file size.
+
+    Returns:
+        String like "<size>:<hex digest>", or None if the file is unreadable
+    """
+    try:
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    except OSError:
+        return None
+
+    try:
+        size = os.fstat(fd).st_size
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(_read_at(fd, chunk_size, 0))
+        if size > chunk_size:
+            # The tail never overlaps the head chunk
+            digest.update(_read_at(fd, chunk_size, max(size - chunk_size, chunk_size)))
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+    return f"{size}:{digest.hexdigest()}"
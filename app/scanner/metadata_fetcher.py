@@ -3,14 +3,15 @@
 # @Date:   2025-02-26 20:15:51
 # @Last Modified by:   Zana Saedpanah
 # @Last Modified time: 2025-02-26 20:26:04
+import re
+import time
 import requests
 import logging
 import os
 from datetime import datetime
 from flask import current_app
+from app.metrics import TMDB_REQUEST_DURATION, TMDB_RESPONSES, scan_stage
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -20,9 +21,13 @@ class TMDBFetcher:
     BASE_URL = "https://api.themoviedb.org/3"
     POSTER_BASE_URL = "https://image.tmdb.org/t/p/w500"
     BACKDROP_BASE_URL = "https://image.tmdb.org/t/p/original"
+    PROFILE_BASE_URL = "https://image.tmdb.org/t/p/w185"
 
     def __init__(self, api_key):
         self.api_key = api_key
+        # Traffic counters, reported per scan in ScanRun
+        self.request_count = 0
+        self.bytes_downloaded = 0
 
     def _make_request(self, endpoint, params=None):
         """Make a request to the TMDb API"""
@@ -31,14 +36,25 @@ class TMDBFetcher:
 
         params['api_key'] = self.api_key
 
+        # Ids are folded out of the endpoint label
+        label = re.sub(r'\d+', '{id}', endpoint)
+        start = time.perf_counter()
         try:
-            response = requests.get(
-                f"{self.BASE_URL}{endpoint}", params=params)
+            with scan_stage('http'):
+                response = requests.get(
+                    f"{self.BASE_URL}{endpoint}", params=params)
+            self.request_count += 1
+            self.bytes_downloaded += len(response.content)
+            TMDB_RESPONSES.inc(response.status_code)
             response.raise_for_status()  # Raise exception for 4XX/5XX responses
             return response.json()
         except requests.exceptions.RequestException as e:
+            if getattr(e, 'response', None) is None:
+                TMDB_RESPONSES.inc('error')
             logger.error(f"Error making request to TMDb: {str(e)}")
             return None
+        finally:
+            TMDB_REQUEST_DURATION.observe(label, value=time.perf_counter() - start)
 
     def fetch_movie_metadata(self, query):
         """
@@ -67,7 +83,21 @@ class TMDBFetcher:
             return {}
 
         # Get the first result
-        movie_id = search_results['results'][0]['id']
+        return self.fetch_movie_details(search_results['results'][0]['id'])
+
+    def fetch_movie_details(self, movie_id):
+        """
+        Fetch metadata for a movie by its TMDb ID
+
+        Args:
+            movie_id: TMDb ID of the movie
+
+        Returns:
+            Dictionary of movie metadata or empty dict if not found
+        """
+        if not self.api_key:
+            logger.warning("No TMDb API key provided")
+            return {}
 
         # Fetch detailed movie info
         movie_details = self._make_request(
@@ -91,6 +121,8 @@ class TMDBFetcher:
             movie_details['backdrop_path'] = self.BACKDROP_BASE_URL + \
                 movie_details['backdrop_path']
 
+        self._process_cast(movie_details)
+
         # Parse dates
         if movie_details.get('release_date'):
             try:
@@ -129,7 +161,21 @@ class TMDBFetcher:
             return {}
 
         # Get the first result
-        tvshow_id = search_results['results'][0]['id']
+        return self.fetch_tvshow_details(search_results['results'][0]['id'])
+
+    def fetch_tvshow_details(self, tvshow_id):
+        """
+        Fetch metadata for a TV show by its TMDb ID
+
+        Args:
+            tvshow_id: TMDb ID of the TV show
+
+        Returns:
+            Dictionary of TV show metadata or empty dict if not found
+        """
+        if not self.api_key:
+            logger.warning("No TMDb API key provided")
+            return {}
 
         # Fetch detailed TV show info
         tvshow_details = self._make_request(
@@ -153,6 +199,8 @@ class TMDBFetcher:
             tvshow_details['backdrop_path'] = self.BACKDROP_BASE_URL + \
                 tvshow_details['backdrop_path']
 
+        self._process_cast(tvshow_details)
+
         # Parse dates
         for date_field in ['first_air_date', 'last_air_date']:
             if tvshow_details.get(date_field):
@@ -205,6 +253,13 @@ class TMDBFetcher:
 
         return episode_details
 
+    def _process_cast(self, details):
+        """Expand cast profile image paths to full URLs"""
+        for member in details.get('credits', {}).get('cast', []):
+            if member.get('profile_path'):
+                member['profile_path'] = self.PROFILE_BASE_URL + \
+                    member['profile_path']
+
     def _cache_image(self, image_url, filename):
         """Download and cache an image locally"""
         try:
@@ -219,12 +274,14 @@ class TMDBFetcher:
                 return
 
             # Download image
-            response = requests.get(image_url)
-            response.raise_for_status()
-
-            # Save to file
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            with scan_stage('image'):
+                response = requests.get(image_url)
+                response.raise_for_status()
+                self.bytes_downloaded += len(response.content)
+
+                # Save to file
+                with open(filepath, 'wb') as f:
+                    f.write(response.content)
 
             logger.debug(f"Cached image: {filename}")
 
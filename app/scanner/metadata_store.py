@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 15:10:42
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 15:10:42
+"""
+Append-only local store of the metadata the scanner resolved
+
+Every movie, TV show and episode the scanner writes is also appended as one
+compact JSON line: the normalized column values (TMDB metadata plus file
+information), the TMDB id and the billed cast. The last record per file
+path (directory path for shows) wins, so the database can be rebuilt from
+the store without a single TMDB request.
+"""
+import os
+import json
+import gzip
+import time
+import logging
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import insert
+from app import db
+from app.database import reset_sequences
+from app.models.movie import Movie
+from app.models.tvshow import TVShow, Episode
+from app.models.person import Person, Credit
+from app.models.library import LibraryVersion
+
+# Serializes appends from concurrent scan workers; without it (Windows)
+# only one process may write to a store at a time
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Record kind -> (model, key column)
+KINDS = {
+    'movie': (Movie, 'file_path'),
+    'tvshow': (TVShow, 'directory_path'),
+    'episode': (Episode, 'file_path'),
+}
+
+# Columns not stored: surrogate keys are reassigned on rebuild
+SKIPPED_COLUMNS = {'id', 'tvshow_id'}
+
+CAST_FIELDS = ('id', 'name', 'character', 'order', 'profile_path')
+
+READ_BATCH_SIZE = 1000
+# Records buffered before they are appended to the store file
+FLUSH_RECORDS = 256
+INSERT_BATCH_SIZE = 5000
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def row_snapshot(item):
+    """Return the stored column values of a Movie, TVShow or Episode"""
+    return {
+        column.key: getattr(item, column.key)
+        for column in type(item).__table__.columns
+        if column.key not in SKIPPED_COLUMNS
+    }
+
+
+def _restore_row(model, values):
+    """Convert stored JSON values back to column types"""
+    row = {}
+    columns = model.__table__.columns
+    for key, value in values.items():
+        if key not in columns or key in SKIPPED_COLUMNS:
+            continue
+        if value is not None:
+            python_type = columns[key].type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+        row[key] = value
+    return row
+
+
+class NullStore:
+    """Store used when METADATA_STORE_PATH is empty"""
+
+    def record(self, item, cast=None, previous_key=None):
+        pass
+
+    def forget(self, kind, key):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MetadataStore(NullStore):
+    """
+    Append-only NDJSON file of resolved library rows
+
+    Lines are only ever appended; a truncated last line (e.g. after a crash)
+    is ignored when reading. Records are buffered and appended in batches
+    under an exclusive lock, so several scan-worker processes can share one
+    store without interleaving. ``.gz`` paths get one complete gzip member
+    per batch.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._pending = []
+
+    def _write(self, record):
+        self._pending.append(json.dumps(record, separators=(',', ':'),
+                                        default=_json_default) + '\n')
+        if len(self._pending) >= FLUSH_RECORDS:
+            self.flush()
+
+    def flush(self):
+        """Append the buffered records in one locked write"""
+        if not self._pending:
+            return
+        data = ''.join(self._pending).encode('utf-8')
+        self._pending = []
+        if self.path.endswith('.gz'):
+            data = gzip.compress(data)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'ab') as f:
+            if fcntl is not None:
+                # Released when the file is closed
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(data)
+
+    def record(self, item, cast=None, previous_key=None):
+        """
+        Append the current state of a Movie, TVShow or Episode
+
+        Args:
+            item: Committed ORM object
+            cast: TMDB-shaped cast list, when the scanner resolved one
+            previous_key: Former file/directory path of a moved row
+        """
+        kind = {Movie: 'movie', TVShow: 'tvshow', Episode: 'episode'}[type(item)]
+        record = {
+            'kind': kind,
+            'key': getattr(item, KINDS[kind][1]),
+            'tmdb_id': getattr(item, 'tmdb_id', None),
+            'row': row_snapshot(item),
+        }
+        if previous_key is not None:
+            record['previous_key'] = previous_key
+        if kind == 'episode':
+            record['tvshow'] = item.tvshow.directory_path
+        if cast is not None:
+            record['cast'] = [
+                {field: member.get(field) for field in CAST_FIELDS}
+                for member in cast
+            ]
+        self._write(record)
+
+    def forget(self, kind, key):
+        """Append a deletion marker for a purged row"""
+        self._write({'kind': kind, 'key': key, 'deleted': True})
+
+    def close(self):
+        self.flush()
+
+    def read(self):
+        """
+        Load the latest record per row
+
+        Returns:
+            {kind: {key: record}} without deleted rows
+        """
+        latest = {kind: {} for kind in KINDS}
+        if not os.path.exists(self.path):
+            return latest
+
+        with _open(self.path, 'r') as f:
+            try:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping unreadable record in {self.path}")
+                        continue
+                    rows = latest.get(record.get('kind'))
+                    if rows is None:
+                        continue
+                    if record.get('deleted'):
+                        rows.pop(record['key'], None)
+                        continue
+                    # A moved row replaces the record at its old path
+                    previous = rows.pop(record.get('previous_key'), None) \
+                        or rows.get(record['key'])
+                    if 'cast' not in record and previous and 'cast' in previous:
+                        # Rows re-recorded without a fresh lookup keep their cast
+                        record['cast'] = previous['cast']
+                    rows[record['key']] = record
+            except (EOFError, gzip.BadGzipFile):
+                logger.warning(f"Metadata store {self.path} is truncated")
+        return latest
+
+
+def open_store():
+    """Return the configured store (a NullStore when disabled)"""
+    path = current_app.config.get('METADATA_STORE_PATH')
+    return MetadataStore(path) if path else NullStore()
+
+
+def _cast_by_owner(owner_column):
+    """Load every billed cast of one kind in a single query"""
+    casts = {}
+    query = db.session.query(
+        owner_column, Person.tmdb_id, Person.name, Credit.character,
+        Credit.billing_order, Person.profile_path,
+    ).join(Person, Credit.person_id == Person.id).filter(
+        owner_column.isnot(None)).order_by(owner_column, Credit.billing_order)
+    for owner_id, tmdb_id, name, character, order, profile_path in query:
+        casts.setdefault(owner_id, []).append({
+            'id': tmdb_id, 'name': name, 'character': character,
+            'order': order, 'profile_path': profile_path,
+        })
+    return casts
+
+
+def snapshot_database(store):
+    """Append every current library row to a store (seeds or compacts it)"""
+    count = 0
+    movie_casts = _cast_by_owner(Credit.movie_id)
+    for movie in Movie.query.order_by(Movie.id).yield_per(READ_BATCH_SIZE):
+        store.record(movie, movie_casts.get(movie.id, []))
+        count += 1
+
+    # Shows stay referenced so episodes resolve them from the identity map;
+    # there are far fewer of them than episodes
+    tvshows = []
+    tvshow_casts = _cast_by_owner(Credit.tvshow_id)
+    for tvshow in TVShow.query.order_by(TVShow.id).yield_per(READ_BATCH_SIZE):
+        store.record(tvshow, tvshow_casts.get(tvshow.id, []))
+        tvshows.append(tvshow)
+    count += len(tvshows)
+
+    for episode in Episode.query.order_by(Episode.id).yield_per(READ_BATCH_SIZE):
+        store.record(episode)
+        count += 1
+
+    return count
+
+
+def _insert_batches(model, rows):
+    """Bulk insert an iterable of row dicts in fixed-size batches"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            db.session.execute(insert(model), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(model), batch)
+
+
+def rebuild_database(store):
+    """
+    Replace the library tables with the contents of a metadata store
+
+    Only bulk inserts are used and nothing is fetched from TMDB. Primary
+    keys are assigned here, so episodes and credits are linked to their
+    parents without reading anything back.
+
+    Returns:
+        {kind: row count} of the rebuilt tables plus 'seconds'
+    """
+    started = time.perf_counter()
+    records = store.read()
+
+    for model in (Credit, Episode, TVShow, Movie, Person):
+        db.session.query(model).delete(synchronize_session=False)
+
+    people = {}
+    credits = []
+
+    def add_cast(cast, movie_id=None, tvshow_id=None):
+        seen = set()
+        for position, member in enumerate(cast or []):
+            if not member.get('name'):
+                continue
+            person_key = member.get('id') or member['name']
+            if person_key in seen:
+                continue
+            seen.add(person_key)
+            if person_key not in people:
+                people[person_key] = {
+                    'id': len(people) + 1,
+                    'tmdb_id': member.get('id'),
+                    'name': member['name'],
+                    'profile_path': member.get('profile_path'),
+                }
+            order = member.get('order')
+            credits.append({
+                'person_id': people[person_key]['id'],
+                'movie_id': movie_id,
+                'tvshow_id': tvshow_id,
+                'character': (member.get('character') or '')[:255] or None,
+                'billing_order': order if order is not None else position,
+            })
+
+    movies = []
+    for movie_id, record in enumerate(records['movie'].values(), 1):
+        movies.append(dict(_restore_row(Movie, record['row']), id=movie_id))
+        add_cast(record.get('cast'), movie_id=movie_id)
+
+    tvshows = []
+    tvshow_ids = {}
+    used_tmdb_ids = set()
+    for tvshow_id, (key, record) in enumerate(records['tvshow'].items(), 1):
+        row = dict(_restore_row(TVShow, record['row']), id=tvshow_id)
+        # tmdb_id is unique for shows; a stale duplicate keeps its row only
+        if row.get('tmdb_id') in used_tmdb_ids:
+            row['tmdb_id'] = None
+        elif row.get('tmdb_id') is not None:
+            used_tmdb_ids.add(row['tmdb_id'])
+        tvshows.append(row)
+        tvshow_ids[key] = tvshow_id
+        add_cast(record.get('cast'), tvshow_id=tvshow_id)
+
+    episodes = []
+    seen_episodes = set()
+    for record in records['episode'].values():
+        tvshow_id = tvshow_ids.get(record.get('tvshow'))
+        if tvshow_id is None:
+            continue
+        row = dict(_restore_row(Episode, record['row']), tvshow_id=tvshow_id)
+        episode_key = (tvshow_id, row.get('season_number'), row.get('episode_number'))
+        if episode_key in seen_episodes:
+            continue
+        seen_episodes.add(episode_key)
+        episodes.append(row)
+
+    _insert_batches(Movie, movies)
+    _insert_batches(TVShow, tvshows)
+    _insert_batches(Episode, episodes)
+    _insert_batches(Person, people.values())
+    _insert_batches(Credit, credits)
+    # Rows were inserted with explicit ids; the scanner's next insert must
+    # not be handed one of them
+    reset_sequences(db.session, (Movie, TVShow, Episode, Person, Credit))
+
+    # Aggregates are not maintained for bulk inserts; recompute them once
+    from app.scanner.stats import rebuild_library_stats
+    LibraryVersion.bump()
+    rebuild_library_stats()
+
+    return {
+        'movie': len(movies),
+        'tvshow': len(tvshows),
+        'episode': len(episodes),
+        'person': len(people),
+        'credit': len(credits),
+        'seconds': time.perf_counter() - started,
+    }
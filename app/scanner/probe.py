@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 11:52:17
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 11:52:17
+"""
+Pure-Python probe of container headers
+
+Only the header regions of a file are memory-mapped: the start of the
+segment for Matroska/WebM (EBML) and the ``moov`` box for MP4/MOV. The
+total number of bytes mapped per file is bounded by ``max_bytes``, so
+probing a 40 GB remux costs the same as probing a 200 MB episode.
+"""
+import os
+import mmap
+import struct
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default upper bound of bytes mapped per file
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+# Matroska element IDs
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+SEEK_HEAD = 0x114D9B74
+SEEK = 0x4DBB
+SEEK_ID = 0x53AB
+SEEK_POSITION = 0x53AC
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+LANGUAGE = 0x22B59C
+LANGUAGE_IETF = 0x22B59D
+VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+CLUSTER = 0x1F43B675
+
+MKV_TRACK_TYPES = {1: 'video', 2: 'audio', 17: 'subtitle'}
+
+MKV_CODECS = {
+    'V_MPEG4/ISO/AVC': 'h264',
+    'V_MPEGH/ISO/HEVC': 'hevc',
+    'V_AV1': 'av1',
+    'V_VP9': 'vp9',
+    'V_VP8': 'vp8',
+    'V_MPEG2': 'mpeg2',
+    'V_MPEG4/ISO/ASP': 'mpeg4',
+    'V_MS/VFW/FOURCC': 'vfw',
+    'A_AAC': 'aac',
+    'A_AC3': 'ac3',
+    'A_EAC3': 'eac3',
+    'A_DTS': 'dts',
+    'A_TRUEHD': 'truehd',
+    'A_OPUS': 'opus',
+    'A_FLAC': 'flac',
+    'A_VORBIS': 'vorbis',
+    'A_MPEG/L3': 'mp3',
+    'A_MPEG/L2': 'mp2',
+    'A_PCM/INT/LIT': 'pcm',
+}
+
+MP4_HANDLERS = {b'vide': 'video', b'soun': 'audio',
+                b'subt': 'subtitle', b'text': 'subtitle', b'sbtl': 'subtitle'}
+
+MP4_CODECS = {
+    b'avc1': 'h264', b'avc3': 'h264',
+    b'hvc1': 'hevc', b'hev1': 'hevc',
+    b'av01': 'av1', b'vp09': 'vp9', b'mp4v': 'mpeg4',
+    b'mp4a': 'aac', b'ac-3': 'ac3', b'ec-3': 'eac3',
+    b'Opus': 'opus', b'fLaC': 'flac', b'.mp3': 'mp3',
+    b'tx3g': 'mov_text', b'wvtt': 'webvtt',
+}
+
+MP4_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+
+class _Budget:
+    """Tracks how many bytes may still be mapped for one file"""
+
+    def __init__(self, max_bytes):
+        self.remaining = max_bytes
+
+    def take(self, length):
+        length = min(length, self.remaining)
+        self.remaining -= length
+        return length
+
+
+def _map_region(f, file_size, offset, length, budget):
+    """Memory-map ``length`` bytes at ``offset``; returns (buffer, offset) or (None, 0)"""
+    if offset >= file_size:
+        return None, 0
+
+    # mmap offsets must be aligned to the allocation granularity
+    aligned = offset - offset % mmap.ALLOCATIONGRANULARITY
+    length = budget.take(min(length, file_size - offset) + offset - aligned)
+    if length <= offset - aligned:
+        return None, 0
+
+    region = mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ, offset=aligned)
+    return memoryview(region)[offset - aligned:], offset
+
+
+def _empty_result():
+    return {
+        'width': None,
+        'height': None,
+        'duration': None,
+        'video_codec': None,
+        'audio_codec': None,
+        'audio_languages': [],
+        'subtitle_languages': [],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Matroska / WebM
+# ---------------------------------------------------------------------------
+
+def _read_vint(buf, pos, keep_marker=False):
+    """Read an EBML variable-length integer; returns (value, new_pos, unknown)"""
+    first = buf[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or pos + length > len(buf):
+        raise ValueError('Invalid EBML variable-length integer')
+
+    value = first if keep_marker else first & (mask - 1)
+    for byte in buf[pos + 1:pos + length]:
+        value = (value << 8) | byte
+
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, pos + length, unknown
+
+
+def _ebml_elements(buf, start, end):
+    """Yield (element_id, data_start, data_end) for children in buf[start:end]"""
+    pos = start
+    while pos < end:
+        try:
+            element_id, pos, _ = _read_vint(buf, pos, keep_marker=True)
+            size, pos, unknown = _read_vint(buf, pos)
+        except (ValueError, IndexError):
+            return
+        data_end = end if unknown else min(pos + size, end)
+        yield element_id, pos, data_end
+        if unknown:
+            return
+        pos = data_end
+
+
+def _ebml_uint(buf, start, end):
+    return int.from_bytes(buf[start:end], 'big')
+
+
+def _ebml_float(buf, start, end):
+    if end - start == 4:
+        return struct.unpack('>f', buf[start:end])[0]
+    if end - start == 8:
+        return struct.unpack('>d', buf[start:end])[0]
+    return None
+
+
+def _ebml_string(buf, start, end):
+    return bytes(buf[start:end]).split(b'\0', 1)[0].decode('utf-8', 'replace')
+
+
+def _parse_mkv_info(buf, start, end, result):
+    scale = 1000000
+    duration = None
+    for element_id, data_start, data_end in _ebml_elements(buf, start, end):
+        if element_id == TIMECODE_SCALE:
+            scale = _ebml_uint(buf, data_start, data_end)
+        elif element_id == DURATION:
+            duration = _ebml_float(buf, data_start, data_end)
+    if duration:
+        result['duration'] = int(round(duration * scale / 1e9))
+
+
+def _parse_mkv_tracks(buf, start, end, result):
+    for element_id, entry_start, entry_end in _ebml_elements(buf, start, end):
+        if element_id != TRACK_ENTRY:
+            continue
+
+        track = {'language': 'eng'}  # Matroska default language
+        for child_id, data_start, data_end in _ebml_elements(buf, entry_start, entry_end):
+            if child_id == TRACK_TYPE:
+                track['type'] = MKV_TRACK_TYPES.get(_ebml_uint(buf, data_start, data_end))
+            elif child_id == CODEC_ID:
+                codec = _ebml_string(buf, data_start, data_end)
+                track['codec'] = MKV_CODECS.get(codec) or MKV_CODECS.get(
+                    codec.split('/')[0]) or codec.lower()
+            elif child_id == LANGUAGE:
+                track['language'] = _ebml_string(buf, data_start, data_end)
+            elif child_id == LANGUAGE_IETF:
+                track['ietf'] = _ebml_string(buf, data_start, data_end)
+            elif child_id == VIDEO:
+                for video_id, v_start, v_end in _ebml_elements(buf, data_start, data_end):
+                    if video_id == PIXEL_WIDTH:
+                        track['width'] = _ebml_uint(buf, v_start, v_end)
+                    elif video_id == PIXEL_HEIGHT:
+                        track['height'] = _ebml_uint(buf, v_start, v_end)
+
+        _add_track(result, track.get('type'), track.get('codec'),
+                   track.get('ietf') or track['language'],
+                   track.get('width'), track.get('height'))
+
+
+def _probe_mkv(f, file_size, budget, head_bytes):
+    result = _empty_result()
+    buf, _ = _map_region(f, file_size, 0, head_bytes, budget)
+    if buf is None:
+        return None
+
+    # EBML header, then the Segment
+    elements = _ebml_elements(buf, 0, len(buf))
+    first = next(elements, None)
+    if first is None or first[0] != EBML_HEADER:
+        return None
+    segment = next(elements, None)
+    if segment is None or segment[0] != SEGMENT:
+        return None
+    segment_start = segment[1]
+
+    found = set()
+    seek_positions = {}
+    for element_id, data_start, data_end in _ebml_elements(buf, segment_start, segment[2]):
+        if element_id == CLUSTER:
+            break
+        if element_id == SEEK_HEAD:
+            for seek_id, s_start, s_end in _ebml_elements(buf, data_start, data_end):
+                if seek_id != SEEK:
+                    continue
+                target = position = None
+                for child_id, c_start, c_end in _ebml_elements(buf, s_start, s_end):
+                    if child_id == SEEK_ID:
+                        target = _ebml_uint(buf, c_start, c_end)
+                    elif child_id == SEEK_POSITION:
+                        position = _ebml_uint(buf, c_start, c_end)
+                if target in (INFO, TRACKS) and position is not None:
+                    seek_positions[target] = segment_start + position
+        elif element_id in (INFO, TRACKS):
+            if element_id == INFO:
+                _parse_mkv_info(buf, data_start, data_end, result)
+            else:
+                _parse_mkv_tracks(buf, data_start, data_end, result)
+            # An element cut off by the head window is re-read via the SeekHead
+            if data_end < len(buf):
+                found.add(element_id)
+
+    # Elements stored after the clusters are reached through the SeekHead
+    for target, position in seek_positions.items():
+        if target in found or budget.remaining <= 0:
+            continue
+        region, _ = _map_region(f, file_size, position, budget.remaining, budget)
+        if region is None:
+            continue
+        for element_id, data_start, data_end in _ebml_elements(region, 0, len(region)):
+            if element_id == INFO:
+                _parse_mkv_info(region, data_start, data_end, result)
+            elif element_id == TRACKS:
+                _parse_mkv_tracks(region, data_start, data_end, result)
+            break
+
+    return result
+
+
+# ---------------------------------------------------------------------------
+# MP4 / MOV
+# ---------------------------------------------------------------------------
+
+def _box_header(data, pos, end):
+    """Return (box_type, payload_start, box_end) or None"""
+    if pos + 8 > end:
+        return None
+    size, box_type = struct.unpack('>I4s', data[pos:pos + 8])
+    header = 8
+    if size == 1:
+        if pos + 16 > end:
+            return None
+        size = struct.unpack('>Q', data[pos + 8:pos + 16])[0]
+        header = 16
+    elif size == 0:
+        size = end - pos
+    if size < header:
+        return None
+    return bytes(box_type), pos + header, pos + size
+
+
+def _mp4_boxes(buf, start, end):
+    pos = start
+    while True:
+        box = _box_header(buf, pos, end)
+        if box is None:
+            return
+        yield box[0], box[1], min(box[2], end)
+        pos = box[2]
+
+
+def _find_moov(f, file_size):
+    """Walk top-level box headers (16 bytes each) to locate moov"""
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        header = f.read(16)
+        box = _box_header(header, 0, len(header))
+        if box is None:
+            return None
+        box_type, payload_start, box_end = box
+        if box_type == b'moov':
+            return pos + payload_start, pos + box_end
+        if box_end <= 0:
+            return None
+        pos += box_end
+    return None
+
+
+def _parse_mp4_trak(buf, start, end, result):
+    track = {}
+
+    def walk(box_start, box_end):
+        for box_type, payload, box_stop in _mp4_boxes(buf, box_start, box_end):
+            if box_type in MP4_CONTAINERS:
+                walk(payload, box_stop)
+            elif box_type == b'tkhd' and box_stop - payload >= 84:
+                version = buf[payload]
+                offset = payload + (76 if version == 0 else 88)
+                if offset + 8 <= box_stop:
+                    width, height = struct.unpack('>II', buf[offset:offset + 8])
+                    track['width'], track['height'] = width >> 16, height >> 16
+            elif box_type == b'mdhd':
+                version = buf[payload]
+                offset = payload + (20 if version == 0 else 32)
+                if offset + 2 <= box_stop:
+                    packed = struct.unpack('>H', buf[offset:offset + 2])[0]
+                    track['language'] = ''.join(
+                        chr(((packed >> shift) & 0x1F) + 0x60) for shift in (10, 5, 0))
+            elif box_type == b'hdlr' and payload + 12 <= box_stop:
+                track['type'] = MP4_HANDLERS.get(bytes(buf[payload + 8:payload + 12]))
+            elif box_type == b'stsd' and payload + 16 <= box_stop:
+                fourcc = bytes(buf[payload + 12:payload + 16])
+                track['codec'] = MP4_CODECS.get(
+                    fourcc, fourcc.decode('latin-1').strip().lower())
+
+    walk(start, end)
+    language = track.get('language')
+    if language and not language.isalpha():
+        language = None
+    _add_track(result, track.get('type'), track.get('codec'), language,
+               track.get('width'), track.get('height'))
+
+
+def _probe_mp4(f, file_size, budget):
+    result = _empty_result()
+    moov = _find_moov(f, file_size)
+    if moov is None:
+        return None
+
+    moov_start, moov_end = moov
+    buf, _ = _map_region(f, file_size, moov_start, moov_end - moov_start, budget)
+    if buf is None:
+        return None
+
+    for box_type, payload, box_end in _mp4_boxes(buf, 0, len(buf)):
+        if box_type == b'mvhd' and box_end - payload >= 20:
+            version = buf[payload]
+            if version == 1 and box_end - payload >= 32:
+                timescale, duration = struct.unpack('>IQ', buf[payload + 20:payload + 32])
+            else:
+                timescale, duration = struct.unpack('>II', buf[payload + 12:payload + 20])
+            if timescale:
+                result['duration'] = int(round(duration / timescale))
+        elif box_type == b'trak':
+            _parse_mp4_trak(buf, payload, box_end, result)
+
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def _add_track(result, track_type, codec, language, width=None, height=None):
+    if language == 'und':
+        language = None
+    if track_type == 'video':
+        if result['video_codec'] is None:
+            result['video_codec'] = codec
+            result['width'] = width or None
+            result['height'] = height or None
+    elif track_type == 'audio':
+        if result['audio_codec'] is None:
+            result['audio_codec'] = codec
+        if language and language not in result['audio_languages']:
+            result['audio_languages'].append(language)
+    elif track_type == 'subtitle':
+        if language and language not in result['subtitle_languages']:
+            result['subtitle_languages'].append(language)
+
+
+def resolution_label(width, height):
+    """Return a resolution label such as '1080p' from pixel dimensions"""
+    if not width or not height:
+        return None
+    # Width catches letterboxed scope encodes (e.g. 1920x800)
+    if width >= 3200 or height >= 2000:
+        return '2160p'
+    if width >= 1800 or height >= 1000:
+        return '1080p'
+    if width >= 1200 or height >= 700:
+        return '720p'
+    if height >= 560:
+        return '576p'
+    return '480p'
+
+
+def probe_file(file_path, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Read technical metadata from a media file header
+
+    Args:
+        file_path: Path to an MKV/WebM or MP4/MOV/M4V file
+        max_bytes: Upper bound of bytes mapped from the file
+
+    Returns:
+        Dictionary with width, height, duration (seconds), video_codec,
+        audio_codec, audio_languages and subtitle_languages, or an empty
+        dict when the container is unsupported or unreadable
+    """
+    budget = _Budget(max_bytes)
+    try:
+        with open(file_path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            magic = f.read(8)
+            if magic[:4] == b'\x1a\x45\xdf\xa3':
+                result = _probe_mkv(f, file_size, budget, min(max_bytes, 1024 * 1024))
+            elif magic[4:8] in (b'ftyp', b'moov', b'free', b'mdat', b'wide', b'skip'):
+                result = _probe_mp4(f, file_size, budget)
+            else:
+                return {}
+    except (OSError, ValueError, struct.error, IndexError) as e:
+        logger.debug(f"Could not probe {file_path}: {str(e)}")
+        return {}
+
+    return result or {}
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 19:31:40
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 19:31:40
+"""
+Per-scan profiling reports persisted in the ScanRun table
+
+A ScanProfile collects the counters of one scan and the wall and CPU time
+of every scanner stage (walk, probe, parse, http, image, db), so a slow
+scan can be pinned on the NAS, guessit, the database or TMDb. cProfile
+(scanning thread only) and tracemalloc (every thread) reports are captured
+on request through SCAN_PROFILE or the ``profile`` argument.
+"""
+import io
+import json
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from datetime import datetime
+from app import db
+from app.metrics import observe_scan_stages
+from app.models.scan import ScanRun
+
+PROFILE_TOP_FUNCTIONS = 40
+MEMORY_TOP_LINES = 25
+
+
+def parse_profile_flags(value):
+    """Return (cpu, memory) from a 'cpu,memory' style flag string"""
+    flags = {flag.strip().lower() for flag in (value or '').split(',') if flag.strip()}
+    return 'cpu' in flags, 'memory' in flags
+
+
+class ScanProfile:
+    """Counters, stage timings and optional profiler reports of one scan"""
+
+    COUNTERS = ('files_walked', 'files_skipped', 'new_count', 'updated_count',
+                'deleted_count', 'tmdb_calls', 'bytes_downloaded')
+
+    def __init__(self, cpu=False, memory=False):
+        self.cpu = cpu
+        self.memory = memory
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.stages = {}
+        self.cpu_report = None
+        self.memory_report = None
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._observing = None
+
+    def add(self, counter, amount=1):
+        with self._lock:
+            self.counts[counter] += amount
+
+    def add_stage(self, stage, wall, cpu):
+        with self._lock:
+            timings = self.stages.setdefault(stage, {'wall': 0.0, 'cpu': 0.0, 'count': 0})
+            timings['wall'] += wall
+            timings['cpu'] += cpu
+            timings['count'] += 1
+
+    def __enter__(self):
+        self._observing = observe_scan_stages(self.add_stage)
+        self._observing.__enter__()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        else:
+            self.memory = False
+        if self.cpu:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profiler is not None:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats(
+                'cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+            self.cpu_report = out.getvalue()
+            self._profiler = None
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = [f"Current {current / 1024 ** 2:.1f} MiB, peak {peak / 1024 ** 2:.1f} MiB"]
+            lines.extend(str(stat) for stat in
+                         snapshot.statistics('lineno')[:MEMORY_TOP_LINES])
+            self.memory_report = '\n'.join(lines)
+        self._observing.__exit__(exc_type, exc, tb)
+        return False
+
+    def values(self):
+        """Column values for the ScanRun row"""
+        with self._lock:
+            values = dict(self.counts)
+            values['stages'] = json.dumps(self.stages)
+        values['cpu_profile'] = self.cpu_report
+        values['memory_profile'] = self.memory_report
+        return values
+
+
+def start_scan_run(directories):
+    """Insert a running ScanRun row; runs on the scan writer"""
+    run = ScanRun(roots=json.dumps(list(directories)))
+    db.session.add(run)
+    db.session.commit()
+    return run.id
+
+
+def finish_scan_run(run_id, values, error=None):
+    """Store the final counters of a ScanRun; runs on the scan writer"""
+    run = db.session.get(ScanRun, run_id)
+    if run is None:
+        return
+    for column, value in values.items():
+        setattr(run, column, value)
+    run.status = 'failed' if error else 'done'
+    run.error = error
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
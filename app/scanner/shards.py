@@ -0,0 +1,393 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 18:40:57
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 18:40:57
+"""
+Sharded scanning coordinated through the ScanGeneration/ScanShard tables
+
+A scan generation splits every reachable media root into shards: the files
+directly inside the root, and one shard per top-level subdirectory. Any
+number of worker processes, on any host sharing the database, claim shards
+under a lease, keep it alive with heartbeats and run the regular scanner
+processing on them. A worker that dies simply lets its lease expire and the
+shard is claimed again. The worker completing the last shard runs the
+generation's cleanup, once, over the paths found by every shard.
+"""
+import os
+import json
+import socket
+import logging
+import threading
+from uuid import uuid4
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.database import create_writer_engine
+from app.metrics import scan_stage
+from app.models.movie import Movie
+from app.models.scan import ScanGeneration, ScanShard
+from app.models.tvshow import Episode
+from app.scanner.metadata_fetcher import TMDBFetcher
+from app.scanner.metadata_store import open_store
+from app.scanner.writer import get_scan_writer
+from app.scanner.file_scanner import (get_known_files, get_known_shows, is_root_available,
+                                      walk_media_files, relink_moved_files, chunked,
+                                      restore_reappeared_files, process_entries, finish_scan)
+
+logger = logging.getLogger(__name__)
+
+
+def _claimable(now):
+    return db.or_(ScanShard.status == 'pending', db.and_(
+        ScanShard.status == 'leased', ScanShard.lease_expires_at < now))
+
+
+def plan_scan(directories):
+    """
+    Create a scan generation and its shards (runs on the scan writer)
+
+    Returns:
+        Id of the new generation
+    """
+    known_files = get_known_files()
+    roots = []
+    shards = []
+    for directory in directories:
+        if not os.path.exists(directory):
+            logger.warning(f"Directory not found: {directory}")
+            continue
+        if not is_root_available(directory, known_files):
+            # Likely an unmounted share: leave its rows alone
+            logger.warning(
+                f"Directory is empty or unreadable, skipping cleanup: {directory}")
+            continue
+
+        roots.append(directory)
+        shards.append(ScanShard(root=directory, path=directory, recursive=False))
+        with os.scandir(directory) as it:
+            for entry in sorted(it, key=lambda e: e.name):
+                if entry.is_dir(follow_symlinks=False):
+                    shards.append(ScanShard(root=directory, path=entry.path, recursive=True))
+
+    generation = ScanGeneration(roots=json.dumps(roots))
+    db.session.add(generation)
+    db.session.flush()
+    for shard in shards:
+        shard.generation_id = generation.id
+    db.session.add_all(shards)
+    db.session.commit()
+
+    logger.info(f"Planned scan generation {generation.id} with {len(shards)} shards")
+    return generation.id
+
+
+def latest_generation_id():
+    """Id of the most recent generation that is still running, if any"""
+    return db.session.query(ScanGeneration.id).filter(
+        ScanGeneration.status == 'running').order_by(ScanGeneration.id.desc()).scalar()
+
+
+def claim_shard(generation_id, worker_id, lease_seconds, max_attempts):
+    """
+    Lease the next pending or expired shard of a generation
+
+    The conditional UPDATE is the lock: when two workers race for the same
+    shard only one of them changes a row.
+
+    Returns:
+        Dictionary describing the claimed shard, or None when none is left
+    """
+    now = datetime.utcnow()
+
+    # Shards whose workers keep dying are given up on
+    ScanShard.query.filter(
+        ScanShard.generation_id == generation_id, ScanShard.status == 'leased',
+        ScanShard.lease_expires_at < now, ScanShard.attempts >= max_attempts,
+    ).update({'status': 'failed', 'owner': None,
+              'error': 'Lease expired too many times'}, synchronize_session=False)
+    db.session.commit()
+
+    candidates = db.session.query(ScanShard.id).filter(
+        ScanShard.generation_id == generation_id, _claimable(now)).order_by(
+        ScanShard.id).limit(16).all()
+    for (shard_id,) in candidates:
+        claimed = ScanShard.query.filter(ScanShard.id == shard_id, _claimable(now)).update({
+            'status': 'leased',
+            'owner': worker_id,
+            'lease_expires_at': now + timedelta(seconds=lease_seconds),
+            'heartbeat_at': now,
+            'attempts': ScanShard.attempts + 1,
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            shard = db.session.get(ScanShard, shard_id)
+            return {'id': shard.id, 'root': shard.root, 'path': shard.path,
+                    'recursive': shard.recursive}
+    return None
+
+
+def renew_lease(shard_id, worker_id, lease_seconds, engine=None):
+    """
+    Extend a lease; returns False when the shard was taken over
+
+    With an engine the UPDATE runs on a connection of its own, so it never
+    waits behind the save jobs queued on the scan writer.
+    """
+    now = datetime.utcnow()
+    statement = ScanShard.__table__.update().where(
+        ScanShard.id == shard_id, ScanShard.owner == worker_id,
+        ScanShard.status == 'leased',
+    ).values(lease_expires_at=now + timedelta(seconds=lease_seconds), heartbeat_at=now)
+    if engine is None:
+        renewed = db.session.execute(statement).rowcount
+        db.session.commit()
+    else:
+        with engine.begin() as connection:
+            renewed = connection.execute(statement).rowcount
+    return bool(renewed)
+
+
+def complete_shard(shard_id, worker_id, found):
+    """Record the paths a shard found; ignored if the lease was lost"""
+    completed = ScanShard.query.filter(
+        ScanShard.id == shard_id, ScanShard.owner == worker_id,
+        ScanShard.status == 'leased',
+    ).update({'status': 'done', 'result': json.dumps(found),
+              'finished_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return bool(completed)
+
+
+def fail_shard(shard_id, worker_id, error, max_attempts):
+    """Release a shard after an error, or give up on it after max_attempts"""
+    ScanShard.query.filter(
+        ScanShard.id == shard_id, ScanShard.owner == worker_id,
+    ).update({
+        'status': db.case((ScanShard.attempts >= max_attempts, 'failed'), else_='pending'),
+        'owner': None,
+        'lease_expires_at': None,
+        'error': error[:2000],
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def finish_generation_if_complete(generation_id):
+    """
+    Run the generation's cleanup once every shard is finished
+
+    Returns:
+        True if this call finished the generation
+    """
+    unfinished = ScanShard.query.filter(
+        ScanShard.generation_id == generation_id,
+        ScanShard.status.in_(('pending', 'leased'))).count()
+    if unfinished:
+        return False
+
+    # Only one worker wins the transition to 'finishing'
+    won = ScanGeneration.query.filter(
+        ScanGeneration.id == generation_id, ScanGeneration.status == 'running',
+    ).update({'status': 'finishing'}, synchronize_session=False)
+    db.session.commit()
+    if not won:
+        return False
+
+    generation = db.session.get(ScanGeneration, generation_id)
+    found_movie_paths, found_episode_paths, found_tvshow_dirs = [], [], []
+    complete = True
+    cleanup_roots = []
+    for shard in generation.shards.order_by(ScanShard.id):
+        if shard.status != 'done':
+            complete = False
+            continue
+        movies, episodes, tvshow_dirs = json.loads(shard.result)
+        found_movie_paths.extend(movies)
+        found_episode_paths.extend(episodes)
+        found_tvshow_dirs.extend(tvshow_dirs)
+        if shard.recursive:
+            cleanup_roots.append(shard.path)
+
+    if complete:
+        cleanup_roots = json.loads(generation.roots)
+    else:
+        # Rows under failed shards were not seen; only clean finished subtrees
+        logger.warning(f"Scan generation {generation_id} has failed shards; "
+                       f"cleaning up finished subdirectories only")
+
+    finish_scan(found_movie_paths, found_episode_paths, found_tvshow_dirs, cleanup_roots)
+
+    generation = db.session.get(ScanGeneration, generation_id)
+    generation.status = 'done'
+    generation.finished_at = datetime.utcnow()
+    db.session.commit()
+
+    logger.info(f"Scan generation {generation_id} finished")
+    return True
+
+
+def paths_with_sizes(sizes):
+    """Fingerprinted movie and episode paths of the given file sizes"""
+    paths = []
+    for model in (Movie, Episode):
+        for chunk in chunked(sizes):
+            paths.extend(path for (path,) in db.session.query(model.file_path).filter(
+                model.fingerprint.isnot(None), model.file_size.in_(chunk)))
+    return paths
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def process_shard(shard, tmdb_fetcher, writer, store, lost=None):
+    """
+    Run the regular scanner processing on the files of one shard
+
+    Args:
+        lost: threading.Event set when the lease is lost; processing stops
+            and ShardLeaseLost is raised
+    """
+    video_extensions = current_app.config['VIDEO_EXTENSIONS']
+    path = shard['path']
+    with scan_stage('walk'):
+        entries = list(walk_media_files(path, video_extensions, recursive=shard['recursive']))
+
+    known_files = writer.call(get_known_files)
+    known_shows = writer.call(get_known_shows)
+
+    # Files move between shards and roots, so a row anywhere in the library
+    # whose file is gone from disk (tombstoned or not) can be the origin of
+    # a new file. Only rows with the size of a new file can match its
+    # fingerprint, so only those are checked on disk, not every known file
+    # once per shard.
+    found_paths = [os.path.join(root, filename) for root, filename in entries]
+    found = set(found_paths)
+    missing_paths = []
+    new_sizes = {_file_size(path) for path in found_paths if path not in known_files}
+    new_sizes.discard(None)
+    if new_sizes:
+        missing_paths = [file_path for file_path in writer.call(paths_with_sizes, new_sizes)
+                         if file_path not in found and not os.path.exists(file_path)]
+    fingerprints = writer.call(relink_moved_files, found_paths, known_files, store,
+                               missing_paths)
+    writer.call(restore_reappeared_files, found_paths)
+
+    found = process_entries(entries, known_files, known_shows, fingerprints,
+                            tmdb_fetcher, writer, store, cancelled=lost)
+    if lost is not None and lost.is_set():
+        raise ShardLeaseLost(f"Lost the lease of shard {shard['path']}")
+    return found
+
+
+class ShardLeaseLost(RuntimeError):
+    """Raised when another worker took over the shard being processed"""
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Renews a shard lease until stopped
+
+    Renewals go through ``engine`` when there is one; in-memory SQLite
+    databases have a single connection and share the scan writer's.
+    """
+
+    def __init__(self, engine, writer, shard_id, worker_id, lease_seconds, interval):
+        super().__init__(name=f'scan-heartbeat-{shard_id}', daemon=True)
+        self.engine = engine
+        self.writer = writer
+        self.shard_id = shard_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.interval = interval
+        self.lost = threading.Event()
+        self._stopped = threading.Event()
+
+    def renew(self):
+        if self.engine is not None:
+            return renew_lease(self.shard_id, self.worker_id, self.lease_seconds, self.engine)
+        return self.writer.call(renew_lease, self.shard_id, self.worker_id, self.lease_seconds)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                if not self.renew():
+                    self.lost.set()
+                    logger.warning(f"Lost the lease of shard {self.shard_id}")
+                    return
+            except Exception as e:
+                logger.error(f"Heartbeat of shard {self.shard_id} failed: {str(e)}")
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def run_scan_worker(generation_id=None, worker_id=None, max_shards=None):
+    """
+    Claim and process shards until the generation has none left
+
+    Args:
+        generation_id: Generation to work on (default: the latest running one)
+        worker_id: Lease owner name (default: host:pid:random)
+        max_shards: Stop after this many shards
+
+    Returns:
+        Number of shards this worker completed
+    """
+    config = current_app.config
+    writer = get_scan_writer()
+    if generation_id is None:
+        generation_id = writer.call(latest_generation_id)
+        if generation_id is None:
+            logger.info("No running scan generation")
+            return 0
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+    lease_seconds = config['SCAN_LEASE_SECONDS']
+    max_attempts = config['SCAN_SHARD_MAX_ATTEMPTS']
+    tmdb_fetcher = TMDBFetcher(config['TMDB_API_KEY'])
+    store = open_store()
+    lease_engine = create_writer_engine(config)
+
+    completed = 0
+    try:
+        while max_shards is None or completed < max_shards:
+            shard = writer.call(claim_shard, generation_id, worker_id,
+                                lease_seconds, max_attempts)
+            if shard is None:
+                break
+
+            logger.info(f"Worker {worker_id} scanning shard {shard['path']}")
+            heartbeat = _Heartbeat(lease_engine, writer, shard['id'], worker_id,
+                                   lease_seconds, config['SCAN_HEARTBEAT_SECONDS'])
+            heartbeat.start()
+            try:
+                found = process_shard(shard, tmdb_fetcher, writer, store, heartbeat.lost)
+            except ShardLeaseLost as e:
+                # The new owner scans it again; nothing to release here
+                heartbeat.stop()
+                logger.warning(f"{e}; stopped processing it")
+                continue
+            except Exception as e:
+                heartbeat.stop()
+                logger.error(f"Error scanning shard {shard['path']}: {str(e)}")
+                writer.call(fail_shard, shard['id'], worker_id, str(e), max_attempts)
+                continue
+
+            heartbeat.stop()
+            if writer.call(complete_shard, shard['id'], worker_id, found):
+                completed += 1
+            else:
+                logger.warning(f"Shard {shard['path']} was taken over; result dropped")
+    finally:
+        writer.call(store.close)
+        if lease_engine is not None:
+            lease_engine.dispose()
+
+    writer.call(finish_generation_if_complete, generation_id)
+    db.session.expire_all()
+    return completed
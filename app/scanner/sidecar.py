@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 14:02:55
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 14:02:55
+"""
+Kodi-style sidecar metadata (.nfo files and local artwork)
+
+NFO files are parsed with a streaming parser and mapped to the same
+dictionary shape TMDBFetcher returns, so the scanner's resolve functions can
+use either source, and TMDB is only asked for what the sidecars lack.
+"""
+import os
+import re
+import shutil
+import hashlib
+import logging
+from datetime import datetime
+from xml.etree.ElementTree import iterparse, ParseError
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Fields a sidecar must provide for TMDB to be skipped
+REQUIRED_MOVIE_FIELDS = ('title', 'overview', 'release_date', 'poster_path')
+REQUIRED_TVSHOW_FIELDS = ('name', 'overview', 'first_air_date', 'poster_path')
+REQUIRED_EPISODE_FIELDS = ('name', 'overview')
+
+ARTWORK_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+TMDB_URL_PATTERN = re.compile(r'themoviedb\.org/(?:movie|tv)/(\d+)')
+IMDB_ID_PATTERN = re.compile(r'\b(tt\d{7,})\b')
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.strip()[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+def _parse_int(value):
+    try:
+        return int(value.strip())
+    except (AttributeError, ValueError):
+        return None
+
+
+def _parse_nfo(nfo_path):
+    """
+    Stream an NFO file into a flat dictionary of its top-level tags
+
+    Repeated tags (genre, director, ...) become lists; <actor> and
+    <uniqueid> are collected into structured entries. URL-only NFOs, which
+    Kodi also accepts, yield just the ids found in them.
+    """
+    fields = {'genre': [], 'director': [], 'credits': [], 'actor': [], 'uniqueid': {}}
+    depth = 0
+    root_tag = None
+    try:
+        for event, element in iterparse(nfo_path, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if depth == 1:
+                    root_tag = element.tag
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+
+            tag = element.tag
+            text = (element.text or '').strip()
+            if tag == 'actor':
+                fields['actor'].append({
+                    'name': (element.findtext('name') or '').strip(),
+                    'character': (element.findtext('role') or '').strip() or None,
+                    'order': _parse_int(element.findtext('order')),
+                    'id': _parse_int(element.findtext('tmdbid')),
+                    'profile_path': (element.findtext('thumb') or '').strip() or None,
+                })
+            elif tag == 'uniqueid':
+                fields['uniqueid'][element.get('type', 'unknown').lower()] = text
+            elif tag in ('genre', 'director', 'credits'):
+                if text:
+                    fields[tag].append(text)
+            elif tag == 'thumb':
+                fields.setdefault('thumbs', []).append(
+                    (element.get('aspect', ''), text))
+            elif tag == 'fanart':
+                fanart = element.findtext('thumb')
+                if fanart:
+                    fields['fanart'] = fanart.strip()
+            else:
+                fields.setdefault(tag, text)
+
+            # Keep memory flat for large NFOs
+            element.clear()
+    except ParseError:
+        with open(nfo_path, encoding='utf-8', errors='replace') as f:
+            content = f.read(64 * 1024)
+        tmdb_match = TMDB_URL_PATTERN.search(content)
+        imdb_match = IMDB_ID_PATTERN.search(content)
+        if tmdb_match:
+            fields['uniqueid']['tmdb'] = tmdb_match.group(1)
+        if imdb_match:
+            fields['uniqueid']['imdb'] = imdb_match.group(1)
+    except OSError as e:
+        logger.warning(f"Could not read NFO {nfo_path}: {str(e)}")
+        return None
+
+    fields['root'] = root_tag
+    return fields
+
+
+def _remote_thumb(fields, aspect):
+    for thumb_aspect, url in fields.get('thumbs', []):
+        if thumb_aspect == aspect and url.startswith('http'):
+            return url
+    return None
+
+
+def _common_fields(fields):
+    """Map fields shared by movie and TV show NFOs"""
+    metadata = {}
+    uniqueid = fields['uniqueid']
+
+    tmdb_id = _parse_int(uniqueid.get('tmdb') or fields.get('tmdbid'))
+    if tmdb_id:
+        metadata['id'] = tmdb_id
+
+    imdb_id = uniqueid.get('imdb') or fields.get('imdbid')
+    if not imdb_id and IMDB_ID_PATTERN.match(fields.get('id', '')):
+        imdb_id = fields['id']
+    if imdb_id:
+        metadata['imdb_id'] = imdb_id
+
+    overview = fields.get('plot') or fields.get('outline')
+    if overview:
+        metadata['overview'] = overview
+
+    if fields['genre']:
+        genres = []
+        for value in fields['genre']:
+            genres.extend(g.strip() for g in value.split('/') if g.strip())
+        metadata['genres'] = [{'name': genre} for genre in genres]
+
+    cast = [
+        dict(actor, order=actor['order'] if actor['order'] is not None else position)
+        for position, actor in enumerate(fields['actor']) if actor['name']
+    ]
+    crew = [{'job': 'Director', 'name': name} for name in fields['director']]
+    crew.extend({'job': 'Creator', 'name': name} for name in fields['credits'])
+    if cast or crew:
+        metadata['credits'] = {'cast': cast, 'crew': crew}
+
+    return metadata
+
+
+def _find_file(directory, names):
+    """Return the first existing file among candidate names in a directory"""
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _artwork_candidates(prefixes, kinds):
+    return [f"{prefix}{kind}{extension}"
+            for prefix in prefixes for kind in kinds for extension in ARTWORK_EXTENSIONS]
+
+
+def publish_artwork(image_path):
+    """
+    Expose a local artwork file through the poster cache
+
+    The image is hard-linked (copied across filesystems) into
+    POSTER_CACHE_DIR under a name derived from its path, and the static URL
+    is returned. Returns None when the cache directory is not served
+    statically.
+    """
+    cache_dir = current_app.config.get('POSTER_CACHE_DIR')
+    static_folder = current_app.static_folder
+    if not cache_dir or not static_folder:
+        return None
+
+    relative_dir = os.path.relpath(cache_dir, static_folder)
+    if relative_dir.startswith('..'):
+        return None
+
+    extension = os.path.splitext(image_path)[1].lower()
+    name = 'local_' + hashlib.sha1(image_path.encode('utf-8')).hexdigest() + extension
+    target = os.path.join(cache_dir, name)
+
+    try:
+        source_stat = os.stat(image_path)
+        if not os.path.exists(target) or os.path.getmtime(target) < source_stat.st_mtime:
+            if os.path.exists(target):
+                os.remove(target)
+            try:
+                os.link(image_path, target)
+            except OSError:
+                shutil.copyfile(image_path, target)
+    except OSError as e:
+        logger.warning(f"Could not publish artwork {image_path}: {str(e)}")
+        return None
+
+    return f"{current_app.static_url_path}/{relative_dir.replace(os.sep, '/')}/{name}"
+
+
+def read_movie_sidecar(file_path):
+    """
+    Read movie metadata from <name>.nfo or movie.nfo and local artwork
+
+    Returns:
+        Dictionary shaped like TMDBFetcher.fetch_movie_metadata (possibly
+        empty or partial)
+    """
+    directory = os.path.dirname(file_path)
+    base = os.path.splitext(os.path.basename(file_path))[0]
+    metadata = {}
+
+    nfo_path = _find_file(directory, [f"{base}.nfo", 'movie.nfo'])
+    fields = _parse_nfo(nfo_path) if nfo_path else None
+    if fields:
+        metadata.update(_common_fields(fields))
+        if fields.get('title'):
+            metadata['title'] = fields['title']
+        if fields.get('originaltitle'):
+            metadata['original_title'] = fields['originaltitle']
+        runtime = _parse_int(fields.get('runtime'))
+        if runtime:
+            metadata['runtime'] = runtime
+        release_date = _parse_date(fields.get('premiered') or fields.get('releasedate'))
+        if release_date:
+            metadata['release_date'] = release_date
+        elif _parse_int(fields.get('year')):
+            metadata['release_date'] = datetime(_parse_int(fields['year']), 1, 1).date()
+        if _remote_thumb(fields, 'poster'):
+            metadata['poster_path'] = _remote_thumb(fields, 'poster')
+        if fields.get('fanart'):
+            metadata['backdrop_path'] = fields['fanart']
+
+    # Local artwork wins over URLs written in the NFO
+    poster = _find_file(directory, _artwork_candidates(
+        [f"{base}-", ''], ['poster', 'folder', 'cover']))
+    if poster:
+        metadata['poster_path'] = publish_artwork(poster) or metadata.get('poster_path')
+    fanart = _find_file(directory, _artwork_candidates([f"{base}-", ''], ['fanart', 'backdrop']))
+    if fanart:
+        metadata['backdrop_path'] = publish_artwork(fanart) or metadata.get('backdrop_path')
+
+    return {key: value for key, value in metadata.items() if value}
+
+
+def read_tvshow_sidecar(directories):
+    """
+    Read TV show metadata from tvshow.nfo and local artwork
+
+    Args:
+        directories: Candidate show directories, closest to the episode first
+
+    Returns:
+        Dictionary shaped like TMDBFetcher.fetch_tvshow_metadata
+    """
+    metadata = {}
+    for directory in directories:
+        nfo_path = _find_file(directory, ['tvshow.nfo'])
+        if not nfo_path:
+            continue
+
+        fields = _parse_nfo(nfo_path)
+        if fields:
+            metadata.update(_common_fields(fields))
+            if fields.get('title'):
+                metadata['name'] = fields['title']
+            if fields.get('originaltitle'):
+                metadata['original_name'] = fields['originaltitle']
+            if fields.get('status'):
+                metadata['status'] = fields['status']
+            first_air_date = _parse_date(fields.get('premiered'))
+            if first_air_date:
+                metadata['first_air_date'] = first_air_date
+            if _remote_thumb(fields, 'poster'):
+                metadata['poster_path'] = _remote_thumb(fields, 'poster')
+            if fields.get('fanart'):
+                metadata['backdrop_path'] = fields['fanart']
+
+        poster = _find_file(directory, _artwork_candidates([''], ['poster', 'folder']))
+        if poster:
+            metadata['poster_path'] = publish_artwork(poster) or metadata.get('poster_path')
+        fanart = _find_file(directory, _artwork_candidates([''], ['fanart']))
+        if fanart:
+            metadata['backdrop_path'] = publish_artwork(fanart) or metadata.get('backdrop_path')
+        break
+
+    return {key: value for key, value in metadata.items() if value}
+
+
+def read_episode_sidecar(file_path):
+    """Read episode metadata from <name>.nfo and <name>-thumb.jpg"""
+    directory = os.path.dirname(file_path)
+    base = os.path.splitext(os.path.basename(file_path))[0]
+    metadata = {}
+
+    nfo_path = _find_file(directory, [f"{base}.nfo"])
+    fields = _parse_nfo(nfo_path) if nfo_path else None
+    if fields:
+        if fields.get('title'):
+            metadata['name'] = fields['title']
+        if fields.get('plot'):
+            metadata['overview'] = fields['plot']
+        air_date = _parse_date(fields.get('aired'))
+        if air_date:
+            metadata['air_date'] = air_date
+        thumbs = [url for _, url in fields.get('thumbs', []) if url.startswith('http')]
+        if thumbs:
+            metadata['still_path'] = thumbs[0]
+
+    thumb = _find_file(directory, _artwork_candidates([f"{base}-"], ['thumb']))
+    if thumb:
+        metadata['still_path'] = publish_artwork(thumb) or metadata.get('still_path')
+
+    return {key: value for key, value in metadata.items() if value}
+
+
+def is_complete(metadata, required_fields):
+    """Check whether sidecar metadata covers every required field"""
+    return all(metadata.get(field) for field in required_fields)
+
+
+def merge_metadata(remote, local):
+    """Overlay sidecar values on top of TMDB metadata"""
+    merged = dict(remote or {})
+    merged.update(local)
+    return merged
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 10:36:08
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 10:36:08
+from collections import Counter
+from sqlalchemy import event, inspect, insert
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.database import refresh_planner_statistics, dialect_insert
+from app.models.movie import Movie
+from app.models.tvshow import TVShow, Episode
+from app.models.library import LibraryStat
+
+# Columns that feed the aggregates, per model
+TRACKED_FIELDS = {
+    Movie: ('file_size', 'resolution', 'genres', 'release_date'),
+    TVShow: ('genres', 'first_air_date'),
+    Episode: ('file_size', 'resolution'),
+}
+
+MEDIA_TYPES = {Movie: 'movie', TVShow: 'tvshow', Episode: 'episode'}
+
+
+def stat_contributions(media_type, values):
+    """
+    Return the aggregate keys a single row contributes to
+
+    Args:
+        media_type: 'movie', 'tvshow' or 'episode'
+        values: Dictionary of the tracked column values of the row
+
+    Returns:
+        List of ((media_type, category, key), size) tuples
+    """
+    size = values.get('file_size') or 0
+    keys = [('total', '')]
+
+    if 'resolution' in values:
+        keys.append(('resolution', (values['resolution'] or 'Unknown')[:64]))
+
+    if values.get('genres'):
+        keys.extend(('genre', genre.strip()[:64])
+                    for genre in values['genres'].split(',') if genre.strip())
+
+    date = values.get('release_date') or values.get('first_air_date')
+    if date:
+        keys.append(('decade', f"{date.year // 10 * 10}s"))
+
+    return [((media_type, category, key), size) for category, key in keys]
+
+
+def _row_values(session, obj, fields, old=False):
+    """Return tracked values of an ORM object, before or after pending changes"""
+    if not old:
+        return {field: getattr(obj, field) for field in fields}
+
+    state = inspect(obj)
+    values = {}
+    for field in fields:
+        history = state.attrs[field].history
+        if history.deleted:
+            values[field] = history.deleted[0]
+        elif history.unchanged:
+            values[field] = history.unchanged[0]
+        elif not history.added:
+            values[field] = getattr(obj, field)
+        else:
+            # Assigned while expired (e.g. after a commit): the previous value
+            # was never loaded, so read the persisted row
+            model = type(obj)
+            with session.no_autoflush:
+                persisted = session.query(
+                    *[getattr(model, f) for f in fields]
+                ).filter(model.id == obj.id).first()
+            return dict(zip(fields, persisted)) if persisted else {}
+    return values
+
+
+def _is_counted(obj, old=False):
+    """Tombstoned rows are hidden from the library and not counted"""
+    if not old:
+        return obj.missing_since is None
+    history = inspect(obj).attrs['missing_since'].history
+    if history.deleted:
+        return history.deleted[0] is None
+    if history.unchanged:
+        return history.unchanged[0] is None
+    if not history.added:
+        return obj.missing_since is None
+    # Assigned while expired: the previous value was never loaded
+    model = type(obj)
+    with object_session(obj).no_autoflush:
+        previous = object_session(obj).query(model.missing_since).filter(
+            model.id == obj.id).scalar()
+    return previous is None
+
+
+def _collect_deltas(session):
+    """Compute aggregate deltas for everything pending in a session"""
+    counts = Counter()
+    sizes = Counter()
+
+    def add(obj, sign, old=False):
+        if not _is_counted(obj, old=old):
+            return
+        media_type = MEDIA_TYPES[type(obj)]
+        values = _row_values(session, obj, TRACKED_FIELDS[type(obj)], old=old)
+        if not values:
+            return
+        for key, size in stat_contributions(media_type, values):
+            counts[key] += sign
+            sizes[key] += sign * size
+
+    for obj in session.new:
+        if type(obj) in TRACKED_FIELDS:
+            add(obj, 1)
+
+    for obj in session.deleted:
+        if type(obj) in TRACKED_FIELDS:
+            add(obj, -1, old=True)
+
+    for obj in session.dirty:
+        if type(obj) in TRACKED_FIELDS and session.is_modified(obj):
+            add(obj, -1, old=True)
+            add(obj, 1)
+
+    return {key: (counts[key], sizes[key]) for key in counts
+            if counts[key] or sizes[key]}
+
+
+def apply_stat_deltas(session, deltas):
+    """
+    Add deltas to the LibraryStat rows, creating or removing rows as needed
+
+    The additions run in SQL (an upsert where the database has one), so
+    concurrent scan workers add to each other's totals instead of
+    overwriting them with values they read earlier.
+    """
+    if not deltas:
+        return
+
+    table = LibraryStat.__table__
+    rows = [{'media_type': key[0], 'category': key[1], 'key': key[2],
+             'item_count': count, 'total_size': size}
+            for key, (count, size) in deltas.items()]
+    statement = dialect_insert(session.get_bind().dialect.name, table)
+
+    if statement is not None:
+        session.execute(statement.on_conflict_do_update(
+            index_elements=['media_type', 'category', 'key'],
+            set_={'item_count': table.c.item_count + statement.excluded.item_count,
+                  'total_size': table.c.total_size + statement.excluded.total_size}),
+            rows)
+    else:
+        for row in rows:
+            updated = session.execute(table.update().where(
+                table.c.media_type == row['media_type'],
+                table.c.category == row['category'],
+                table.c.key == row['key'],
+            ).values(item_count=table.c.item_count + row['item_count'],
+                     total_size=table.c.total_size + row['total_size']))
+            if not updated.rowcount:
+                session.execute(insert(table), row)
+
+    session.execute(table.delete().where(
+        table.c.item_count <= 0, table.c.category != 'total'))
+
+
+@event.listens_for(Session, 'before_flush')
+def _update_library_stats(session, flush_context, instances):
+    apply_stat_deltas(session, _collect_deltas(session))
+
+
+def rebuild_library_stats():
+    """Recompute every aggregate from scratch (after bulk imports or upgrades)"""
+    db.session.query(LibraryStat).delete(synchronize_session=False)
+
+    totals = Counter()
+    sizes = Counter()
+    for model, media_type in MEDIA_TYPES.items():
+        fields = TRACKED_FIELDS[model]
+        columns = [getattr(model, field) for field in fields]
+        query = db.session.query(*columns).filter(model.missing_since.is_(None))
+        for row in query.yield_per(1000):
+            for key, size in stat_contributions(media_type, dict(zip(fields, row))):
+                totals[key] += 1
+                sizes[key] += size
+
+        # Keep a total row even for empty libraries
+        totals.setdefault((media_type, 'total', ''), 0)
+
+    # Bulk inserts bypass the flush hook above
+    db.session.execute(insert(LibraryStat), [
+        {'media_type': key[0], 'category': key[1], 'key': key[2],
+         'item_count': totals[key], 'total_size': sizes[key]}
+        for key in totals
+    ])
+    refresh_planner_statistics(db.session)
+    db.session.commit()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 17:48:31
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 17:48:31
+"""
+Single-writer queue for scanner database writes
+
+Scanning spends most of its time on the network (TMDB) and the disks
+(probing). Those run on the scanning thread outside of any transaction,
+and only the resulting writes are queued to one writer thread per
+process. Each queued job runs in its own short transaction on a dedicated
+engine, so page requests are never queued behind a scan.
+"""
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from flask import current_app
+from sqlalchemy.orm import sessionmaker
+from app import db
+from app.database import create_writer_engine
+from app.metrics import QUEUE_DEPTH, scan_stage
+from app.querylog import query_log_enabled, track_queries, report
+
+logger = logging.getLogger(__name__)
+
+_writer_lock = threading.Lock()
+
+
+class ScanWriter:
+    """
+    Thread applying queued write jobs one at a time
+
+    Jobs are plain functions using ``db.session`` and ``Model.query``; on
+    the writer thread both resolve to the writer's own session. A job's
+    transaction ends when it returns: whatever it did not commit is rolled
+    back and the session is closed.
+    """
+
+    def __init__(self, app, max_pending=256):
+        self.app = app
+        engine = create_writer_engine(app.config)
+        with app.app_context():
+            self.engine = engine if engine is not None else db.engine
+        self._owns_engine = engine is not None
+        self._session_factory = sessionmaker(bind=self.engine)
+        # Bounded, so a slow disk applies back-pressure to the scan
+        self._jobs = queue.Queue(max_pending)
+        QUEUE_DEPTH.set_function(self._jobs.qsize, 'scan_writer')
+        self._thread = threading.Thread(target=self._run, name='scan-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue a write job and return a Future of its result"""
+        if not self._thread.is_alive():
+            raise RuntimeError('Scan writer is closed')
+        future = Future()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def call(self, fn, *args, **kwargs):
+        """Run a job on the writer thread and wait for its result"""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def close(self):
+        """Finish queued jobs and stop the thread"""
+        if self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join()
+        if self._owns_engine:
+            self.engine.dispose()
+
+    def _run(self):
+        with self.app.app_context():
+            session = self._session_factory()
+            # db.session and Model.query are scoped to the app context;
+            # point this thread's scope at the writer session
+            db.session.registry.set(session)
+            log_queries = query_log_enabled(self.app)
+            repeat_threshold = self.app.config.get('SQL_REPEAT_THRESHOLD', 5)
+
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+
+                future, fn, args, kwargs = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if log_queries:
+                        # One job is one scanned file: flag per-file N+1s
+                        with track_queries() as log, scan_stage('db'):
+                            result = fn(*args, **kwargs)
+                        report(log, f"scan job {fn.__name__}", repeat_threshold)
+                    else:
+                        with scan_stage('db'):
+                            result = fn(*args, **kwargs)
+                except BaseException as e:
+                    session.rollback()
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+                finally:
+                    session.close()
+
+            db.session.registry.clear()
+
+
+def get_scan_writer():
+    """Return the writer of the current application, starting it on first use"""
+    app = current_app._get_current_object()
+    writer = app.extensions.get('scan_writer')
+    if writer is None:
+        with _writer_lock:
+            writer = app.extensions.get('scan_writer')
+            if writer is None:
+                writer = ScanWriter(app, app.config.get('SCAN_WRITER_QUEUE_SIZE', 256))
+                app.extensions['scan_writer'] = writer
+    return writer
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 22:47:05
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 22:47:05
+"""
+Production server support for gunicorn.conf.py and ``flask serve``
+
+The application is preloaded in the gunicorn master: modules, mappers and
+compiled templates are shared copy-on-write by every forked worker. Each
+worker then drops the database connections it inherited and renders the
+hot pages into its own page cache before it accepts traffic. After a scan
+the master is sent SIGHUP, which replaces the workers gracefully with
+fresh, warmed ones.
+"""
+import os
+import time
+import signal
+import logging
+from app import db
+
+logger = logging.getLogger(__name__)
+
+MAX_AUTOTUNED_WORKERS = 16
+DEFAULT_THREADS = 4
+
+
+def available_cpus():
+    """CPUs this process may run on (affinity and cpusets included)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def autotune(workers=0, threads=0, cpus=None):
+    """
+    Return (workers, threads) for the gthread worker
+
+    Rendering pages holds the GIL, so processes scale with the CPUs; one
+    spare covers a worker blocked in SQLite or on the disk. Threads keep
+    long media streams and POST /scan from occupying a whole worker.
+    Explicit values win over the autotuned ones.
+    """
+    cpus = cpus or available_cpus()
+    return (workers or min(cpus + 1, MAX_AUTOTUNED_WORKERS),
+            threads or DEFAULT_THREADS)
+
+
+def warm_up(app, pages=True):
+    """
+    Do the first-request work of a process ahead of traffic
+
+    Configures the ORM mappers and compiles every template, then with
+    ``pages`` renders SERVE_WARMUP_PATHS into the page cache. Returns the
+    seconds spent per step.
+    """
+    from sqlalchemy.orm import configure_mappers
+    timings = {}
+
+    started = time.perf_counter()
+    configure_mappers()
+    timings['mappers'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for name in app.jinja_env.list_templates(extensions=('html',)):
+        app.jinja_env.get_template(name)
+    timings['templates'] = time.perf_counter() - started
+
+    if pages:
+        started = time.perf_counter()
+        client = app.test_client()
+        for path in app.config.get('SERVE_WARMUP_PATHS', []):
+            try:
+                response = client.get(path)
+                response.close()
+                if response.status_code != 200:
+                    logger.warning(f"Warmup of {path} returned {response.status_code}")
+            except Exception as e:
+                logger.warning(f"Warmup of {path} failed: {e}")
+        timings['pages'] = time.perf_counter() - started
+    return timings
+
+
+def prepare_master(app):
+    """Warm the preloaded application before workers are forked"""
+    timings = warm_up(app, pages=False)
+    # Connections must not be shared across fork
+    with app.app_context():
+        db.engine.dispose()
+    logger.info(f"Preloaded application warmed in {sum(timings.values()):.2f}s")
+
+
+def prepare_worker(app):
+    """Reset inherited connections and warm a freshly forked worker"""
+    # The master loaded the manifest at preload; pick up newer builds
+    from app.assets import load_manifest
+    load_manifest(app)
+    with app.app_context():
+        # The parent's pooled connections stay open for the parent
+        db.engine.dispose(close=False)
+    timings = warm_up(app)
+    logger.info(f"Worker {os.getpid()} warmed in {sum(timings.values()):.2f}s")
+
+
+def _is_gunicorn(pid):
+    """Guard against a stale pidfile naming an unrelated process"""
+    if not os.path.isdir('/proc'):
+        return True  # Nothing to check against without procfs
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return b'gunicorn' in f.read()
+    except OSError:
+        return False
+
+
+def reload_server(app):
+    """
+    Ask the gunicorn master named in SERVE_PIDFILE to replace its workers
+
+    Returns:
+        True if the master was signalled
+    """
+    path = app.config.get('SERVE_PIDFILE')
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        with open(path) as f:
+            pid = int(f.read().strip())
+        if not _is_gunicorn(pid):
+            logger.warning(f"Not reloading: {path} names process {pid}, not gunicorn")
+            return False
+        os.kill(pid, signal.SIGHUP)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not reload the server from {path}: {e}")
+        return False
+    logger.info(f"Sent SIGHUP to gunicorn master {pid}")
+    return True
@@ -0,0 +1,81 @@
+/*
+ * @Author: Zana Saedpanah
+ * @Date:   2026-10-20 00:12:37
+ * @Last Modified by:   Zana Saedpanah
+ * @Last Modified time: 2026-10-20 00:12:37
+ */
+(function () {
+    'use strict';
+
+    // Load the next batch of cards ahead of the viewport
+    var PRELOAD_MARGIN = '800px 0px';
+
+    /*
+     * Infinite scroll for grids marked data-infinite-scroll="<cards url>".
+     * Each batch is an HTML fragment of cards ending with a hidden
+     * [data-next-cursor] marker; the last batch has none. Without
+     * IntersectionObserver, or after an error, the pagination stays.
+     */
+    function infiniteScroll(grid) {
+        var url = grid.dataset.infiniteScroll;
+        var cursor = grid.dataset.nextCursor;
+        if (!url || !cursor || !('IntersectionObserver' in window)) {
+            return;
+        }
+
+        var fallback = document.querySelector('[data-infinite-scroll-fallback]');
+        var sentinel = document.createElement('div');
+        grid.insertAdjacentElement('afterend', sentinel);
+        if (fallback) {
+            fallback.classList.add('d-none');
+        }
+
+        var loading = false;
+        var observer = new IntersectionObserver(function (entries) {
+            if (!entries[0].isIntersecting || loading) {
+                return;
+            }
+            loading = true;
+            var separator = url.indexOf('?') === -1 ? '?' : '&';
+            fetch(url + separator + 'cursor=' + encodeURIComponent(cursor))
+                .then(function (response) {
+                    if (!response.ok) {
+                        throw new Error('HTTP ' + response.status);
+                    }
+                    return response.text();
+                })
+                .then(function (html) {
+                    var template = document.createElement('template');
+                    template.innerHTML = html;
+                    var marker = template.content.querySelector('[data-next-cursor]');
+                    cursor = marker ? marker.dataset.nextCursor : null;
+                    if (marker) {
+                        marker.remove();
+                    }
+                    grid.appendChild(template.content);
+                    loading = false;
+
+                    if (!cursor) {
+                        observer.disconnect();
+                        sentinel.remove();
+                        return;
+                    }
+                    // Re-observe so a sentinel still on screen fires again
+                    observer.unobserve(sentinel);
+                    observer.observe(sentinel);
+                })
+                .catch(function () {
+                    observer.disconnect();
+                    if (fallback) {
+                        fallback.classList.remove('d-none');
+                    }
+                });
+        }, { rootMargin: PRELOAD_MARGIN });
+
+        observer.observe(sentinel);
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('[data-infinite-scroll]').forEach(infiniteScroll);
+    });
+})();
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 11:20:45
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 11:20:45
+import os
+from datetime import datetime, timezone
+from urllib.parse import quote
+from flask import current_app, request, Response, abort
+from werkzeug.wsgi import wrap_file
+
+# MIME types per container; browsers rely on these to pick a demuxer
+MEDIA_MIMETYPES = {
+    '.mp4': 'video/mp4',
+    '.m4v': 'video/x-m4v',
+    '.mkv': 'video/x-matroska',
+    '.webm': 'video/webm',
+    '.avi': 'video/x-msvideo',
+    '.mov': 'video/quicktime',
+    '.wmv': 'video/x-ms-wmv',
+    '.flv': 'video/x-flv',
+}
+
+
+def media_mimetype(file_path):
+    """Return the MIME type for a media container"""
+    extension = os.path.splitext(file_path)[1].lower()
+    return MEDIA_MIMETYPES.get(extension, 'application/octet-stream')
+
+
+def _accel_redirect_uri(file_path):
+    """Map a media path to an nginx internal location using MEDIA_ACCEL_REDIRECT_MAP"""
+    for prefix, location in current_app.config.get('MEDIA_ACCEL_REDIRECT_MAP', {}).items():
+        prefix = prefix.rstrip(os.sep) + os.sep
+        if file_path.startswith(prefix):
+            relative = file_path[len(prefix):].replace(os.sep, '/')
+            return location.rstrip('/') + '/' + quote(relative)
+    return None
+
+
+def _read_range(file_path, start, length, chunk_size):
+    """Yield ``length`` bytes starting at ``start`` without reading the rest"""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def send_media_file(file_path):
+    """
+    Stream a media file with HTTP Range support
+
+    Seeking only ever touches the requested byte range. Requests running to
+    the end of the file (``bytes=N-``, what players send when seeking) are
+    handed to the server's ``wsgi.file_wrapper`` positioned at the offset,
+    which gunicorn turns into ``os.sendfile``. When MEDIA_SENDFILE_MODE is
+    ``x-accel-redirect`` or ``x-sendfile`` the transfer, including Range
+    handling, is offloaded to the front-end web server entirely.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        abort(404)
+
+    mimetype = media_mimetype(file_path)
+    mode = current_app.config.get('MEDIA_SENDFILE_MODE', '')
+
+    if mode == 'x-accel-redirect':
+        uri = _accel_redirect_uri(file_path)
+        if uri:
+            response = Response(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = uri
+            return response
+    elif mode == 'x-sendfile':
+        response = Response(mimetype=mimetype)
+        response.headers['X-Sendfile'] = file_path
+        return response
+
+    size = stat.st_size
+    etag = f"{stat.st_ino:x}-{int(stat.st_mtime):x}-{size:x}"
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), tz=timezone.utc)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    # Honour Range only when If-Range (if any) still matches this file
+    byte_range = request.range
+    if byte_range is not None and request.if_range:
+        if_range = request.if_range
+        if if_range.etag is not None and if_range.etag != etag:
+            byte_range = None
+        elif if_range.date is not None and if_range.date < last_modified:
+            byte_range = None
+
+    # Multi-part ranges are answered with the full file
+    if byte_range is not None and len(byte_range.ranges) != 1:
+        byte_range = None
+
+    start, stop = 0, size
+    status = 200
+    if byte_range is not None:
+        bounds = byte_range.range_for_length(size)
+        if bounds is None:
+            response = Response(status=416)
+            response.headers['Content-Range'] = f"bytes */{size}"
+            return response
+        start, stop = bounds
+        status = 206
+
+    length = stop - start
+    if stop == size:
+        f = open(file_path, 'rb')
+        f.seek(start)
+        body = wrap_file(request.environ, f,
+                         current_app.config.get('STREAM_CHUNK_SIZE', 1 << 20))
+    else:
+        body = _read_range(file_path, start, length,
+                           current_app.config.get('STREAM_CHUNK_SIZE', 1 << 20))
+
+    response = Response(body, status=status, mimetype=mimetype,
+                        direct_passthrough=True)
+    response.content_length = length
+    response.accept_ranges = 'bytes'
+    response.last_modified = last_modified
+    response.set_etag(etag)
+    if status == 206:
+        response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{size}"
+    return response
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 20:31:05
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 20:31:05
+"""
+MovieShelf benchmarks
+
+Run from the repository root, e.g.::
+
+    python -m benchmarks.scan --sizes 1000,10000 --output scan.json
+    python -m benchmarks.routes --movies 100000 --episodes 500000 --output routes.json
+    python -m benchmarks.startup --budget-ms 600
+    python -m benchmarks.render --sizes 24,96,500
+
+Every benchmark builds its own application against a throwaway database
+and writes a JSON report meant to be kept and diffed between releases.
+benchmarks.startup also exits non-zero past its budget, for use in CI.
+"""
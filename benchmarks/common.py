@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 20:31:05
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 20:31:05
+"""Helpers shared by the benchmark runners"""
+import os
+import sys
+import json
+import math
+import time
+import platform
+import resource
+import threading
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Benchmarks run from a checkout, not an installed package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def create_benchmark_app(workdir, **overrides):
+    """
+    Create an application with its database and caches inside workdir
+
+    Keyword arguments override Config settings.
+    """
+    from config import Config
+    from app import create_app, db
+
+    settings = {
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(workdir, 'library.db'),
+        'POSTER_CACHE_DIR': os.path.join(workdir, 'posters'),
+        'METADATA_STORE_PATH': os.path.join(workdir, 'metadata.ndjson'),
+        'PAGE_CACHE_DIR': os.path.join(workdir, 'pages'),
+        'SQL_QUERY_LOG': False,
+    }
+    settings.update(overrides)
+    app = create_app(type('BenchmarkConfig', (Config,), settings))
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def close_app(app):
+    """Stop the scan writer thread of a benchmark application"""
+    writer = app.extensions.pop('scan_writer', None)
+    if writer is not None:
+        writer.close()
+
+
+class StatementCounter:
+    """Count SQL statements executed by every engine and thread"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def _after_cursor_execute(self, *args):
+        with self._lock:
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event.remove(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        return False
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident set size"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def write_report(report, output):
+    """Write a report as JSON to a path, or stdout for None/'-'"""
+    text = json.dumps(report, indent=2, sort_keys=True, default=str)
+    if output in (None, '-'):
+        sys.stdout.write(text + '\n')
+    else:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
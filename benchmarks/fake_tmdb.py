@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 20:52:16
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 20:52:16
+"""
+Local stand-in for the TMDb API and image server
+
+Answers the endpoints TMDBFetcher uses with deterministic, TMDb-shaped
+payloads derived from the query or id, optionally after a fixed latency,
+and counts the requests it served. install() points TMDBFetcher at it.
+"""
+import json
+import time
+import zlib
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+IMAGE_BYTES = 24 * 1024
+CAST_POOL = 5000
+
+
+def _tmdb_id(text):
+    return zlib.crc32(text.lower().encode('utf-8')) % 900000 + 1
+
+
+def _cast(seed, size=8):
+    return [{
+        'id': (seed * 7 + order * 131) % CAST_POOL + 1,
+        'name': f'Actor {(seed * 7 + order * 131) % CAST_POOL + 1}',
+        'character': f'Character {order + 1}',
+        'order': order,
+        'profile_path': f'/profile{(seed + order) % CAST_POOL}.jpg',
+    } for order in range(size)]
+
+
+class FakeTMDB:
+    """
+    Threaded HTTP server imitating api.themoviedb.org and image.tmdb.org
+
+        with FakeTMDB(latency=0.02) as tmdb:
+            tmdb.install()
+            scan_directories(...)
+            print(tmdb.requests)
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = Counter()
+        self._titles = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._patched = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, content_type, body = fake.respond(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.uninstall()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def install(self):
+        """Point TMDBFetcher at this server until uninstall()"""
+        from app.scanner.metadata_fetcher import TMDBFetcher
+        names = ('BASE_URL', 'POSTER_BASE_URL', 'BACKDROP_BASE_URL', 'PROFILE_BASE_URL')
+        self._patched = {name: getattr(TMDBFetcher, name) for name in names}
+        TMDBFetcher.BASE_URL = f'{self.url}/3'
+        TMDBFetcher.POSTER_BASE_URL = f'{self.url}/t/p/w500'
+        TMDBFetcher.BACKDROP_BASE_URL = f'{self.url}/t/p/original'
+        TMDBFetcher.PROFILE_BASE_URL = f'{self.url}/t/p/w185'
+
+    def uninstall(self):
+        if self._patched:
+            from app.scanner.metadata_fetcher import TMDBFetcher
+            for name, value in self._patched.items():
+                setattr(TMDBFetcher, name, value)
+            self._patched = None
+
+    def total(self):
+        with self._lock:
+            return sum(self.requests.values())
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+
+    def _count(self, kind):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def respond(self, path):
+        """Return (status, content type, body) for a request path"""
+        if self.latency:
+            time.sleep(self.latency)
+
+        parts = urlsplit(path)
+        segments = [segment for segment in parts.path.split('/') if segment]
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        if segments[:1] == ['t']:
+            self._count('image')
+            return 200, 'image/jpeg', b'\xff\xd8\xff\xe0' + bytes(IMAGE_BYTES - 4)
+
+        payload = None
+        if segments[:1] == ['3']:
+            segments = segments[1:]
+            if segments == ['search', 'movie'] or segments == ['search', 'tv']:
+                self._count(f'search_{segments[1]}')
+                payload = self._search(query.get('query', ''))
+            elif len(segments) == 2 and segments[0] == 'movie':
+                self._count('movie')
+                payload = self._movie(int(segments[1]))
+            elif len(segments) == 2 and segments[0] == 'tv':
+                self._count('tv')
+                payload = self._tvshow(int(segments[1]))
+            elif len(segments) == 6 and segments[0] == 'tv':
+                self._count('episode')
+                payload = self._episode(int(segments[1]), int(segments[3]), int(segments[5]))
+
+        if payload is None:
+            self._count('not_found')
+            return 404, 'application/json', b'{"status_code":34}'
+        return 200, 'application/json', json.dumps(payload).encode('utf-8')
+
+    def _search(self, text):
+        tmdb_id = _tmdb_id(text)
+        with self._lock:
+            self._titles[tmdb_id] = text
+        return {'page': 1, 'results': [{'id': tmdb_id, 'title': text, 'name': text}],
+                'total_results': 1}
+
+    def _title(self, tmdb_id):
+        with self._lock:
+            return self._titles.get(tmdb_id, f'Title {tmdb_id}')
+
+    def _movie(self, tmdb_id):
+        title = self._title(tmdb_id)
+        return {
+            'id': tmdb_id,
+            'title': title,
+            'original_title': title,
+            'imdb_id': f'tt{tmdb_id:07d}',
+            'overview': f'{title} is a movie served by the benchmark TMDb stand-in.',
+            'release_date': f'{1950 + tmdb_id % 75}-{tmdb_id % 12 + 1:02d}-01',
+            'runtime': 80 + tmdb_id % 100,
+            'poster_path': f'/poster{tmdb_id}.jpg',
+            'backdrop_path': f'/backdrop{tmdb_id}.jpg',
+            'genres': [{'id': tmdb_id % 10, 'name': f'Genre {tmdb_id % 10}'}],
+            'credits': {'cast': _cast(tmdb_id),
+                        'crew': [{'job': 'Director', 'name': f'Director {tmdb_id % 500}'}]},
+            'recommendations': {'results': []},
+        }
+
+    def _tvshow(self, tmdb_id):
+        title = self._title(tmdb_id)
+        return {
+            'id': tmdb_id,
+            'name': title,
+            'original_name': title,
+            'overview': f'{title} is a TV show served by the benchmark TMDb stand-in.',
+            'first_air_date': f'{1990 + tmdb_id % 34}-01-01',
+            'last_air_date': f'{1995 + tmdb_id % 30}-06-01',
+            'status': 'Ended' if tmdb_id % 2 else 'Returning Series',
+            'number_of_seasons': 1 + tmdb_id % 8,
+            'number_of_episodes': 10 + tmdb_id % 90,
+            'poster_path': f'/poster{tmdb_id}.jpg',
+            'backdrop_path': f'/backdrop{tmdb_id}.jpg',
+            'genres': [{'id': tmdb_id % 10, 'name': f'Genre {tmdb_id % 10}'}],
+            'created_by': [{'name': f'Creator {tmdb_id % 300}'}],
+            'credits': {'cast': _cast(tmdb_id),
+                        'crew': [{'job': 'Creator', 'name': f'Creator {tmdb_id % 300}'}]},
+            'recommendations': {'results': []},
+        }
+
+    def _episode(self, tmdb_id, season, episode):
+        return {
+            'id': tmdb_id * 1000 + season * 100 + episode,
+            'name': f'Episode {episode}',
+            'overview': f'Season {season}, episode {episode}.',
+            'air_date': f'2020-{episode % 12 + 1:02d}-01',
+            'season_number': season,
+            'episode_number': episode,
+            'still_path': f'/still{tmdb_id}_{season}_{episode}.jpg',
+        }
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 20:38:44
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 20:38:44
+"""
+Synthetic media library generator
+
+Builds a deterministic tree of scene-named movies and season folders with
+sparse video files of realistic sizes (a few random header bytes keep
+content fingerprints unique) and, for a share of the titles, Kodi NFO
+sidecars. churn_library() then moves, deletes, touches and adds files the
+way a real library changes between scans.
+"""
+import os
+import random
+from xml.sax.saxutils import escape
+
+ADJECTIVES = (
+    'Silent', 'Broken', 'Hidden', 'Golden', 'Last', 'Dark', 'Frozen', 'Crimson', 'Lost',
+    'Burning', 'Distant', 'Electric', 'Hollow', 'Iron', 'Lonely', 'Midnight', 'Northern',
+    'Pale', 'Quiet', 'Restless', 'Savage', 'Secret', 'Shattered', 'Stolen', 'Sudden',
+    'Twisted', 'Velvet', 'Wild', 'Winter', 'Wicked', 'Bitter', 'Bright', 'Cold', 'Deep',
+    'Empty', 'Final', 'Fallen', 'Glass', 'Green', 'Red',
+)
+NOUNS = (
+    'River', 'Harbor', 'Empire', 'Garden', 'Signal', 'Horizon', 'Witness', 'Kingdom',
+    'Frontier', 'Mirror', 'Shadow', 'Island', 'Machine', 'Orchard', 'Protocol', 'Ritual',
+    'Station', 'Summit', 'Tide', 'Valley', 'Voyage', 'Whisper', 'Anthem', 'Border',
+    'Canyon', 'Circuit', 'Covenant', 'Desert', 'Echo', 'Engine', 'Fortress', 'Harvest',
+    'Lantern', 'Legacy', 'Meridian', 'Monument', 'Outpost', 'Passage', 'Reckoning', 'Sanctuary',
+)
+SHOW_SUFFIXES = ('Chronicles', 'Files', 'Diaries', 'Club', 'Street', 'Division', 'Society',
+                 'Project', 'Academy', 'Hospital')
+RESOLUTIONS = (('2160p', 0.1), ('1080p', 0.6), ('720p', 0.25), ('480p', 0.05))
+SOURCES = ('BluRay', 'WEB-DL', 'WEBRip', 'HDTV')
+CODECS = ('x264', 'x265', 'H.264', 'HEVC')
+GROUPS = ('SPARKS', 'RARBG', 'NTb', 'FLUX', 'CMRG', 'GECKOS', 'TEPES')
+GENRES = ('Drama', 'Comedy', 'Thriller', 'Action', 'Science Fiction', 'Horror', 'Documentary',
+          'Animation', 'Crime', 'Romance')
+
+# Sizes in bytes by resolution (min, max); files are sparse
+MOVIE_SIZES = {'2160p': (15 << 30, 60 << 30), '1080p': (4 << 30, 15 << 30),
+               '720p': (1 << 30, 4 << 30), '480p': (700 << 20, 1400 << 20)}
+EPISODE_SIZES = {'2160p': (4 << 30, 10 << 30), '1080p': (1 << 30, 4 << 30),
+                 '720p': (400 << 20, 1200 << 20), '480p': (150 << 20, 400 << 20)}
+HEADER_BYTES = 512
+
+EPISODES_PER_SEASON = 10
+
+
+def _pick_resolution(rng):
+    value = rng.random()
+    for resolution, share in RESOLUTIONS:
+        if value < share:
+            return resolution
+        value -= share
+    return RESOLUTIONS[-1][0]
+
+
+def _write_video(path, size, rng):
+    """Create a sparse file of the given size with a unique random header"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(rng.randbytes(HEADER_BYTES))
+        f.truncate(size)
+
+
+def _write_nfo(path, root_tag, fields):
+    lines = [f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>', f'<{root_tag}>']
+    for tag, value in fields:
+        if isinstance(value, dict):
+            attributes = ' '.join(f'{key}="{escape(str(item))}"'
+                                  for key, item in value.items() if key != 'text')
+            lines.append(f'  <{tag} {attributes}>{escape(str(value["text"]))}</{tag}>')
+        else:
+            lines.append(f'  <{tag}>{escape(str(value))}</{tag}>')
+    lines.append(f'</{root_tag}>')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def movie_title(index):
+    """Unique (title, year) of the index-th synthetic movie"""
+    pairs = len(ADJECTIVES) * len(NOUNS)
+    title = f"{ADJECTIVES[index % len(ADJECTIVES)]} {NOUNS[(index // len(ADJECTIVES)) % len(NOUNS)]}"
+    return title, 1950 + (index // pairs) % 75
+
+
+def show_title(index):
+    """Unique title of the index-th synthetic TV show"""
+    title = f"The {NOUNS[index % len(NOUNS)]} {SHOW_SUFFIXES[(index // len(NOUNS)) % len(SHOW_SUFFIXES)]}"
+    cycle = index // (len(NOUNS) * len(SHOW_SUFFIXES))
+    return f"{title} {cycle + 1}" if cycle else title
+
+
+def scene_name(title, rng, year=None, episode=None):
+    """Scene-style release file name"""
+    parts = [title.replace(' ', '.')]
+    if year is not None:
+        parts.append(str(year))
+    if episode is not None:
+        parts.append('S{:02d}E{:02d}'.format(*episode))
+    resolution = _pick_resolution(rng)
+    parts.extend([resolution, rng.choice(SOURCES), rng.choice(CODECS)])
+    return '.'.join(parts) + f'-{rng.choice(GROUPS)}.mkv', resolution
+
+
+def add_movie(root, index, rng, nfo=False):
+    """Create one movie folder; returns the video path"""
+    title, year = movie_title(index)
+    directory = os.path.join(root, 'Movies', f'{title} ({year})')
+    filename, resolution = scene_name(title, rng, year=year)
+    path = os.path.join(directory, filename)
+    _write_video(path, rng.randint(*MOVIE_SIZES[resolution]), rng)
+
+    if nfo:
+        _write_nfo(os.path.splitext(path)[0] + '.nfo', 'movie', [
+            ('title', title),
+            ('year', year),
+            ('premiered', f'{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'),
+            ('runtime', rng.randint(80, 180)),
+            ('plot', f'{title} is a synthetic movie generated for benchmarking.'),
+            ('genre', rng.choice(GENRES)),
+            ('director', f'Director {rng.randint(1, 500)}'),
+            ('thumb', {'aspect': 'poster', 'text': f'https://image.invalid/movie/{index}.jpg'}),
+            ('uniqueid', {'type': 'tmdb', 'default': 'true', 'text': 1000000 + index}),
+        ])
+    return path
+
+
+def add_show(root, index, episodes, rng, nfo=False):
+    """Create one TV show with the given number of episodes; returns their paths"""
+    title = show_title(index)
+    directory = os.path.join(root, 'Shows', title)
+    os.makedirs(directory, exist_ok=True)
+    if nfo:
+        _write_nfo(os.path.join(directory, 'tvshow.nfo'), 'tvshow', [
+            ('title', title),
+            ('premiered', f'{rng.randint(1990, 2024)}-01-{rng.randint(1, 28):02d}'),
+            ('plot', f'{title} is a synthetic TV show generated for benchmarking.'),
+            ('genre', rng.choice(GENRES)),
+            ('status', rng.choice(('Ended', 'Returning Series'))),
+            ('thumb', {'aspect': 'poster', 'text': f'https://image.invalid/tv/{index}.jpg'}),
+            ('uniqueid', {'type': 'tmdb', 'default': 'true', 'text': 2000000 + index}),
+        ])
+
+    paths = []
+    for number in range(episodes):
+        season, episode = divmod(number, EPISODES_PER_SEASON)
+        paths.append(add_episode(root, title, season + 1, episode + 1, rng, nfo=nfo))
+    return paths
+
+
+def add_episode(root, title, season, episode, rng, nfo=False):
+    """Create one episode file in its season folder; returns its path"""
+    directory = os.path.join(root, 'Shows', title, f'Season {season:02d}')
+    filename, resolution = scene_name(title, rng, episode=(season, episode))
+    path = os.path.join(directory, filename)
+    _write_video(path, rng.randint(*EPISODE_SIZES[resolution]), rng)
+    if nfo:
+        _write_nfo(os.path.splitext(path)[0] + '.nfo', 'episodedetails', [
+            ('title', f'Episode {episode}'),
+            ('season', season),
+            ('episode', episode),
+            ('plot', f'Episode {episode} of season {season} of {title}.'),
+            ('aired', f'2020-{(episode % 12) + 1:02d}-01'),
+        ])
+    return path
+
+
+def generate_library(root, files, seed=0, movie_share=0.4, nfo_share=0.5):
+    """
+    Generate a library of about the given number of video files
+
+    Args:
+        root: Directory to create the library in
+        files: Total number of video files
+        seed: Random seed; the same arguments produce the same tree
+        movie_share: Share of the files that are movies, the rest episodes
+        nfo_share: Share of the movies and shows that get NFO sidecars
+
+    Returns:
+        Dictionary with the movie and episode counts and the video paths
+    """
+    rng = random.Random(seed)
+    movies = int(files * movie_share)
+    paths = [add_movie(root, index, rng, nfo=rng.random() < nfo_share)
+             for index in range(movies)]
+
+    episodes = files - movies
+    show_index = 0
+    while episodes > 0:
+        count = min(episodes, rng.randint(6, 60))
+        paths.extend(add_show(root, show_index, count, rng, nfo=rng.random() < nfo_share))
+        episodes -= count
+        show_index += 1
+
+    return {'movies': movies, 'episodes': files - movies, 'shows': show_index,
+            'paths': paths}
+
+
+def churn_library(root, library, fraction=0.01, seed=1):
+    """
+    Change a fraction of the library: moves, deletions, touches and additions
+
+    A quarter of the changed files each are moved to another folder,
+    deleted, touched (new mtime) and added (new movies).
+
+    Args:
+        library: Dictionary returned by generate_library(), updated in place
+
+    Returns:
+        Dictionary of the number of files per kind of change
+    """
+    rng = random.Random(seed)
+    paths = library['paths']
+    changes = max(4, int(len(paths) * fraction))
+    chosen = rng.sample(range(len(paths)), min(len(paths), changes * 3 // 4))
+    per_kind = len(chosen) // 3
+    moved, deleted, touched = (chosen[:per_kind], chosen[per_kind:2 * per_kind],
+                               chosen[2 * per_kind:])
+
+    for index in moved:
+        source = paths[index]
+        target_dir = os.path.join(root, 'Moved', f'{index:07d}')
+        if os.sep + 'Shows' + os.sep in source:
+            # Keep season folders so the show directory is still found
+            target_dir = os.path.join(root, 'Shows', f'Moved {index:07d}', 'Season 01')
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, os.path.basename(source))
+        os.rename(source, target)
+        paths[index] = target
+
+    for index in touched:
+        stat = os.stat(paths[index])
+        os.utime(paths[index], (stat.st_atime, stat.st_mtime + 3600))
+
+    for index in sorted(deleted, reverse=True):
+        os.remove(paths[index])
+        del paths[index]
+
+    # New movies continue the title sequence, so they never collide
+    added = changes - len(chosen)
+    paths.extend(add_movie(root, library['movies'] + number, rng) for number in range(added))
+    library['movies'] += added
+
+    return {'moved': len(moved), 'deleted': len(deleted), 'touched': len(touched),
+            'added': added}
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 23:41:09
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 23:41:09
+"""
+Poster card grid render benchmark
+
+Renders grids of 24, 96 and 500 movie cards three ways:
+
+- inline: the card macro called in a template loop, as pages did before
+  the fragment cache
+- cold: poster_cards() with an empty fragment cache (render and store)
+- warm: poster_cards() with every card cached
+
+and times the full movie.index page with the fragment cache cold and
+warm, with the page cache off and ITEMS_PER_PAGE set to the grid size.
+
+    python -m benchmarks.render --sizes 24,96,500 --output render.json
+"""
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+from benchmarks.common import create_benchmark_app, close_app, environment, write_report
+from benchmarks.routes import seed_database
+
+INLINE_GRID = ("{% from 'macros/cards.html' import poster_card %}"
+               "{% for item in items %}{{ poster_card(item, 'movie') }}{% endfor %}")
+
+
+def timed(function, repeat, before=None):
+    """Median and minimum milliseconds of repeat calls"""
+    samples = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': round(statistics.median(samples), 3),
+            'min_ms': round(min(samples), 3)}
+
+
+def benchmark_size(app, size, repeat):
+    from app.cache import poster_cards
+    from app.models.movie import Movie
+
+    cache = app.extensions['fragment_cache']
+    result = {'cards': size}
+    with app.test_request_context('/movies/'):
+        items = Movie.query.order_by(Movie.id).limit(size).all()
+        inline = app.jinja_env.from_string(INLINE_GRID)
+        result['inline'] = timed(lambda: inline.render(items=items), repeat)
+        result['cold'] = timed(lambda: poster_cards(items), repeat, before=cache.clear)
+        poster_cards(items)
+        result['warm'] = timed(lambda: poster_cards(items), repeat)
+
+    app.config['ITEMS_PER_PAGE'] = size
+    client = app.test_client()
+
+    def get_page():
+        response = client.get('/movies/?sort_by=title')
+        response.close()
+        assert response.status_code == 200, response.status_code
+
+    result['page_cold'] = timed(get_page, repeat, before=cache.clear)
+    get_page()
+    result['page_warm'] = timed(get_page, repeat)
+    result['warm_speedup'] = round(result['inline']['median_ms'] /
+                                   max(result['warm']['median_ms'], 1e-6), 1)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='24,96,500', help='Comma-separated cards per grid')
+    parser.add_argument('--repeat', type=int, default=20, help='Renders per measurement')
+    parser.add_argument('--output', default='-', help='JSON report path (default: stdout)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(value) for value in args.sizes.split(',')]
+
+    workdir = tempfile.mkdtemp(prefix='movieshelf-render-')
+    app = create_benchmark_app(workdir, PAGE_CACHE_TYPE='none',
+                               FRAGMENT_CACHE_SIZE=max(sizes) * 2)
+    try:
+        seed_database(app, max(sizes), 0, cast=0)
+        results = [benchmark_size(app, size, args.repeat) for size in sizes]
+    finally:
+        close_app(app)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    write_report({'benchmark': 'render', 'environment': environment(),
+                  'settings': {'sizes': sizes, 'repeat': args.repeat},
+                  'results': results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,488 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 21:40:12
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 21:40:12
+"""
+Web route load benchmark over a large seeded database
+
+The database is bulk-seeded with synthetic movies, TV shows, episodes and
+cast (100k movies and 500k episodes by default), then every route is
+driven through the Flask test client and, with --concurrency, through a
+threaded WSGI server hit by that many concurrent clients. Each route
+reports p50/p95/p99 latency, throughput, status codes and SQL statements
+per request, plus the EXPLAIN plan of every SELECT it runs so plan
+regressions show up in a plain diff of two reports. Only 2xx responses
+enter the latency and query statistics; routes with other responses are
+reported as 'partial' or 'failed' and listed under failed_routes.
+
+    python -m benchmarks.routes --movies 100000 --episodes 500000 --output routes.json
+
+The page cache is off unless --page-cache is given, so the views
+themselves are measured.
+"""
+import os
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import http.client
+from collections import Counter
+from datetime import date, datetime, timedelta
+from benchmarks.common import (create_benchmark_app, close_app, StatementCounter, percentile,
+                               peak_rss_mb, environment, write_report)
+from benchmarks.library import (ADJECTIVES, NOUNS, GENRES, MOVIE_SIZES, EPISODE_SIZES,
+                                EPISODES_PER_SEASON, movie_title, show_title, _pick_resolution)
+
+ROUTES = ('main.index', 'movie.index', 'tvshow.index', 'tvshow.tvshow_detail', 'main.search')
+BATCH_SIZE = 5000
+PEOPLE = 5000
+WARMUP_REQUESTS = 5
+
+
+def _genres(rng):
+    return ','.join(rng.sample(GENRES, rng.randint(1, 3)))
+
+
+def _insert(model, rows):
+    """Bulk insert rows in batches; bypasses the ORM unit of work"""
+    from sqlalchemy import insert
+    from app import db
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def seed_database(app, movies, episodes, cast=5, seed=0):
+    """
+    Fill an empty database with synthetic library rows
+
+    Rows go in through bulk INSERTs, so the library statistics are rebuilt
+    afterwards and the library version is bumped once.
+
+    Returns:
+        Dictionary with the row counts and the seeding time
+    """
+    from app import db
+    from app.models.movie import Movie
+    from app.models.tvshow import TVShow, Episode
+    from app.models.person import Person, Credit
+    from app.models.library import LibraryVersion
+    from app.scanner.stats import rebuild_library_stats
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    epoch = datetime(2015, 1, 1)
+
+    with app.app_context():
+        _insert(Person, [{'id': index + 1, 'tmdb_id': 500000 + index, 'name': f'Actor {index + 1}',
+                          'profile_path': f'/profile{index}.jpg'} for index in range(PEOPLE)])
+
+        rows = []
+        for index in range(movies):
+            title, year = movie_title(index)
+            resolution = _pick_resolution(rng)
+            added = epoch + timedelta(minutes=rng.randint(0, 10 * 365 * 24 * 60))
+            rows.append({
+                'id': index + 1,
+                'title': title,
+                'original_title': title,
+                'tmdb_id': 1000000 + index,
+                'overview': f'{title} is a synthetic movie generated for benchmarking.',
+                'release_date': date(year, rng.randint(1, 12), rng.randint(1, 28)),
+                'runtime': rng.randint(80, 180),
+                'poster_path': f'/poster{index}.jpg',
+                'backdrop_path': f'/backdrop{index}.jpg',
+                'genres': _genres(rng),
+                'file_path': f'/media/Movies/{title} ({year})/{index}.{resolution}.mkv',
+                'file_size': rng.randint(*MOVIE_SIZES[resolution]),
+                'resolution': resolution,
+                'director': f'Director {rng.randint(1, 500)}',
+                'date_added': added,
+                'last_updated': added,
+            })
+        _insert(Movie, rows)
+
+        shows, episode_rows, remaining = [], [], episodes
+        while remaining > 0:
+            index = len(shows)
+            title = show_title(index)
+            count = min(remaining, rng.randint(10, 90))
+            added = epoch + timedelta(minutes=rng.randint(0, 10 * 365 * 24 * 60))
+            shows.append({
+                'id': index + 1,
+                'title': title,
+                'original_title': title,
+                'tmdb_id': 2000000 + index,
+                'overview': f'{title} is a synthetic TV show generated for benchmarking.',
+                'first_air_date': date(rng.randint(1990, 2024), 1, rng.randint(1, 28)),
+                'status': rng.choice(('Ended', 'Returning Series')),
+                'number_of_seasons': (count - 1) // EPISODES_PER_SEASON + 1,
+                'number_of_episodes': count,
+                'poster_path': f'/poster_tv{index}.jpg',
+                'genres': _genres(rng),
+                'directory_path': f'/media/Shows/{title} {index}',
+                'date_added': added,
+                'last_updated': added,
+            })
+            for number in range(count):
+                season, episode = divmod(number, EPISODES_PER_SEASON)
+                resolution = _pick_resolution(rng)
+                episode_rows.append({
+                    'tvshow_id': index + 1,
+                    'season_number': season + 1,
+                    'episode_number': episode + 1,
+                    'title': f'Episode {episode + 1}',
+                    'air_date': date(2020, episode % 12 + 1, 1),
+                    'file_path': f'/media/Shows/{title} {index}/Season {season + 1:02d}/'
+                                 f'S{season + 1:02d}E{episode + 1:02d}.{resolution}.mkv',
+                    'file_size': rng.randint(*EPISODE_SIZES[resolution]),
+                    'resolution': resolution,
+                    'date_added': added,
+                    'last_updated': added,
+                })
+            remaining -= count
+        _insert(TVShow, shows)
+        _insert(Episode, episode_rows)
+
+        credits = []
+        for column, owners in (('movie_id', movies), ('tvshow_id', len(shows))):
+            for owner in range(1, owners + 1):
+                for order in range(cast):
+                    credits.append({column: owner, 'person_id': rng.randint(1, PEOPLE),
+                                    'character': f'Character {order + 1}',
+                                    'billing_order': order})
+        _insert(Credit, credits)
+        db.session.commit()
+
+        rebuild_library_stats()
+        LibraryVersion.bump()
+        db.session.commit()
+
+    return {'movies': movies, 'tvshows': len(shows), 'episodes': len(episode_rows),
+            'credits': len(credits), 'people': PEOPLE,
+            'seconds': round(time.perf_counter() - start, 3)}
+
+
+def library_counts(app):
+    """Row counts of an existing database, or None when it is empty"""
+    from app import db
+    from app.models.movie import Movie
+    from app.models.tvshow import TVShow, Episode
+    from app.models.person import Credit
+    with app.app_context():
+        movies = db.session.query(Movie.id).count()
+        if not movies:
+            return None
+        return {'movies': movies, 'tvshows': db.session.query(TVShow.id).count(),
+                'episodes': db.session.query(Episode.id).count(),
+                'credits': db.session.query(Credit.id).count()}
+
+
+def route_urls(app, route, count, counts, rng):
+    """
+    Build request URLs for a route
+
+    Listing pages mix the first pages with uniformly deep ones, all sort
+    orders and an occasional genre filter, since deep pages are where
+    OFFSET pagination degrades.
+    """
+    from flask import url_for
+    from app.queries import MOVIE_SORTS, TVSHOW_SORTS
+    per_page = app.config['ITEMS_PER_PAGE']
+
+    def listing(endpoint, rows, sorts):
+        pages = max(1, -(-rows // per_page))
+        page = rng.randint(1, min(5, pages)) if rng.random() < 0.5 else rng.randint(1, pages)
+        args = {'page': page, 'sort_by': rng.choice(sorted(sorts))}
+        if rng.random() < 0.2:
+            args['genre'] = rng.choice(GENRES)
+        return url_for(endpoint, **args)
+
+    urls = []
+    with app.test_request_context():
+        for _ in range(count):
+            if route == 'movie.index':
+                urls.append(listing(route, counts['movies'], MOVIE_SORTS))
+            elif route == 'tvshow.index':
+                urls.append(listing(route, counts['tvshows'], TVSHOW_SORTS))
+            elif route == 'tvshow.tvshow_detail':
+                urls.append(url_for(route, id=rng.randint(1, counts['tvshows'])))
+            elif route == 'main.search':
+                urls.append(url_for(route, q=rng.choice(ADJECTIVES + NOUNS)))
+            else:
+                urls.append(url_for(route))
+    return urls
+
+
+def is_success(status):
+    """True for 2xx statuses; errors are recorded as 'error:<name>' strings"""
+    return isinstance(status, int) and 200 <= status < 300
+
+
+def route_status(statuses):
+    """'ok' when every response was 2xx, 'failed' when none was, else 'partial'"""
+    succeeded = sum(count for status, count in statuses.items() if is_success(status))
+    if succeeded == sum(statuses.values()):
+        return 'ok'
+    return 'failed' if not succeeded else 'partial'
+
+
+def summarize(latencies, statuses, statements, seconds):
+    """
+    Latency percentiles (ms), throughput and statements per request
+
+    latencies and statements cover the successful (2xx) requests only;
+    statuses counts every request.
+    """
+    requests = len(latencies)
+    return {
+        'status': route_status(statuses),
+        'requests': sum(statuses.values()),
+        'succeeded': requests,
+        'statuses': dict(statuses),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else None,
+        'mean_ms': round(sum(latencies) / requests * 1000, 2) if latencies else None,
+        'requests_per_second': round(requests / seconds, 1) if seconds else None,
+        'queries_per_request': round(sum(statements) / requests, 2) if requests else None,
+        'max_queries': max(statements) if statements else None,
+    }
+
+
+def drive_client(app, urls):
+    """Issue the requests one after another through the test client"""
+    from app.querylog import track_queries
+
+    client = app.test_client()
+    for url in urls[:WARMUP_REQUESTS]:
+        _client_get(client, url)
+
+    latencies, statements, statuses = [], [], Counter()
+    started = time.perf_counter()
+    for url in urls:
+        with track_queries(capture_sites=False) as log:
+            start = time.perf_counter()
+            status = _client_get(client, url)
+            elapsed = time.perf_counter() - start
+        statuses[status] += 1
+        # Error pages are fast and cheap; they would flatter the statistics
+        if is_success(status):
+            latencies.append(elapsed)
+            statements.append(log.count)
+    return summarize(latencies, statuses, statements, time.perf_counter() - started)
+
+
+def _client_get(client, url):
+    # TESTING propagates view exceptions; count them instead of stopping
+    try:
+        response = client.get(url)
+    except Exception as e:
+        return f'error:{type(e).__name__}'
+    response.close()
+    return response.status_code
+
+
+def drive_server(address, urls, concurrency):
+    """Issue the requests from concurrent clients against a running server"""
+    host, port = address
+    pending = list(reversed(urls))
+    lock = threading.Lock()
+    latencies, statuses = [], Counter()
+
+    def client():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                url = pending.pop()
+            connection = http.client.HTTPConnection(host, port, timeout=60)
+            start = time.perf_counter()
+            try:
+                connection.request('GET', url)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                status = f'error:{type(e).__name__}'
+            finally:
+                connection.close()
+            elapsed = time.perf_counter() - start
+            with lock:
+                if is_success(status):
+                    latencies.append(elapsed)
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    with StatementCounter() as counter:
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - started
+
+    result = summarize(latencies, statuses, [], seconds)
+    # Statements are counted for the whole run, so they are only reported
+    # when every request succeeded
+    if urls and result['status'] == 'ok':
+        result['queries_per_request'] = round(counter.count / len(urls), 2)
+    result['concurrency'] = concurrency
+    return result
+
+
+class StatementRecorder:
+    """Record the distinct SELECT statements (with first parameters) run in a block"""
+
+    def __init__(self):
+        self.statements = {}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() == 'SELECT' and statement not in self.statements:
+            self.statements[statement] = parameters
+
+    def __enter__(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        event.remove(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        return False
+
+
+def _sqlite_plan(rows):
+    """Indent EXPLAIN QUERY PLAN rows (id, parent, notused, detail) as a tree"""
+    depth, lines = {0: -1}, []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node] + detail)
+    return lines
+
+
+def explain_route(app, url):
+    """EXPLAIN every distinct SELECT one request to url runs"""
+    from app import db
+
+    client = app.test_client()
+    with StatementRecorder() as recorder:
+        _client_get(client, url)
+
+    plans = []
+    with app.app_context():
+        connection = db.session.connection()
+        dialect = connection.dialect.name
+        for statement, parameters in recorder.statements.items():
+            prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+            try:
+                rows = connection.exec_driver_sql(prefix + statement, parameters).all()
+            except Exception as e:
+                plan = [f'EXPLAIN failed: {e}']
+                db.session.rollback()
+                connection = db.session.connection()
+            else:
+                plan = _sqlite_plan(rows) if dialect == 'sqlite' else [row[0] for row in rows]
+            plans.append({'statement': ' '.join(statement.split()), 'plan': plan})
+    return {'url': url, 'queries': plans}
+
+
+def run_server(app):
+    """Serve app from a threaded WSGI server on a free port"""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--movies', type=int, default=100000)
+    parser.add_argument('--episodes', type=int, default=500000)
+    parser.add_argument('--cast', type=int, default=5, help='Credits per movie and TV show')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route')
+    parser.add_argument('--concurrency', type=int, default=0,
+                        help='Concurrent clients against a WSGI server (default: skip)')
+    parser.add_argument('--routes', default=','.join(ROUTES),
+                        help='Comma-separated endpoints to drive')
+    parser.add_argument('--page-cache', action='store_true',
+                        help='Keep the page cache on (measures cache hits)')
+    parser.add_argument('--database-url', help='Benchmark this database instead of SQLite')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir',
+                        help='Keep the seeded database here; reused when already seeded')
+    parser.add_argument('--output', default='-', help='JSON report path (default: stdout)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    # Missing templates and other view errors are counted, not logged
+    logging.getLogger('app').setLevel(logging.CRITICAL)
+    logging.getLogger('werkzeug').setLevel(logging.CRITICAL)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='movieshelf-routes-')
+    os.makedirs(workdir, exist_ok=True)
+    overrides = {'PAGE_CACHE_TYPE': 'lru' if args.page_cache else 'none'}
+    if args.database_url:
+        overrides['SQLALCHEMY_DATABASE_URI'] = args.database_url
+    app = create_benchmark_app(workdir, **overrides)
+
+    try:
+        counts = library_counts(app)
+        seeding = None
+        if counts is None:
+            seeding = seed_database(app, args.movies, args.episodes, cast=args.cast,
+                                    seed=args.seed)
+            counts = library_counts(app)
+        logging.getLogger(__name__).warning(f"Library: {counts}")
+
+        rng = random.Random(args.seed)
+        server = run_server(app) if args.concurrency > 0 else None
+        results = {}
+        try:
+            for route in args.routes.split(','):
+                urls = route_urls(app, route, args.requests, counts, rng)
+                result = {'client': drive_client(app, urls),
+                          'explain': explain_route(app, urls[0])}
+                if server is not None:
+                    result['server'] = drive_server(server.server_address[:2], urls,
+                                                    args.concurrency)
+                results[route] = result
+                client = result['client']
+                if client['status'] == 'failed':
+                    logging.getLogger(__name__).warning(
+                        f"{route}: failed, statuses {client['statuses']}")
+                    continue
+                logging.getLogger(__name__).warning(
+                    f"{route}: p50 {client['p50_ms']} ms, p99 {client['p99_ms']} ms, "
+                    f"{client['queries_per_request']} queries/request"
+                    + (f" ({client['status']}, statuses {client['statuses']})"
+                       if client['status'] != 'ok' else ''))
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+    finally:
+        close_app(app)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    write_report({'benchmark': 'routes', 'environment': environment(),
+                  'settings': {key: value for key, value in vars(args).items()
+                               if key not in ('output', 'workdir', 'database_url')},
+                  'library': counts, 'seeding': seeding,
+                  'peak_rss_mb': round(peak_rss_mb(), 1), 'routes': results,
+                  'failed_routes': sorted(
+                      route for route, result in results.items()
+                      if any(run['status'] != 'ok' for key, run in result.items()
+                             if key in ('client', 'server')))}, args.output)
+
+
+if __name__ == '__main__':
+    main()
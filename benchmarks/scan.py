@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 21:04:37
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 21:04:37
+"""
+End-to-end scan benchmark
+
+For every library size a synthetic tree is generated and scan_directories()
+runs three times against the local TMDb stand-in:
+
+- cold: empty database, every file is new
+- warm: nothing changed on disk
+- churn: after moving, deleting, touching and adding 1% of the files
+
+Each phase reports wall time, files per second, the process's peak RSS,
+SQL statements (every engine and thread), HTTP requests to the stand-in
+and the ScanRun counters and stage timings.
+
+    python -m benchmarks.scan --sizes 1000,10000,100000 --output scan.json
+"""
+import os
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from benchmarks.common import (create_benchmark_app, close_app, StatementCounter, peak_rss_mb,
+                               environment, write_report)
+from benchmarks.library import generate_library, churn_library
+from benchmarks.fake_tmdb import FakeTMDB
+
+
+def run_phase(app, phase, root, tmdb):
+    """Run one scan and collect its measurements"""
+    from app import db
+    from app.models.scan import ScanRun
+    from app.scanner.file_scanner import scan_directories
+
+    tmdb.reset()
+    with app.app_context(), StatementCounter() as statements:
+        start = time.perf_counter()
+        run_id = scan_directories([root])
+        seconds = time.perf_counter() - start
+        run = db.session.get(ScanRun, run_id)
+        result = {
+            'phase': phase,
+            'seconds': round(seconds, 3),
+            'files_per_second': round(run.files_walked / seconds, 1) if seconds else None,
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'sql_statements': statements.count,
+            'http_requests': tmdb.total(),
+            'http_requests_by_endpoint': dict(tmdb.requests),
+            'files_walked': run.files_walked,
+            'files_skipped': run.files_skipped,
+            'new': run.new_count,
+            'updated': run.updated_count,
+            'deleted': run.deleted_count,
+            'bytes_downloaded': run.bytes_downloaded,
+            'stages': {stage: {key: round(value, 4) for key, value in timings.items()}
+                       for stage, timings in run.stage_timings()},
+        }
+    logging.getLogger(__name__).warning(
+        f"{phase}: {result['files_walked']} files in {seconds:.1f}s "
+        f"({result['files_per_second']} files/s)")
+    return result
+
+
+def benchmark_size(files, workdir, seed=0, churn=0.01, tmdb_latency=0.0, nfo_share=0.5):
+    """Generate a library of the given size and run the three scan phases"""
+    root = os.path.join(workdir, 'media')
+    start = time.perf_counter()
+    library = generate_library(root, files, seed=seed, nfo_share=nfo_share)
+    generated = time.perf_counter() - start
+
+    app = create_benchmark_app(workdir, TMDB_API_KEY='benchmark',
+                               MEDIA_DIRECTORIES=[root])
+    try:
+        with FakeTMDB(latency=tmdb_latency) as tmdb:
+            tmdb.install()
+            phases = [run_phase(app, 'cold', root, tmdb),
+                      run_phase(app, 'warm', root, tmdb)]
+            changes = churn_library(root, library, fraction=churn, seed=seed + 1)
+            phases.append(dict(run_phase(app, 'churn', root, tmdb), changes=changes))
+    finally:
+        close_app(app)
+
+    return {
+        'files': files,
+        'movies': library['movies'],
+        'episodes': library['episodes'],
+        'shows': library['shows'],
+        'generate_seconds': round(generated, 3),
+        'phases': phases,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='1000',
+                        help='Comma-separated library sizes in files (default: 1000)')
+    parser.add_argument('--churn', type=float, default=0.01,
+                        help='Share of files changed before the churn scan')
+    parser.add_argument('--nfo-share', type=float, default=0.5,
+                        help='Share of titles with NFO sidecars')
+    parser.add_argument('--tmdb-latency-ms', type=float, default=0.0,
+                        help='Latency added to every TMDb stand-in response')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help='Keep generated trees and databases here')
+    parser.add_argument('--output', default='-', help='JSON report path (default: stdout)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    # Per-file scanner logging would dominate the measurements
+    logging.getLogger('app').setLevel(logging.ERROR)
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(',')):
+        workdir = os.path.join(args.workdir, str(size)) if args.workdir else tempfile.mkdtemp(
+            prefix=f'movieshelf-bench-{size}-')
+        os.makedirs(workdir, exist_ok=True)
+        try:
+            results.append(benchmark_size(size, workdir, seed=args.seed, churn=args.churn,
+                                          tmdb_latency=args.tmdb_latency_ms / 1000,
+                                          nfo_share=args.nfo_share))
+        finally:
+            if not args.workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+    write_report({'benchmark': 'scan', 'environment': environment(),
+                  'settings': {key: value for key, value in vars(args).items()
+                               if key not in ('output', 'workdir')},
+                  'results': results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 22:18:40
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 22:18:40
+"""
+Web worker startup budget
+
+Starts fresh interpreters with ``-X importtime`` that import the
+application and call create_app(), the work every web worker does before
+serving its first request. Reports the median import time and
+create_app() wall time, the heaviest modules, and whether any
+scanner-only dependency (guessit, requests) was loaded.
+
+Exits with status 1 when the median exceeds --budget-ms or a scanner
+dependency is imported at startup, so it can gate CI:
+
+    python -m benchmarks.startup --budget-ms 600
+
+tests/test_startup.py runs the same check in the pytest suite.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+from benchmarks.common import ROOT, environment, write_report
+
+# Only the scanner needs these; web workers must not pay for them
+SCANNER_MODULES = ('guessit', 'rebulk', 'babelfish', 'requests')
+TOP_MODULES = 15
+DEFAULT_BUDGET_MS = 600.0
+
+# Runs in the child interpreter; argv[1] is a scratch directory
+STARTUP_SNIPPET = """
+import os, sys, json, time
+start = time.perf_counter()
+from config import Config
+from app import create_app
+workdir = sys.argv[1]
+create_app(type('StartupConfig', (Config,), {
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(workdir, 'startup.db'),
+    'POSTER_CACHE_DIR': os.path.join(workdir, 'posters'),
+    'PAGE_CACHE_DIR': os.path.join(workdir, 'pages'),
+}))
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds,
+                  'loaded': sorted(name for name in %r if name in sys.modules)}))
+""" % (SCANNER_MODULES,)
+
+
+def parse_importtime(text):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output"""
+    modules = {}
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The header line
+        modules[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return modules
+
+
+def measure_startup(workdir):
+    """Start one interpreter; returns its timings and loaded scanner modules"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SNIPPET, workdir],
+        cwd=ROOT, capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{completed.stderr[-4000:]}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(completed.stderr)
+    return {
+        'import_ms': sum(own for own, _ in modules.values()) / 1000,
+        'create_app_ms': result['seconds'] * 1000,
+        'scanner_modules': result['loaded'],
+        'modules': modules,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Maximum median create_app() time, imports included')
+    parser.add_argument('--output', default='-', help='JSON report path (default: stdout)')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='movieshelf-startup-')
+    try:
+        runs = [measure_startup(workdir) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    median = statistics.median(run['create_app_ms'] for run in runs)
+    scanner_modules = sorted({name for run in runs for name in run['scanner_modules']})
+    heaviest = sorted(runs[-1]['modules'].items(), key=lambda item: item[1][1], reverse=True)
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"create_app() took {median:.0f} ms, budget is {args.budget_ms:.0f} ms")
+    if scanner_modules:
+        failures.append(f"Scanner modules imported at startup: {', '.join(scanner_modules)}")
+
+    write_report({
+        'benchmark': 'startup',
+        'environment': environment(),
+        'settings': {'runs': args.runs, 'budget_ms': args.budget_ms},
+        'create_app_ms': round(median, 1),
+        'import_ms': round(statistics.median(run['import_ms'] for run in runs), 1),
+        'runs_ms': [round(run['create_app_ms'], 1) for run in runs],
+        'scanner_modules': scanner_modules,
+        'heaviest_modules': [{'module': name, 'self_ms': own / 1000, 'cumulative_ms': total / 1000}
+                             for name, (own, total) in heaviest[:TOP_MODULES]],
+        'failures': failures,
+    }, args.output)
+
+    for failure in failures:
+        sys.stderr.write(failure + '\n')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -22,6 +22,22 @@ class Config:
         os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # SQLite profile: WAL lets pages be read while the scanner writes
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE_MB = int(os.environ.get('SQLITE_CACHE_SIZE_MB', 64))
+    SQLITE_MMAP_SIZE_MB = int(os.environ.get('SQLITE_MMAP_SIZE_MB', 256))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+    # PostgreSQL profile: connection pool and per-statement time limit
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get(
+        'DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+
     # Media directories to scan
     MEDIA_DIRECTORIES = os.environ.get('MEDIA_DIRECTORIES', '').split(',')
 
@@ -35,6 +51,80 @@ class Config:
     VIDEO_EXTENSIONS = ['.mp4', '.mkv', '.avi',
                         '.mov', '.wmv', '.flv', '.webm', '.m4v']
 
+    # Scanner worker pool size and bytes read per file by the header probe
+    SCANNER_WORKERS = int(os.environ.get('SCANNER_WORKERS', 4))
+    PROBE_MAX_BYTES = int(os.environ.get('PROBE_MAX_BYTES', 4 * 1024 * 1024))
+    # Resolved files waiting for the scanner's single writer thread
+    SCAN_WRITER_QUEUE_SIZE = int(os.environ.get('SCAN_WRITER_QUEUE_SIZE', 256))
+    # Sharded scans (flask scan-plan / scan-worker): a shard lease expires
+    # unless renewed by heartbeats, and is given up after max attempts
+    SCAN_LEASE_SECONDS = int(os.environ.get('SCAN_LEASE_SECONDS', 300))
+    SCAN_HEARTBEAT_SECONDS = int(os.environ.get('SCAN_HEARTBEAT_SECONDS', 60))
+    SCAN_SHARD_MAX_ATTEMPTS = int(os.environ.get('SCAN_SHARD_MAX_ATTEMPTS', 3))
+    # 'cpu', 'memory' or 'cpu,memory': attach cProfile / tracemalloc
+    # reports to every ScanRun (slows scans down; off by default)
+    SCAN_PROFILE = os.environ.get('SCAN_PROFILE', '')
+
+    # Days a missing file stays tombstoned before purge-tombstones deletes it
+    MISSING_GRACE_PERIOD_DAYS = int(
+        os.environ.get('MISSING_GRACE_PERIOD_DAYS', 30))
+
+    # Append-only store of resolved metadata used by `flask rebuild-db`;
+    # empty disables it, a .gz suffix compresses it
+    METADATA_STORE_PATH = os.environ.get('METADATA_STORE_PATH', os.path.join(
+        os.path.abspath(os.path.dirname(__file__)), 'cache', 'metadata.ndjson'))
+
+    # Bearer token required by POST /library/import; empty disables imports
+    LIBRARY_IMPORT_TOKEN = os.environ.get('LIBRARY_IMPORT_TOKEN', '')
+
+    # Server-side page cache: 'lru' (per process), 'filesystem' or 'null'
+    PAGE_CACHE_TYPE = os.environ.get('PAGE_CACHE_TYPE', 'lru')
+    PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 512))
+    PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR') or os.path.join(
+        os.path.abspath(os.path.dirname(__file__)), 'cache', 'pages')
+    # Rendered poster cards per process (LRU entries); 0 disables
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 4096))
+
+    # Prometheus text metrics (request, SQL, scan, TMDb, cache, queues)
+    METRICS_ENABLED = os.environ.get(
+        'METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_PATH = os.environ.get('METRICS_PATH', '/metrics')
+    # Per-request / per-scan-job SQL log and N+1 detector (X-SQL-Queries
+    # header); None follows debug mode
+    SQL_QUERY_LOG = {'1': True, 'true': True, '0': False, 'false': False}.get(
+        os.environ.get('SQL_QUERY_LOG', '').lower())
+    SQL_REPEAT_THRESHOLD = int(os.environ.get('SQL_REPEAT_THRESHOLD', 5))
+
+    # Media streaming: '' streams from Python (sendfile through the WSGI
+    # file wrapper), 'x-accel-redirect' hands files to nginx and
+    # 'x-sendfile' to Apache/lighttpd
+    MEDIA_SENDFILE_MODE = os.environ.get('MEDIA_SENDFILE_MODE', '')
+    # Media root to nginx internal location, e.g. "/mnt/media=/protected-media"
+    MEDIA_ACCEL_REDIRECT_MAP = dict(
+        mapping.split('=', 1) for mapping in
+        os.environ.get('MEDIA_ACCEL_REDIRECT_MAP', '').split(',') if '=' in mapping)
+    STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 1 << 20))
+
+    # Production server (flask serve / gunicorn.conf.py); 0 workers or
+    # threads autotunes from the CPUs available to the process
+    SERVE_BIND = os.environ.get('SERVE_BIND', '0.0.0.0:8000')
+    SERVE_WORKERS = int(os.environ.get('SERVE_WORKERS', 0))
+    SERVE_THREADS = int(os.environ.get('SERVE_THREADS', 0))
+    SERVE_TIMEOUT = int(os.environ.get('SERVE_TIMEOUT', 120))
+    SERVE_PIDFILE = os.environ.get('SERVE_PIDFILE') or os.path.join(
+        os.path.abspath(os.path.dirname(__file__)), 'cache', 'gunicorn.pid')
+    # HUP the server after a scan so fresh, warmed workers replace the old
+    SERVE_RELOAD_AFTER_SCAN = os.environ.get(
+        'SERVE_RELOAD_AFTER_SCAN', 'true').lower() in ('1', 'true', 'yes')
+    # Pages rendered into each worker's page cache before it takes traffic
+    SERVE_WARMUP_PATHS = [path for path in os.environ.get(
+        'SERVE_WARMUP_PATHS', '/,/movies/,/tvshows/,/stats').split(',') if path]
+
+    # Fingerprinted, precompressed static assets (flask build-assets),
+    # served from /assets/ with immutable caching
+    STATIC_BUILD_DIR = os.environ.get('STATIC_BUILD_DIR') or os.path.join(
+        os.path.abspath(os.path.dirname(__file__)), 'cache', 'static')
+
     # Poster image cache directory
     POSTER_CACHE_DIR = os.path.join(os.path.abspath(
         os.path.dirname(__file__)), 'app', 'static', 'img', 'posters')
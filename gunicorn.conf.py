@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 22:47:05
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 22:47:05
+"""
+Gunicorn configuration for production
+
+    gunicorn -c gunicorn.conf.py run:app      (or: flask serve)
+
+Settings come from the SERVE_* entries of config.py (environment or .env).
+gthread workers keep the heartbeat going while a thread streams a file
+or runs POST /scan, so only SERVE_TIMEOUT of silence kills a worker.
+"""
+import os
+from config import Config
+from app.serve import autotune
+
+bind = Config.SERVE_BIND
+workers, threads = autotune(Config.SERVE_WORKERS, Config.SERVE_THREADS)
+worker_class = 'gthread'
+preload_app = True
+timeout = Config.SERVE_TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+pidfile = Config.SERVE_PIDFILE
+accesslog = os.environ.get('SERVE_ACCESS_LOG') or None
+errorlog = '-'
+
+if pidfile:
+    os.makedirs(os.path.dirname(pidfile), exist_ok=True)
+
+
+def when_ready(server):
+    # Runs in the master once the preloaded app is imported, before forking
+    from app.serve import prepare_master
+    prepare_master(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    # Runs in each worker before it accepts connections
+    from app.serve import prepare_worker
+    prepare_worker(worker.wsgi)
@@ -4,8 +4,12 @@
 # @Last Modified by:   Zana Saedpanah
 # @Last Modified time: 2025-02-26 20:21:13
 
+import logging
 from app import create_app
 
+# Scanner progress is logged at INFO
+logging.basicConfig(level=logging.INFO)
+
 app = create_app()
 
 if __name__ == '__main__':
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 23:05:10
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 23:05:10
+"""
+Shared fixtures: an application on an in-memory SQLite database
+
+    python -m pytest -q
+"""
+from datetime import date
+
+import pytest
+
+from app import create_app, db
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        MEDIA_DIRECTORIES = []
+        TMDB_API_KEY = ''
+        # Measure the views, not cache hits
+        PAGE_CACHE_TYPE = 'none'
+        FRAGMENT_CACHE_SIZE = 0
+        METADATA_STORE_PATH = ''
+        POSTER_CACHE_DIR = str(tmp_path / 'posters')
+        STATIC_BUILD_DIR = str(tmp_path / 'static')
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def library(app):
+    """Seed movies, TV shows with episodes and billed cast"""
+    from app.models.movie import Movie
+    from app.models.tvshow import TVShow, Episode
+    from app.models.person import Person, Credit
+
+    people = [Person(tmdb_id=100 + index, name=f'Actor {index}') for index in range(5)]
+    db.session.add_all(people)
+
+    movies = []
+    for index in range(30):
+        movie = Movie(title=f'Movie {index}', tmdb_id=1000 + index,
+                      release_date=date(2000 + index % 20, 1, 1), runtime=100,
+                      genres='Drama,Action', file_path=f'/media/Movies/movie{index}.mkv',
+                      file_size=1024, resolution='1080p')
+        movies.append(movie)
+        db.session.add(movie)
+        for order, person in enumerate(people[:3]):
+            db.session.add(Credit(person=person, movie=movie, character=f'Role {order}',
+                                  billing_order=order))
+
+    tvshows = []
+    for index in range(3):
+        tvshow = TVShow(title=f'Show {index}', tmdb_id=2000 + index, genres='Drama',
+                        first_air_date=date(2010, 1, 1),
+                        directory_path=f'/media/Shows/Show {index}')
+        tvshows.append(tvshow)
+        db.session.add(tvshow)
+        for number in range(1, 5):
+            db.session.add(Episode(tvshow=tvshow, season_number=1, episode_number=number,
+                                   title=f'Episode {number}',
+                                   file_path=f'/media/Shows/Show {index}/S01E{number:02d}.mkv',
+                                   file_size=512))
+        db.session.add(Credit(person=people[0], tvshow=tvshow, billing_order=0))
+
+    db.session.commit()
+    return {'movies': movies, 'tvshows': tvshows, 'people': people}
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-20 09:12:31
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-20 09:12:31
+"""
+Keyset pagination cursors of the JSON API and the infinite-scroll cards
+"""
+import json
+import base64
+
+import pytest
+
+
+def cursor(*values):
+    raw = json.dumps(list(values)).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+@pytest.mark.parametrize('sort, value', [
+    ('title', cursor('title', {'a': 1}, 3)),
+    ('title', cursor('title', ['a'], 3)),
+    ('title', cursor('title', 5, 3)),
+    ('title', cursor('title', 'Movie 1', True)),
+    ('title', cursor('release_date', '2001-01-01', 3)),
+    ('release_date', cursor('release_date', 'not a date', 3)),
+    ('title', cursor('title', 'Movie 1')),
+    ('title', 'not base64!'),
+])
+@pytest.mark.parametrize('url', ['/api/v1/movies?sort_by={sort}&cursor={cursor}',
+                                 '/movies/cards?sort_by={sort}&cursor={cursor}'])
+def test_invalid_cursor_is_rejected(client, library, url, sort, value):
+    assert client.get(url.format(sort=sort, cursor=value)).status_code == 400
+
+
+def test_next_cursor_continues_the_listing(client, library):
+    first = client.get('/api/v1/movies?sort_by=title').get_json()
+    second = client.get(f"/api/v1/movies?sort_by=title&cursor={first['next_cursor']}").get_json()
+    first_ids = {movie['id'] for movie in first['data']}
+    assert second['data']
+    assert first_ids.isdisjoint(movie['id'] for movie in second['data'])
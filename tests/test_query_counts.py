@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 23:05:10
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 23:05:10
+"""
+Statement budgets of the library pages
+
+Budgets do not depend on the number of rows shown; a statement repeated
+per row (an N+1 query) fails the test even within the budget.
+"""
+import pytest
+from jinja2 import TemplateNotFound
+
+from app.querylog import assert_max_queries
+
+
+def get(client, url, max_queries):
+    with assert_max_queries(max_queries, repeat_threshold=2):
+        response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+def require_template(app, name):
+    try:
+        app.jinja_env.get_template(name)
+    except TemplateNotFound:
+        pytest.skip(f'{name} is not in this tree')
+
+
+@pytest.mark.parametrize('url, max_queries', [
+    ('/', 4),
+    ('/movies/', 4),
+    ('/movies/?page=2&sort_by=release_date', 4),
+    ('/movies/?genre=Drama', 4),
+    ('/api/v1/movies', 2),
+    ('/api/v1/movies?page=2', 2),
+])
+def test_listing_queries(client, library, url, max_queries):
+    get(client, url, max_queries)
+
+
+def test_movie_detail_queries(client, library):
+    get(client, f"/movies/{library['movies'][0].id}", 4)
+
+
+def test_tvshow_index_queries(app, client, library):
+    require_template(app, 'tvshows/index.html')
+    get(client, '/tvshows/', 4)
+
+
+def test_tvshow_detail_queries(app, client, library):
+    require_template(app, 'tvshows/detail.html')
+    get(client, f"/tvshows/{library['tvshows'][0].id}", 6)
+
+
+def test_budget_catches_repeated_queries(app, library):
+    from app.models.movie import Movie
+    with pytest.raises(AssertionError):
+        with assert_max_queries(100, repeat_threshold=2):
+            for movie in Movie.query.limit(3):
+                movie.credits.count()
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# @Author: Zana Saedpanah
+# @Date:   2026-10-19 23:40:25
+# @Last Modified by:   Zana Saedpanah
+# @Last Modified time: 2026-10-19 23:40:25
+"""
+Web worker startup budget (see benchmarks.startup)
+
+Each run starts a fresh interpreter with ``-X importtime``, so a
+scanner-only import creeping back to module level fails here. The
+budget can be raised on slow machines with STARTUP_BUDGET_MS.
+"""
+import os
+
+from benchmarks.startup import DEFAULT_BUDGET_MS, SCANNER_MODULES, measure_startup
+
+RUNS = 5
+
+
+def test_startup_skips_scanner_modules_and_meets_budget(tmp_path):
+    runs = [measure_startup(str(tmp_path)) for _ in range(RUNS)]
+
+    imported = sorted({name.split('.')[0] for run in runs for name in run['modules']} &
+                      set(SCANNER_MODULES))
+    assert not imported, f"Scanner modules imported at startup: {', '.join(imported)}"
+
+    budget = float(os.environ.get('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS))
+    # The fastest run: machine noise only ever adds time
+    fastest = min(run['create_app_ms'] for run in runs)
+    assert fastest <= budget, f"create_app() took {fastest:.0f} ms, budget is {budget:.0f} ms"